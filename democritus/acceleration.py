@@ -0,0 +1,93 @@
+from __future__ import division
+
+import numpy as np
+
+
+class Accelerator(object):
+    def reset(self):
+        raise NotImplementedError('Subclasses of Accelerator must implement \'reset\' method')
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+    def extrapolate(self, values, mapped_values):
+        raise NotImplementedError('Subclasses of Accelerator must implement \'extrapolate\' method')
+
+    def accelerate(self, sender_values, receiver_values, new_sender_values, new_receiver_values):
+        values = np.concatenate((np.ravel(sender_values), np.ravel(receiver_values)))
+        mapped_values = np.concatenate((np.ravel(new_sender_values), np.ravel(new_receiver_values)))
+        extrapolated_values = self.extrapolate(values, mapped_values)
+        if extrapolated_values is None:
+            return new_sender_values, new_receiver_values
+        n_sender_values = np.size(sender_values)
+        extrapolated_sender_values = project_on_simplex(
+            extrapolated_values[:n_sender_values].reshape(np.shape(sender_values)))
+        extrapolated_receiver_values = project_on_simplex(
+            extrapolated_values[n_sender_values:].reshape(np.shape(receiver_values)))
+        if extrapolated_sender_values is None or extrapolated_receiver_values is None:
+            self.reset()
+            return new_sender_values, new_receiver_values
+        return extrapolated_sender_values, extrapolated_receiver_values
+
+
+def project_on_simplex(values):
+    if not np.all(np.isfinite(values)):
+        return None
+    clipped_values = np.clip(values, 0, None)
+    row_sums = np.sum(clipped_values, axis=-1, keepdims=True)
+    if np.any(row_sums <= 0):
+        return None
+    return clipped_values / row_sums
+
+
+class AndersonAcceleration(Accelerator):
+    def __init__(self, depth=5, regularization=1e-10, restart_threshold=1):
+        if depth < 1:
+            raise ValueError('Depth of Anderson acceleration should be at least 1, but is %s' % depth)
+        self.depth = depth
+        self.regularization = regularization
+        self.restart_threshold = restart_threshold
+        self.mapped_values_history = []
+        self.residuals_history = []
+
+    def reset(self):
+        self.mapped_values_history = []
+        self.residuals_history = []
+
+    def get_state(self):
+        return {'mapped values': np.array(self.mapped_values_history),
+                'residuals': np.array(self.residuals_history)}
+
+    def set_state(self, state):
+        self.mapped_values_history = list(state['mapped values'])
+        self.residuals_history = list(state['residuals'])
+
+    def extrapolate(self, values, mapped_values):
+        residuals = mapped_values - values
+        if len(self.residuals_history) > 0 and len(self.residuals_history[-1]) != len(residuals):
+            self.reset()
+        if len(self.residuals_history) > 0:
+            smallest_residual_norm = min(np.linalg.norm(r) for r in self.residuals_history)
+            if np.linalg.norm(residuals) > self.restart_threshold * smallest_residual_norm:
+                self.reset()
+        self.mapped_values_history.append(mapped_values)
+        self.residuals_history.append(residuals)
+        if len(self.residuals_history) > self.depth + 1:
+            self.mapped_values_history.pop(0)
+            self.residuals_history.pop(0)
+        if len(self.residuals_history) < 2:
+            return None
+
+        residual_differences = np.diff(self.residuals_history, axis=0)
+        mapped_values_differences = np.diff(self.mapped_values_history, axis=0)
+        gram_matrix = np.dot(residual_differences, residual_differences.T)
+        gram_matrix += self.regularization * np.trace(gram_matrix) * np.eye(len(gram_matrix))
+        try:
+            coefficients = np.linalg.solve(gram_matrix, np.dot(residual_differences, residuals))
+        except np.linalg.LinAlgError:
+            self.reset()
+            return None
+        return mapped_values - np.dot(coefficients, mapped_values_differences)
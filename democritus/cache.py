@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+
+from democritus import __version__
+from democritus.trajectory import plain_data
+
+marker_file_name = '.democritus-cache'
+
+
+def stable_hash(value):
+    normalized = json.dumps(plain_data(value), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def result_key(spec, seed_sequence, max_steps):
+    return stable_hash({'spec': spec,
+                        'seed': [str(seed_sequence.entropy), list(seed_sequence.spawn_key)],
+                        'max steps': max_steps})
+
+
+class ResultCache(object):
+    def __init__(self, directory, max_size=None, version=__version__):
+        if max_size is not None and max_size <= 0:
+            raise ValueError('Maximum cache size should be positive, but is %s' % max_size)
+        self.directory = os.path.join(directory, version)
+        self.max_size = max_size
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        open(os.path.join(self.directory, marker_file_name), 'a').close()
+        for entry in os.listdir(directory):
+            if entry != version and os.path.isfile(os.path.join(directory, entry, marker_file_name)):
+                shutil.rmtree(os.path.join(directory, entry))
+        self.size = sum(os.path.getsize(file_name) for file_name in self.entry_file_names())
+
+    def entry_file_name(self, key):
+        return os.path.join(self.directory, key[:2], key + '.npz')
+
+    def entry_file_names(self):
+        return [os.path.join(self.directory, prefix, entry)
+                for prefix in os.listdir(self.directory) if os.path.isdir(os.path.join(self.directory, prefix))
+                for entry in os.listdir(os.path.join(self.directory, prefix)) if entry.endswith('.npz')]
+
+    def get(self, key):
+        file_name = self.entry_file_name(key)
+        if not os.path.isfile(file_name):
+            return None
+        with np.load(file_name, allow_pickle=False) as entry:
+            result = json.loads(str(entry['result']), object_pairs_hook=OrderedDict)
+            value = result, entry['sender'], entry['receiver']
+        os.utime(file_name, None)
+        return value
+
+    def put(self, key, value):
+        result, sender_values, receiver_values = value
+        file_name = self.entry_file_name(key)
+        if not os.path.isdir(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        previous_size = os.path.getsize(file_name) if os.path.isfile(file_name) else 0
+        temporary_file_name = file_name + '.tmp'
+        with open(temporary_file_name, 'wb') as entry_file:
+            np.savez(entry_file, result=json.dumps(plain_data(result)), sender=sender_values,
+                     receiver=receiver_values)
+        os.replace(temporary_file_name, file_name)
+        self.size += os.path.getsize(file_name) - previous_size
+        self.evict()
+
+    def evict(self):
+        if self.max_size is None or self.size <= self.max_size:
+            return
+        for file_name in sorted(self.entry_file_names(), key=os.path.getmtime):
+            self.size -= os.path.getsize(file_name)
+            os.remove(file_name)
+            if self.size <= self.max_size:
+                break
+
+    def clear(self):
+        for file_name in self.entry_file_names():
+            os.remove(file_name)
+        self.size = 0
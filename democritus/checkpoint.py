@@ -0,0 +1,36 @@
+import os
+import time
+
+import numpy as np
+
+
+def save_checkpoint(simulation, file_name):
+    simulation.flush_history()
+    temporary_file_name = file_name + '.tmp'
+    with open(temporary_file_name, 'wb') as checkpoint_file:
+        np.savez(checkpoint_file, **simulation.get_state())
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_file_name, file_name)
+
+
+def load_checkpoint(simulation, file_name):
+    with np.load(file_name, allow_pickle=False) as checkpoint:
+        simulation.set_state({key: checkpoint[key] for key in checkpoint.files})
+
+
+class Checkpointer(object):
+    def __init__(self, file_name, interval=60.0):
+        if interval < 0:
+            raise ValueError('Checkpoint interval should be non-negative, but is %s' % interval)
+        self.file_name = file_name
+        self.interval = interval
+        self.last_checkpoint_time = time.time()
+
+    def checkpoint(self, simulation, force=False):
+        now = time.time()
+        if not force and now - self.last_checkpoint_time < self.interval:
+            return False
+        save_checkpoint(simulation, self.file_name)
+        self.last_checkpoint_time = now
+        return True
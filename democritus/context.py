@@ -0,0 +1,18 @@
+class StepContext(object):
+    def __init__(self, sender_values, receiver_values, game):
+        self.sender_values = sender_values
+        self.receiver_values = receiver_values
+        self.game = game.compile()
+        self.quantities = {}
+
+    def sender_expected_utility(self, out=None):
+        if 'sender expected utility' not in self.quantities:
+            self.quantities['sender expected utility'] = self.game.sender_expected_utility(self.receiver_values,
+                                                                                            out=out)
+        return self.quantities['sender expected utility']
+
+    def receiver_expected_utility(self, out=None):
+        if 'receiver expected utility' not in self.quantities:
+            self.quantities['receiver expected utility'] = self.game.receiver_expected_utility(self.sender_values,
+                                                                                                out=out)
+        return self.quantities['receiver expected utility']
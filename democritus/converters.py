@@ -7,11 +7,15 @@ import pandas
 import yaml
 from scipy import stats
 
-from democritus.dynamics import ReplicatorDynamics, BestResponseDynamics, QuantalResponseDynamics
+from democritus import utils
+from democritus.acceleration import AndersonAcceleration
+from democritus.dynamics import Dynamics, ReplicatorDynamics, BestResponseDynamics, QuantalResponseDynamics, \
+    ContinuousReplicatorDynamics
 from democritus.exceptions import InvalidValueInSpecification, IncompatibilityInSpecification, SpecificationError
 from democritus.factories import BivariateFunctionFactory
 from democritus.games import SimMaxGame, Game
-from democritus.simulation import Simulation
+from democritus.history import StrategyHistory
+from democritus.simulation import Simulation, BatchSimulation
 from democritus.specification import Specification
 from democritus.types import StateSet, StateMetricSpace, MessageSet, ElementSet, ActionSet, WCSMunsellPalette
 
@@ -152,9 +156,13 @@ class BivariateFunctionReader(object):
             return BivariateFunctionFactory.create_identity(states.size())
         if spec_type == 'nosofsky':
             decay = spec.get('decay') or 1
+            truncation_threshold = spec.get('truncation threshold')
             if not hasattr(states, 'distances'):
                 raise IncompatibilityInSpecification(spec, 'states', 'utility')
-            return BivariateFunctionFactory.create_nosofsky(states.distances, decay)
+            if truncation_threshold is not None and (not isinstance(truncation_threshold, numbers.Number)
+                                                     or not 0 < truncation_threshold <= 1):
+                raise InvalidValueInSpecification(spec, 'truncation threshold', truncation_threshold)
+            return BivariateFunctionFactory.create_nosofsky(states.distances, decay, truncation_threshold)
         if spec_type == 'from file':
             file_name = spec.get_or_fail('file')
             return BivariateFunctionFactory.read_from_file(file_name)
@@ -188,32 +196,116 @@ class GameFactory(object):
 
 class DynamicsFactory(object):
     @staticmethod
-    def create(spec):
+    def create(spec, random_generator=None):
         dynamics_type = spec.get('type') or 'replicator'
+        update_schedule = spec.get('update schedule') or 'simultaneous'
+        if update_schedule not in Dynamics.update_schedules:
+            raise InvalidValueInSpecification(spec, 'update schedule', update_schedule)
         if dynamics_type == 'replicator':
-            return ReplicatorDynamics()
+            return ReplicatorDynamics(update_schedule)
+        if dynamics_type == 'continuous replicator':
+            if update_schedule != 'simultaneous':
+                raise InvalidValueInSpecification(spec, 'update schedule', update_schedule)
+            time_step = spec.get('time step', 1.0)
+            stationarity_tolerance = spec.get('stationarity tolerance', 1e-6)
+            method = spec.get('method') or 'RK45'
+            if not isinstance(time_step, numbers.Number) or time_step <= 0:
+                raise InvalidValueInSpecification(spec, 'time step', time_step)
+            return ContinuousReplicatorDynamics(time_step, stationarity_tolerance, method)
         if dynamics_type == 'best response':
-            return BestResponseDynamics()
+            tie_tolerance = spec.get('tie tolerance') or 0
+            tie_breaking = spec.get('tie breaking') or 'uniform'
+            if tie_tolerance < 0:
+                raise InvalidValueInSpecification(spec, 'tie tolerance', tie_tolerance)
+            if tie_breaking not in BestResponseDynamics.tie_breaking_policies:
+                raise InvalidValueInSpecification(spec, 'tie breaking', tie_breaking)
+            return BestResponseDynamics(tie_tolerance, tie_breaking, update_schedule, random_generator)
         if dynamics_type == 'quantal response':
-            rationality_spec = spec.get_or_fail('rationality')
-            return QuantalResponseDynamics(rationality_spec)
+            rationality_schedule = spec.get('rationality schedule')
+            if rationality_schedule is None:
+                rationality_spec = spec.get_or_fail('rationality')
+                return QuantalResponseDynamics(rationality_spec, update_schedule=update_schedule)
+            if not isinstance(rationality_schedule, list) or len(rationality_schedule) == 0 \
+                    or np.any(np.diff(rationality_schedule) < 0):
+                raise InvalidValueInSpecification(spec, 'rationality schedule', rationality_schedule)
+            return QuantalResponseDynamics(rationality_schedule[0], rationality_schedule, update_schedule)
         else:
             raise InvalidValueInSpecification(spec, 'type', dynamics_type)
 
 
+class AccelerationFactory(object):
+    @staticmethod
+    def create(spec):
+        acceleration_type = spec.get('type') or 'anderson'
+        if acceleration_type == 'none':
+            return None
+        if acceleration_type == 'anderson':
+            depth = spec.get('depth', 5)
+            if type(depth) is not int or depth < 1:
+                raise InvalidValueInSpecification(spec, 'depth', depth)
+            return AndersonAcceleration(depth)
+        else:
+            raise InvalidValueInSpecification(spec, 'type', acceleration_type)
+
+
+class HistoryPolicyReader(object):
+    @staticmethod
+    def read(spec):
+        policy = spec.get('type') or 'all'
+        if policy not in StrategyHistory.policies:
+            raise InvalidValueInSpecification(spec, 'type', policy)
+        size = spec.get('size') if policy == 'last' else None
+        interval = spec.get('interval') if policy == 'every' else None
+        if policy == 'last' and (type(size) is not int or size < 1):
+            raise InvalidValueInSpecification(spec, 'size', size)
+        if policy == 'every' and (type(interval) is not int or interval < 1):
+            raise InvalidValueInSpecification(spec, 'interval', interval)
+        return policy, size, interval
+
+
 class SimulationSpecReader(object):
+    @staticmethod
+    def load_from_file(filename):
+        with open(filename, 'r') as spec_file:
+            spec_dict = yaml.safe_load(spec_file)
+        return Specification.from_dict(spec_dict)
+
     @staticmethod
     def read_from_file(filename):
-        spec_file = open(filename, 'r')
-        spec_dict = yaml.safe_load(spec_file)
-        spec = Specification.from_dict(spec_dict)
+        spec = SimulationSpecReader.load_from_file(filename)
         return SimulationSpecReader.read(spec)
 
     @staticmethod
-    def read(spec):
+    def read(spec, metric_sinks=None, keep_measurements=True, history_directory=None, random_generator=None,
+             append_history=False, dynamics_random_generator=None):
         game_spec = spec.get_or_fail('game')
         dynamics_spec = spec.get_or_fail('dynamics')
         simulations_metrics = spec.get('metrics') or []
+        acceleration_spec = dynamics_spec.get('acceleration')
+        history_spec = spec.get('history') or Specification.empty()
+        random_generator = np.random.default_rng() if random_generator is None else random_generator
+        game = GameFactory.create(game_spec)
+        if dynamics_random_generator is None:
+            dynamics_random_generator = random_generator
+        dynamics = DynamicsFactory.create(dynamics_spec, dynamics_random_generator)
+        accelerator = None if acceleration_spec is None else AccelerationFactory.create(acceleration_spec)
+        history_policy, history_size, history_interval = HistoryPolicyReader.read(history_spec)
+        return Simulation(game, dynamics, simulations_metrics, accelerator=accelerator, history_policy=history_policy,
+                          history_size=history_size, history_interval=history_interval, metric_sinks=metric_sinks,
+                          keep_measurements=keep_measurements, history_directory=history_directory, spec=spec,
+                          random_generator=random_generator, append_history=append_history)
+
+    @staticmethod
+    def read_batch(spec, n_replicates, seed=None):
+        game_spec = spec.get_or_fail('game')
+        dynamics_spec = spec.get_or_fail('dynamics')
+        acceleration_spec = dynamics_spec.get('acceleration')
+        if acceleration_spec is not None and AccelerationFactory.create(acceleration_spec) is not None:
+            raise InvalidValueInSpecification(dynamics_spec, 'acceleration', acceleration_spec)
+        seed = np.random.SeedSequence(seed).entropy
+        random_generators = utils.spawn_random_generators(seed, n_replicates)
+        tie_breaking_random_generators = utils.ReplicateRandomGenerators(
+            [utils.tie_breaking_random_generator(seed, replicate) for replicate in range(n_replicates)])
         game = GameFactory.create(game_spec)
-        dynamics = DynamicsFactory.create(dynamics_spec)
-        return Simulation(game, dynamics, simulations_metrics)
+        dynamics = DynamicsFactory.create(dynamics_spec, tie_breaking_random_generators)
+        return BatchSimulation(game, dynamics, n_replicates, random_generators=random_generators)
@@ -1,127 +1,227 @@
 from __future__ import division
 
-from builtins import range
-
 import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.special import logsumexp
 
+from democritus import utils
 from democritus.factories import SenderStrategyFactory, ReceiverStrategyFactory
 
 
+def sender_expected_utility(receiver_values, game):
+    return game.compile().sender_expected_utility(receiver_values)
+
+
+def receiver_expected_utility(sender_values, game):
+    return game.compile().receiver_expected_utility(sender_values)
+
+
 class Dynamics(object):
+    update_schedules = ['simultaneous', 'sender first', 'receiver first', 'alternating']
+
+    def __init__(self, update_schedule='simultaneous'):
+        if update_schedule not in Dynamics.update_schedules:
+            raise ValueError('Unknown update schedule: %s' % update_schedule)
+        self.workspace = utils.Workspace()
+        self.update_schedule = update_schedule
+
     def update_sender(self, sender_strategy, receiver_strategy, game):
-        raise NotImplementedError('Subclasses of Dynamics must implement \'update_sender\' method')
+        values = self.update_sender_values(np.asarray(sender_strategy), np.asarray(receiver_strategy), game)
+        return SenderStrategyFactory.create(game.states, game.messages, values)
 
     def update_receiver(self, sender_strategy, receiver_strategy, game):
-        raise NotImplementedError('Subclasses of Dynamics must implement \'update_receiver\' method')
+        values = self.update_receiver_values(np.asarray(sender_strategy), np.asarray(receiver_strategy), game)
+        return ReceiverStrategyFactory.create(game.messages, game.actions, values)
+
+    def update_order(self, step=0):
+        if self.update_schedule == 'alternating':
+            return 'sender first' if step % 2 == 0 else 'receiver first'
+        return self.update_schedule
+
+    def update_values(self, sender_values, receiver_values, game, sender_out=None, receiver_out=None, step=0,
+                      context=None):
+        update_order = self.update_order(step)
+        if update_order == 'receiver first':
+            new_receiver_values = self.update_receiver_values(sender_values, receiver_values, game, out=receiver_out,
+                                                              context=context)
+            new_sender_values = self.update_sender_values(sender_values, new_receiver_values, game, out=sender_out,
+                                                          context=context)
+            return new_sender_values, new_receiver_values
+        new_sender_values = self.update_sender_values(sender_values, receiver_values, game, out=sender_out,
+                                                      context=context)
+        if update_order == 'sender first':
+            sender_values = new_sender_values
+        new_receiver_values = self.update_receiver_values(sender_values, receiver_values, game, out=receiver_out,
+                                                          context=context)
+        return new_sender_values, new_receiver_values
+
+    def update_sender_values(self, sender_values, receiver_values, game, out=None, context=None):
+        raise NotImplementedError('Subclasses of Dynamics must implement \'update_sender_values\' method')
+
+    def update_receiver_values(self, sender_values, receiver_values, game, out=None, context=None):
+        raise NotImplementedError('Subclasses of Dynamics must implement \'update_receiver_values\' method')
+
+    def sender_expected_utility(self, sender_values, receiver_values, game, context=None):
+        out = self.workspace.get('sender expected utility', np.shape(sender_values))
+        if context is not None and context.receiver_values is receiver_values:
+            return context.sender_expected_utility(out=out)
+        return game.compile().sender_expected_utility(receiver_values, out=out)
+
+    def receiver_expected_utility(self, sender_values, receiver_values, game, context=None):
+        out = self.workspace.get('receiver expected utility', np.shape(receiver_values))
+        if context is not None and context.sender_values is sender_values:
+            return context.receiver_expected_utility(out=out)
+        return game.compile().receiver_expected_utility(sender_values, out=out)
 
 
 class ReplicatorDynamics(Dynamics):
-    def update_sender(self, sender_strategy, receiver_strategy, game):
-        n_states = game.states.size()
-        n_messages = game.messages.size()
-        expected_utility = np.array(
-            [[np.dot(receiver_strategy[m], game.utility[t]) for m in range(n_messages)] for t in
-             range(n_states)])
-        new_sender_strategy = SenderStrategyFactory.create_zeros(game.states, game.messages)
-        for t in range(n_states):
-            for m in range(n_messages):
-                new_sender_strategy[t, m] = sender_strategy[t, m] * \
-                                            expected_utility[t, m] * n_messages / sum(expected_utility[t])
-        new_sender_strategy.make_row_stochastic()
-        if game.confusion is not None:
-            new_sender_strategy.values = np.dot(game.confusion, new_sender_strategy.values)
-        new_sender_strategy.make_row_stochastic()
-        return new_sender_strategy
-
-    def update_receiver(self, sender_strategy, receiver_strategy, game):
-        n_states = game.states.size()
-        n_messages = game.messages.size()
-        expected_utility = np.array(
-            [[np.dot(game.states.priors * sender_strategy[:, m], game.utility[t])
-              for t in range(n_states)]
-             for m in range(n_messages)])
-        new_receiver_strategy = ReceiverStrategyFactory.create_zeros(game.messages, game.actions)
-        for m in range(n_messages):
-            for t in range(n_states):
-                new_receiver_strategy[m, t] = receiver_strategy[m, t] * \
-                                              (expected_utility[m, t] * n_states + 0) / (sum(expected_utility[m]) + 0)
-        new_receiver_strategy.make_row_stochastic()
-        if game.confusion is not None:
-            new_receiver_strategy.values = np.dot(new_receiver_strategy.values, np.transpose(game.confusion))
-        new_receiver_strategy.make_row_stochastic()
-        return new_receiver_strategy
+    def update_sender_values(self, sender_values, receiver_values, game, out=None, context=None):
+        compiled_game = game.compile()
+        shape = np.shape(sender_values)
+        expected_utility = self.sender_expected_utility(sender_values, receiver_values, compiled_game, context)
+        new_sender_values = np.multiply(sender_values, expected_utility,
+                                        out=self.workspace.get('sender values', shape))
+        new_sender_values *= shape[-1]
+        new_sender_values /= np.sum(expected_utility, axis=-1, keepdims=True)
+        return compiled_game.normalize_sender_values(new_sender_values, out=out, scratch=new_sender_values)
+
+    def update_receiver_values(self, sender_values, receiver_values, game, out=None, context=None):
+        compiled_game = game.compile()
+        shape = np.shape(receiver_values)
+        expected_utility = self.receiver_expected_utility(sender_values, receiver_values, compiled_game, context)
+        new_receiver_values = np.multiply(receiver_values, expected_utility,
+                                          out=self.workspace.get('receiver values', shape))
+        new_receiver_values *= shape[-1]
+        new_receiver_values /= np.sum(expected_utility, axis=-1, keepdims=True)
+        return compiled_game.normalize_receiver_values(new_receiver_values, out=out, scratch=new_receiver_values)
+
+
+class ContinuousReplicatorDynamics(ReplicatorDynamics):
+    def __init__(self, time_step=1.0, stationarity_tolerance=1e-6, method='RK45', relative_tolerance=1e-3,
+                 absolute_tolerance=1e-6):
+        ReplicatorDynamics.__init__(self)
+        if time_step <= 0:
+            raise ValueError('Time step should be positive, but is %s' % time_step)
+        self.time_step = time_step
+        self.stationarity_tolerance = stationarity_tolerance
+        self.method = method
+        self.relative_tolerance = relative_tolerance
+        self.absolute_tolerance = absolute_tolerance
+
+    def vector_field(self, sender_values, receiver_values, game):
+        mapped_sender_values, mapped_receiver_values = ReplicatorDynamics.update_values(self, sender_values,
+                                                                                        receiver_values, game)
+        return mapped_sender_values - sender_values, mapped_receiver_values - receiver_values
+
+    def update_values(self, sender_values, receiver_values, game, sender_out=None, receiver_out=None, step=0,
+                      context=None):
+        compiled_game = game.compile()
+        sender_shape = np.shape(sender_values)
+        receiver_shape = np.shape(receiver_values)
+        n_sender_values = np.prod(sender_shape, dtype=int)
+
+        def split(values):
+            return values[:n_sender_values].reshape(sender_shape), values[n_sender_values:].reshape(receiver_shape)
+
+        last_evaluation = {}
+
+        def time_derivative(time, values):
+            if 'values' in last_evaluation and np.array_equal(values, last_evaluation['values']):
+                return last_evaluation['derivative']
+            sender_derivative, receiver_derivative = self.vector_field(*(split(values) + (compiled_game,)))
+            derivative = np.concatenate((np.ravel(sender_derivative), np.ravel(receiver_derivative)))
+            last_evaluation['values'] = np.array(values)
+            last_evaluation['derivative'] = derivative
+            return derivative
+
+        def stationarity(time, values):
+            return np.sum(np.abs(time_derivative(time, values))) - self.stationarity_tolerance
+
+        stationarity.terminal = True
+        stationarity.direction = -1
+
+        initial_values = np.concatenate((np.ravel(sender_values), np.ravel(receiver_values)))
+        if stationarity(0, initial_values) <= 0:
+            new_values = initial_values
+        else:
+            solution = solve_ivp(time_derivative, (0, self.time_step), initial_values, method=self.method,
+                                 rtol=self.relative_tolerance, atol=self.absolute_tolerance, events=stationarity)
+            new_values = np.clip(solution.y[:, -1], 0, None)
+        new_sender_values, new_receiver_values = split(new_values)
+        return utils.make_row_stochastic(new_sender_values, out=sender_out), \
+            utils.make_row_stochastic(new_receiver_values, out=receiver_out)
 
 
 class BestResponseDynamics(Dynamics):
-    def update_sender(self, sender_strategy, receiver_strategy, game):
-        n_states = game.states.size()
-        n_messages = game.messages.size()
-        expected_utility = np.array(
-            [[np.dot(receiver_strategy[m], game.utility[t]) for m in range(n_messages)] for t in
-             range(n_states)])
-        new_sender_strategy = SenderStrategyFactory.create_zeros(game.states, game.messages)
-        for t in range(n_states):
-            for m in range(n_messages):
-                new_sender_strategy[t, m] = 1 if expected_utility[t, m] == max(expected_utility[t]) else 0
-        new_sender_strategy.make_row_stochastic()
-        if game.confusion is not None:
-            new_sender_strategy.values = np.dot(game.confusion, new_sender_strategy.values)
-        new_sender_strategy.make_row_stochastic()
-        return new_sender_strategy
-
-    def update_receiver(self, sender_strategy, receiver_strategy, game):
-        n_states = game.states.size()
-        n_messages = game.messages.size()
-        expected_utility = np.array(
-            [[np.dot(game.states.priors * sender_strategy[:, m], game.utility[t])
-              for t in range(n_states)]
-             for m in range(n_messages)])
-        new_receiver_strategy = ReceiverStrategyFactory.create_zeros(game.messages, game.actions)
-        for m in range(n_messages):
-            for t in range(n_states):
-                new_receiver_strategy[m, t] = 1 if expected_utility[m, t] == max(expected_utility[m]) else 0
-        new_receiver_strategy.make_row_stochastic()
-        if game.confusion is not None:
-            new_receiver_strategy.values = np.dot(new_receiver_strategy.values, np.transpose(game.confusion))
-        new_receiver_strategy.make_row_stochastic()
-        return new_receiver_strategy
+    tie_breaking_policies = ['uniform', 'lowest index', 'random']
+
+    def __init__(self, tie_tolerance=0, tie_breaking='uniform', update_schedule='simultaneous', random_generator=None):
+        if tie_tolerance < 0:
+            raise ValueError('Tie tolerance should be non-negative, but is %s' % tie_tolerance)
+        if tie_breaking not in BestResponseDynamics.tie_breaking_policies:
+            raise ValueError('Unknown tie breaking policy: %s' % tie_breaking)
+        Dynamics.__init__(self, update_schedule)
+        self.tie_tolerance = tie_tolerance
+        self.tie_breaking = tie_breaking
+        self.random_generator = random_generator
+
+    def best_responses(self, expected_utility):
+        maximum_utility = np.max(expected_utility, axis=-1, keepdims=True)
+        ties = expected_utility >= maximum_utility - self.tie_tolerance
+        if self.tie_breaking == 'uniform':
+            return ties
+        if self.tie_breaking == 'lowest index':
+            choices = np.argmax(ties, axis=-1)
+        else:
+            if self.random_generator is None:
+                self.random_generator = np.random.default_rng()
+            choices = np.argmax(np.where(ties, self.random_generator.random(ties.shape), -1), axis=-1)
+        best_responses = np.zeros(expected_utility.shape)
+        np.put_along_axis(best_responses, choices[..., np.newaxis], 1, axis=-1)
+        return best_responses
+
+    def update_sender_values(self, sender_values, receiver_values, game, out=None, context=None):
+        compiled_game = game.compile()
+        shape = np.shape(sender_values)
+        expected_utility = self.sender_expected_utility(sender_values, receiver_values, compiled_game, context)
+        return compiled_game.normalize_sender_values(self.best_responses(expected_utility), out=out,
+                                                     scratch=self.workspace.get('sender values', shape))
+
+    def update_receiver_values(self, sender_values, receiver_values, game, out=None, context=None):
+        compiled_game = game.compile()
+        shape = np.shape(receiver_values)
+        expected_utility = self.receiver_expected_utility(sender_values, receiver_values, compiled_game, context)
+        return compiled_game.normalize_receiver_values(self.best_responses(expected_utility), out=out,
+                                                       scratch=self.workspace.get('receiver values', shape))
 
 
 class QuantalResponseDynamics(Dynamics):
-    def __init__(self, rationality):
+    def __init__(self, rationality, rationality_schedule=None, update_schedule='simultaneous'):
+        if rationality_schedule is not None:
+            if len(rationality_schedule) == 0:
+                raise ValueError('Rationality schedule should have at least one level')
+            if np.any(np.diff(rationality_schedule) < 0):
+                raise ValueError('Rationality schedule should be non-decreasing, but is %s' % rationality_schedule)
+        Dynamics.__init__(self, update_schedule)
         self.rationality = rationality
-
-    def update_sender(self, sender_strategy, receiver_strategy, game):
-        n_states = game.states.size()
-        n_messages = game.messages.size()
-        expected_utility = np.array(
-            [[np.dot(receiver_strategy[m], game.utility[t]) for m in range(n_messages)] for t in
-             range(n_states)])
-        new_sender_strategy = SenderStrategyFactory.create_zeros(game.states, game.messages)
-        for t in range(n_states):
-            for m in range(n_messages):
-                new_sender_strategy[t, m] = np.exp(self.rationality * expected_utility[t, m]) / \
-                                            sum(np.exp(self.rationality * expected_utility[t]))
-        new_sender_strategy.make_row_stochastic()
-        if game.confusion is not None:
-            new_sender_strategy.values = np.dot(game.confusion, new_sender_strategy.values)
-        new_sender_strategy.make_row_stochastic()
-        return new_sender_strategy
-
-    def update_receiver(self, sender_strategy, receiver_strategy, game):
-        n_states = game.states.size()
-        n_messages = game.messages.size()
-        expected_utility = np.array(
-            [[np.dot(game.states.priors * sender_strategy[:, m], game.utility[t])
-              for t in range(n_states)]
-             for m in range(n_messages)])
-        new_receiver_strategy = ReceiverStrategyFactory.create_zeros(game.messages, game.actions)
-        for m in range(n_messages):
-            for t in range(n_states):
-                new_receiver_strategy[m, t] = np.exp(self.rationality * expected_utility[m, t]) / \
-                                              sum(np.exp(self.rationality * expected_utility[m]))
-        new_receiver_strategy.make_row_stochastic()
-        if game.confusion is not None:
-            new_receiver_strategy.values = np.dot(new_receiver_strategy.values, np.transpose(game.confusion))
-        new_receiver_strategy.make_row_stochastic()
-        return new_receiver_strategy
+        self.rationality_schedule = rationality_schedule
+
+    def quantal_responses(self, expected_utility, out=None):
+        logits = np.multiply(self.rationality, expected_utility, out=out)
+        logits -= logsumexp(logits, axis=-1, keepdims=True)
+        return np.exp(logits, out=logits)
+
+    def update_sender_values(self, sender_values, receiver_values, game, out=None, context=None):
+        compiled_game = game.compile()
+        shape = np.shape(sender_values)
+        expected_utility = self.sender_expected_utility(sender_values, receiver_values, compiled_game, context)
+        quantal_responses = self.quantal_responses(expected_utility, out=self.workspace.get('sender values', shape))
+        return compiled_game.normalize_sender_values(quantal_responses, out=out, scratch=quantal_responses)
+
+    def update_receiver_values(self, sender_values, receiver_values, game, out=None, context=None):
+        compiled_game = game.compile()
+        shape = np.shape(receiver_values)
+        expected_utility = self.receiver_expected_utility(sender_values, receiver_values, compiled_game, context)
+        quantal_responses = self.quantal_responses(expected_utility,
+                                                   out=self.workspace.get('receiver values', shape))
+        return compiled_game.normalize_receiver_values(quantal_responses, out=out, scratch=quantal_responses)
@@ -1,10 +1,11 @@
 from __future__ import division
 
 import numpy as np
+from scipy import sparse
 
 from democritus import utils
-from democritus.types import BivariateFunction, SenderStrategy, ReceiverStrategy, WCSMunsellPalette, \
-    WCSMunsellSenderStrategy, WCSMunsellReceiverStrategy
+from democritus.types import BivariateFunction, SparseBivariateFunction, SenderStrategy, ReceiverStrategy, \
+    WCSMunsellPalette, WCSMunsellSenderStrategy, WCSMunsellReceiverStrategy
 
 
 class BivariateFunctionFactory(object):
@@ -13,8 +14,12 @@ class BivariateFunctionFactory(object):
         return BivariateFunction(np.identity(size))
 
     @staticmethod
-    def create_nosofsky(distances, decay):
-        return BivariateFunction(np.exp(-(distances ** 2) / (decay ** 2)))
+    def create_nosofsky(distances, decay, truncation_threshold=None):
+        if truncation_threshold is None:
+            return BivariateFunction(np.exp(-(distances ** 2) / (decay ** 2)))
+        rows, columns = np.nonzero(distances ** 2 <= -np.log(truncation_threshold) * decay ** 2)
+        values = np.exp(-(distances[rows, columns] ** 2) / (decay ** 2))
+        return SparseBivariateFunction(sparse.csr_matrix((values, (rows, columns)), shape=np.shape(distances)))
 
     @staticmethod
     def read_from_file(file_name):
@@ -23,39 +28,41 @@ class BivariateFunctionFactory(object):
 
 class SenderStrategyFactory(object):
     @staticmethod
-    def create_random(states, messages):
-        values = utils.make_row_stochastic(np.random.random((states.size(), messages.size())))
+    def create(states, messages, values):
         if isinstance(states, WCSMunsellPalette):
             sender_strategy = WCSMunsellSenderStrategy(states, messages, values)
         else:
             sender_strategy = SenderStrategy(states, messages, values)
         return sender_strategy
 
+    @staticmethod
+    def create_random(states, messages, random_generator=None):
+        random_generator = np.random if random_generator is None else random_generator
+        values = utils.make_row_stochastic(random_generator.random((states.size(), messages.size())))
+        return SenderStrategyFactory.create(states, messages, values)
+
     @staticmethod
     def create_zeros(states, messages):
         values = np.zeros((states.size(), messages.size()))
-        if isinstance(states, WCSMunsellPalette):
-            sender_strategy = WCSMunsellSenderStrategy(states, messages, values)
-        else:
-            sender_strategy = SenderStrategy(states, messages, values)
-        return sender_strategy
+        return SenderStrategyFactory.create(states, messages, values)
 
 
 class ReceiverStrategyFactory(object):
     @staticmethod
-    def create_random(messages, actions):
-        values = utils.make_row_stochastic(np.random.random((messages.size(), actions.size())))
+    def create(messages, actions, values):
         if isinstance(actions, WCSMunsellPalette):
             receiver_strategy = WCSMunsellReceiverStrategy(messages, actions, values)
         else:
             receiver_strategy = ReceiverStrategy(messages, actions, values)
         return receiver_strategy
 
+    @staticmethod
+    def create_random(messages, actions, random_generator=None):
+        random_generator = np.random if random_generator is None else random_generator
+        values = utils.make_row_stochastic(random_generator.random((messages.size(), actions.size())))
+        return ReceiverStrategyFactory.create(messages, actions, values)
+
     @staticmethod
     def create_zeros(messages, actions):
         values = np.zeros((messages.size(), actions.size()))
-        if isinstance(actions, WCSMunsellPalette):
-            receiver_strategy = WCSMunsellReceiverStrategy(messages, actions, values)
-        else:
-            receiver_strategy = ReceiverStrategy(messages, actions, values)
-        return receiver_strategy
+        return ReceiverStrategyFactory.create(messages, actions, values)
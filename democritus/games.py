@@ -1,5 +1,13 @@
+from __future__ import division
+
 import copy
 
+import numpy as np
+from scipy import sparse
+
+from democritus import utils
+from democritus.types import BivariateFunction
+
 
 class Game(object):
     def __init__(self, states, messages, actions, utility, confusion=None):
@@ -8,6 +16,7 @@ class Game(object):
         self.actions = actions
         self.utility = utility
         self.confusion = confusion
+        self.compiled_game = None
 
     def number_of_states(self):
         return self.states.size()
@@ -18,9 +27,79 @@ class Game(object):
     def number_of_actions(self):
         return self.actions.size()
 
+    def compile(self):
+        if self.compiled_game is None or not self.compiled_game.compiled_from(self):
+            self.compiled_game = CompiledGame(self)
+        return self.compiled_game
+
 
 class SimMaxGame(Game):
     def __init__(self, states, messages, similarity, confusion=None):
         actions = copy.deepcopy(states)
         Game.__init__(self, states, messages, actions, similarity, confusion)
         self.similarity = similarity
+
+
+def frozen_array(values):
+    array = np.array(values, dtype=float, order='C')
+    array.flags.writeable = False
+    return array
+
+
+def compiled_matrix(values):
+    if isinstance(values, BivariateFunction):
+        values = values.values
+    if sparse.issparse(values):
+        return sparse.csr_matrix(values, dtype=float, copy=True)
+    return frozen_array(values)
+
+
+class CompiledGame(object):
+    def __init__(self, game):
+        self.source_states = game.states
+        self.source_messages = game.messages
+        self.source_actions = game.actions
+        self.source_priors = game.states.priors
+        self.source_utility = game.utility
+        self.source_confusion = game.confusion
+        self.priors = frozen_array(game.states.priors)
+        self.utility = compiled_matrix(game.utility)
+        if sparse.issparse(self.utility):
+            self.receiver_utility = compiled_matrix(sparse.diags(self.priors).dot(self.utility.T))
+            maximum_utilities = self.utility.max(axis=1).toarray()[:, 0]
+        else:
+            self.receiver_utility = frozen_array(self.priors[:, np.newaxis] * np.transpose(self.utility))
+            maximum_utilities = np.max(self.utility, axis=-1)
+        self.confusion = None if game.confusion is None else compiled_matrix(game.confusion)
+        self.confusion_transpose = None if game.confusion is None else compiled_matrix(self.confusion.T)
+        self.maximum_expected_utility = float(np.dot(self.priors, maximum_utilities))
+        self.sender_entropy_normalizer = game.number_of_states() * np.log(game.number_of_messages())
+        self.receiver_entropy_normalizer = game.number_of_messages() * np.log(game.number_of_actions())
+
+    def compiled_from(self, game):
+        return self.source_states is game.states and self.source_priors is game.states.priors \
+            and self.source_messages is game.messages and self.source_actions is game.actions \
+            and self.source_utility is game.utility and self.source_confusion is game.confusion
+
+    def compile(self):
+        return self
+
+    def sender_expected_utility(self, receiver_values, out=None):
+        return utils.matmul(self.utility, np.swapaxes(receiver_values, -1, -2), out=out)
+
+    def receiver_expected_utility(self, sender_values, out=None):
+        return utils.matmul(np.swapaxes(sender_values, -1, -2), self.receiver_utility, out=out)
+
+    def normalize_sender_values(self, values, out=None, scratch=None):
+        if self.confusion is None:
+            return utils.make_row_stochastic(values, out=out)
+        normalized_values = utils.make_row_stochastic(values, out=scratch)
+        confused_values = utils.matmul(self.confusion, normalized_values, out=out)
+        return utils.make_row_stochastic(confused_values, out=confused_values)
+
+    def normalize_receiver_values(self, values, out=None, scratch=None):
+        if self.confusion is None:
+            return utils.make_row_stochastic(values, out=out)
+        normalized_values = utils.make_row_stochastic(values, out=scratch)
+        confused_values = utils.matmul(normalized_values, self.confusion_transpose, out=out)
+        return utils.make_row_stochastic(confused_values, out=confused_values)
@@ -0,0 +1,187 @@
+import io
+import os
+
+import numpy as np
+
+
+def resize_npy_file(file_name, shape, dtype, length):
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                  'fortran_order': False, 'shape': (length,) + shape})
+    header = header.getvalue()
+    exists = os.path.exists(file_name)
+    with open(file_name, 'r+b' if exists else 'w+b') as npy_file:
+        if exists:
+            read_array_header = np.lib.format.read_array_header_1_0 \
+                if np.lib.format.read_magic(npy_file) == (1, 0) else np.lib.format.read_array_header_2_0
+            read_array_header(npy_file)
+            if npy_file.tell() != len(header):
+                raise ValueError('Cannot resize %s in place: its header would move the data from byte %s to byte %s'
+                                 % (file_name, npy_file.tell(), len(header)))
+            npy_file.seek(0)
+        npy_file.write(header)
+        npy_file.truncate(len(header) + length * int(np.prod(shape, dtype=int)) * dtype.itemsize)
+
+
+class StrategyHistory(object):
+    policies = ['all', 'last', 'every', 'none']
+
+    def __init__(self, shape, policy='all', size=None, interval=None, initial_capacity=16, file_name=None,
+                 steps_file_name=None, append=False):
+        if policy not in StrategyHistory.policies:
+            raise ValueError('Unknown history policy: %s' % policy)
+        if policy == 'last' and (size is None or size < 1):
+            raise ValueError('History policy \'last\' requires a size of at least 1, but size is %s' % size)
+        if policy == 'every' and (interval is None or interval < 1):
+            raise ValueError('History policy \'every\' requires an interval of at least 1, '
+                             'but interval is %s' % interval)
+        if file_name is not None and policy not in ['all', 'every']:
+            raise ValueError('History policy \'%s\' cannot be kept in a file' % policy)
+        if (steps_file_name is not None or append) and file_name is None:
+            raise ValueError('Only a history kept in a file can keep its steps in a file or be appended to')
+        self.shape = tuple(shape)
+        self.policy = policy
+        self.size = size
+        self.interval = interval
+        self.file_name = file_name
+        self.steps_file_name = steps_file_name
+        self.count = 0
+        if append:
+            self.values = np.load(file_name, mmap_mode='r+')
+            if steps_file_name is None:
+                self.steps = np.full(len(self.values), -1)
+            else:
+                self.steps = np.load(steps_file_name, mmap_mode='r+')
+                self.count = int(np.count_nonzero(self.steps >= 0))
+        else:
+            capacity = {'last': size, 'none': 0}.get(policy, initial_capacity)
+            self.values = self.allocate(capacity)
+            self.steps = self.allocate_steps(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.steps[:] = -1
+        self.count = 0
+
+    def set_kept_steps(self, steps):
+        self.count = min(len(steps), len(self.steps))
+        self.steps[:self.count] = steps[:self.count]
+        self.steps[self.count:] = -1
+
+    def rewind(self, step):
+        if self.policy == 'last':
+            self.steps[self.steps > step] = -1
+            self.count = int(np.count_nonzero(self.steps >= 0))
+        else:
+            self.count = int(np.searchsorted(self.steps[:self.count], step, side='right'))
+            self.steps[self.count:] = -1
+
+    def keeps(self, step):
+        if self.policy == 'none':
+            return False
+        if self.policy == 'every':
+            return step % self.interval == 0
+        return True
+
+    def record(self, step, values):
+        if not self.keeps(step):
+            return
+        if self.policy == 'last':
+            slot = step % self.size
+            self.count = min(self.count + 1, self.size)
+        else:
+            if self.count == len(self.steps):
+                self.grow()
+            slot = self.count
+            self.count += 1
+        self.values[slot] = values
+        self.steps[slot] = step
+
+    def allocate(self, capacity):
+        if self.file_name is None:
+            return np.empty((capacity,) + self.shape)
+        resize_npy_file(self.file_name, self.shape, np.dtype(float), capacity)
+        return np.load(self.file_name, mmap_mode='r+')
+
+    def allocate_steps(self, capacity):
+        if self.steps_file_name is None:
+            return np.full(capacity, -1)
+        resize_npy_file(self.steps_file_name, (), np.dtype(np.int64), capacity)
+        steps = np.load(self.steps_file_name, mmap_mode='r+')
+        steps[self.count:] = -1
+        return steps
+
+    def grow(self):
+        capacity = max(2 * len(self.steps), 1)
+        if self.file_name is None:
+            values = self.allocate(capacity)
+            values[:self.count] = self.values[:self.count]
+        else:
+            self.values.flush()
+            values = self.allocate(capacity)
+        if self.steps_file_name is None:
+            steps = self.allocate_steps(capacity)
+            steps[:self.count] = self.steps[:self.count]
+        else:
+            self.steps.flush()
+            steps = self.allocate_steps(capacity)
+        self.values = values
+        self.steps = steps
+
+    def flush(self):
+        if self.file_name is not None:
+            self.values.flush()
+        if self.steps_file_name is not None:
+            self.steps.flush()
+
+    def close(self):
+        if self.file_name is None:
+            return
+        self.flush()
+        self.values = None
+        self.values = self.allocate(self.count)
+        if self.steps_file_name is None:
+            self.steps = self.steps[:self.count]
+        else:
+            self.steps = None
+            self.steps = self.allocate_steps(self.count)
+
+    def slot(self, step):
+        if self.policy == 'last':
+            slot = step % self.size
+            return slot if self.steps[slot] == step else None
+        slot = np.searchsorted(self.steps[:self.count], step)
+        return slot if slot < self.count and self.steps[slot] == step else None
+
+    def contains(self, step):
+        return self.slot(step) is not None
+
+    def get(self, step):
+        slot = self.slot(step)
+        if slot is None:
+            raise IndexError('Strategies for step %s were not kept' % step)
+        return self.values[slot]
+
+    def kept_steps(self):
+        return np.sort(self.steps[self.steps >= 0])
+
+    def stacked(self):
+        if self.policy == 'last':
+            slots = np.flatnonzero(self.steps >= 0)
+            slots = slots[np.argsort(self.steps[slots])]
+            return self.steps[slots], self.values[slots]
+        return self.steps[:self.count], self.values[:self.count]
+
+
+class KeptStrategies(object):
+    def __init__(self, kept_steps, get_strategy):
+        self.kept_steps = kept_steps
+        self.get_strategy = get_strategy
+
+    def __len__(self):
+        return len(self.kept_steps())
+
+    def __getitem__(self, index):
+        return self.get_strategy(self.kept_steps()[index])
@@ -0,0 +1,81 @@
+from __future__ import division
+
+import multiprocessing
+import time
+from queue import Full
+
+import numpy as np
+
+from democritus.trajectory import dense_values
+from democritus.types import WCSMunsellPalette
+
+
+def live_layout(simulation):
+    game = simulation.game
+    collector = simulation.measurements_collector
+    return {'wcs': isinstance(game.states, WCSMunsellPalette),
+            'states': list(game.states.elements),
+            'priors': np.asarray(game.states.priors),
+            'messages': list(game.messages.elements),
+            'actions': list(game.actions.elements),
+            'utility': dense_values(game.utility),
+            'confusion': None if game.confusion is None else dense_values(game.confusion),
+            'metrics': [(metric_name, metric.name) for metric_name, metric in collector.metrics.items()]}
+
+
+class LiveView(object):
+    def __init__(self, simulation, max_fps=10, keep_open=False, queue_size=2, start=True):
+        if max_fps <= 0:
+            raise ValueError('Maximum frame rate should be positive, but is %s' % max_fps)
+        self.frame_interval = 1 / max_fps
+        self.context = multiprocessing.get_context('spawn')
+        self.queue = self.context.Queue(queue_size)
+        self.queue.put(live_layout(simulation))
+        self.process = self.context.Process(target=run_live_view, args=(self.queue, max_fps, keep_open))
+        self.process.daemon = not keep_open
+        self.last_frame_time = None
+        self.forwarded_steps = {}
+        self.pending_measurements = {}
+        self.dropped_frames = 0
+        if start:
+            self.process.start()
+
+    def collect_measurements(self, simulation):
+        for metric_name, (step, value) in simulation.measurements_collector.last_measurements.items():
+            if step > self.forwarded_steps.get(metric_name, -1):
+                self.forwarded_steps[metric_name] = step
+                steps, values = self.pending_measurements.setdefault(metric_name, ([], []))
+                steps.append(step)
+                values.append(float(value))
+
+    def update(self, simulation, force=False):
+        self.collect_measurements(simulation)
+        now = time.time()
+        if not force and self.last_frame_time is not None and now - self.last_frame_time < self.frame_interval:
+            return False
+        frame = {'step': simulation.current_step,
+                 'sender': np.array(simulation.get_current_sender_strategy().values),
+                 'receiver': np.array(simulation.get_current_receiver_strategy().values),
+                 'measurements': self.pending_measurements}
+        try:
+            self.queue.put_nowait(frame)
+        except Full:
+            self.dropped_frames += 1
+            return False
+        self.pending_measurements = {}
+        self.last_frame_time = now
+        return True
+
+    def close(self, simulation=None, timeout=None):
+        if simulation is not None:
+            self.collect_measurements(simulation)
+            while not self.update(simulation, force=True) and self.process.is_alive():
+                time.sleep(self.frame_interval)
+        if self.process.is_alive():
+            self.queue.put(None, timeout=timeout)
+            self.process.join(timeout)
+
+
+def run_live_view(queue, max_fps, keep_open):
+    from democritus import rendering
+    rendering.run_live_view(queue, queue.get(), max_fps, keep_open)
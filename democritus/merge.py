@@ -0,0 +1,57 @@
+import argparse
+import os
+import sys
+import time
+
+import pyarrow.parquet
+
+from democritus.converters import SimulationSpecReader
+from democritus.runner import existing_dir
+from democritus.store import open_results, strategy_columns
+from democritus.sweep import SweepReader, sweep_results_frame
+
+
+def merge_shards(spec, directory):
+    points = SweepReader.read(spec.get_or_fail('sweep'))
+    table = open_results(directory).to_table().sort_by('run')
+    results = table.drop_columns(strategy_columns + ['spec']).to_pandas()
+    run_counts = results['run'].value_counts()
+    duplicate_runs = sorted(run_counts.index[run_counts > 1])
+    if len(duplicate_runs) > 0:
+        raise ValueError('Runs %s were stored more than once in %s' % (duplicate_runs, directory))
+    unexpected_runs = sorted(set(results['run']) - set(range(len(points))))
+    if len(unexpected_runs) > 0:
+        raise ValueError('Runs %s are not part of the sweep, which has %s points' % (unexpected_runs, len(points)))
+    missing_runs = sorted(set(range(len(points))) - set(results['run']))
+    if len(missing_runs) > 0:
+        raise ValueError('Runs %s are missing from %s' % (missing_runs, directory))
+    if results['seed'].nunique(dropna=False) > 1:
+        raise ValueError('Shards in %s were run with different seeds: %s'
+                         % (directory, sorted(results['seed'].unique())))
+    for run, overrides in enumerate(points):
+        for path, value in overrides.items():
+            if results.loc[run, path] != value:
+                raise ValueError('Run %s has %s = %s, but the sweep has %s'
+                                 % (run, path, results.loc[run, path], value))
+    return table, sweep_results_frame(results.drop(columns=['run', 'seed']).to_dict('records'), points)
+
+
+def main(args):
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('configfile')
+    arg_parser.add_argument('store', type=existing_dir)
+    arg_parser.add_argument('--output-prefix', default=time.strftime('%Y%m%d-%H%M%S'))
+    arg_parser.add_argument('--output-dir', type=existing_dir, default='.')
+    args = arg_parser.parse_args(args)
+    spec = SimulationSpecReader.load_from_file(args.configfile)
+    try:
+        table, sweep_results = merge_shards(spec, args.store)
+    except ValueError as error:
+        sys.exit(str(error))
+    output_path_prefix = os.path.join(args.output_dir, args.output_prefix)
+    pyarrow.parquet.write_table(table, output_path_prefix + '-results.parquet')
+    sweep_results.to_csv(output_path_prefix + '-sweep.csv')
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
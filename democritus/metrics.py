@@ -1,36 +1,58 @@
+from __future__ import division
+
 from builtins import range
 
 import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from scipy.special import xlogy
+
+
+def normalized_entropy(values, normalizer):
+    return -np.sum(xlogy(values, values), axis=(-2, -1)) / normalizer
 
 
 class SimulationMetric(object):
     def calculate(self, simulation):
-        raise NotImplementedError('Subclasses of SimulationMetric must implement \'calculate\' method')
-
-    def plot(self, measurements, axis):
+        return self.calculate_values(simulation.get_current_sender_strategy().values,
+                                     simulation.get_current_receiver_strategy().values, simulation.game,
+                                     simulation.context)
+
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        raise NotImplementedError('Subclasses of SimulationMetric must implement \'calculate_values\' method')
+
+    def calculate_series(self, sender_history, receiver_history, game, chunk_size=None):
+        sender_history = np.asarray(sender_history)
+        receiver_history = np.asarray(receiver_history)
+        if sender_history.ndim != 3 or receiver_history.ndim != 3 or len(sender_history) != len(receiver_history):
+            raise ValueError('Strategy histories should be three-dimensional and have the same number of steps, '
+                             'but have dimensions %s and %s.' % (sender_history.shape, receiver_history.shape))
+        chunk_size = chunk_size or max(len(sender_history), 1)
+        series = [self.calculate_values(sender_history[start:start + chunk_size],
+                                        receiver_history[start:start + chunk_size], game)
+                  for start in range(0, len(sender_history), chunk_size)]
+        return np.concatenate([np.zeros(0)] + series)
+
+    def plot(self, measurements, axis, steps=None):
         raise NotImplementedError('Subclasses of SimulationMetric must implement \'plot\' method')
 
 
 class ExpectedUtilityMetric(SimulationMetric):
     name = 'Expected utility'
 
-    def calculate(self, simulation):
-        game = simulation.game
-        sender_strategy = simulation.get_current_sender_strategy()
-        receiver_strategy = simulation.get_current_receiver_strategy()
-
-        expected_utility = sum(
-            game.states.priors[t] * sender_strategy[t, m] * receiver_strategy[m, x] * game.utility[t, x]
-            for t in range(game.number_of_states())
-            for m in range(game.number_of_messages())
-            for x in range(game.number_of_actions()))
-        maximum_expected_utility = sum(game.states.priors[t] * np.max(game.utility[t])
-                                       for t in range(game.number_of_states()))
-        return expected_utility / maximum_expected_utility
-
-    def plot(self, measurements, axis):
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        compiled_game = game.compile()
+        if context is not None and context.receiver_values is receiver_values:
+            sender_expected_utility = context.sender_expected_utility()
+        else:
+            sender_expected_utility = compiled_game.sender_expected_utility(receiver_values)
+        expected_utility = np.einsum('t,...tm,...tm->...', compiled_game.priors, sender_values,
+                                     sender_expected_utility)
+        return expected_utility / compiled_game.maximum_expected_utility
+
+    def plot(self, measurements, axis, steps=None):
         axis.set_title(self.name)
-        axis.plot(list(range(len(measurements))), measurements, marker='.')
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
         axis.set_ylim(ymin=0)
         axis.set_xlim(xmin=0)
 
@@ -38,19 +60,12 @@ class ExpectedUtilityMetric(SimulationMetric):
 class SenderNormalizedEntropyMetric(SimulationMetric):
     name = 'Sender entropy'
 
-    def calculate(self, simulation):
-        game = simulation.game
-        sender_strategy = simulation.get_current_sender_strategy()
-        entropy = -sum(
-            np.log(sender_strategy[c, a]) * sender_strategy[c, a] if sender_strategy[c, a] != 0 else 0
-            for c in range(game.number_of_states())
-            for a in range(game.number_of_messages()))
-        normalization_factor = game.number_of_states() * np.log(game.number_of_messages())
-        return entropy / normalization_factor
-
-    def plot(self, measurements, axis):
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        return normalized_entropy(sender_values, game.compile().sender_entropy_normalizer)
+
+    def plot(self, measurements, axis, steps=None):
         axis.set_title(self.name)
-        axis.plot(list(range(len(measurements))), measurements, marker='.')
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
         axis.set_ylim(ymin=0)
         axis.set_xlim(xmin=0)
 
@@ -58,18 +73,101 @@ class SenderNormalizedEntropyMetric(SimulationMetric):
 class ReceiverNormalizedEntropyMetric(SimulationMetric):
     name = 'Receiver entropy'
 
-    def calculate(self, simulation):
-        game = simulation.game
-        receiver_strategy = simulation.get_current_receiver_strategy()
-        entropy = -sum(
-            np.log(receiver_strategy[c, a]) * receiver_strategy[c, a] if receiver_strategy[c, a] != 0 else 0
-            for c in range(game.number_of_messages())
-            for a in range(game.number_of_actions()))
-        normalization_factor = game.number_of_messages() * np.log(game.number_of_actions())
-        return entropy / normalization_factor
-
-    def plot(self, measurements, axis):
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        return normalized_entropy(receiver_values, game.compile().receiver_entropy_normalizer)
+
+    def plot(self, measurements, axis, steps=None):
         axis.set_title(self.name)
-        axis.plot(list(range(len(measurements))), measurements, marker='.')
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
         axis.set_ylim(ymin=0)
         axis.set_xlim(xmin=0)
+
+
+class MutualInformationMetric(SimulationMetric):
+    name = 'Mutual information'
+
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        priors = game.compile().priors
+        joint_probabilities = np.matmul(priors[:, np.newaxis] * sender_values, receiver_values)
+        action_probabilities = np.sum(joint_probabilities, axis=-2)
+        mutual_information = np.sum(xlogy(joint_probabilities, joint_probabilities), axis=(-2, -1)) \
+            - np.sum(xlogy(priors, priors)) - np.sum(xlogy(action_probabilities, action_probabilities), axis=-1)
+        return np.maximum(mutual_information, 0) / np.log(2)
+
+    def plot(self, measurements, axis, steps=None):
+        axis.set_title(self.name)
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
+        axis.set_ylim(ymin=0)
+        axis.set_xlim(xmin=0)
+
+
+class CommunicativeSuccessMetric(SimulationMetric):
+    name = 'Communicative success'
+
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        if game.number_of_actions() != game.number_of_states():
+            raise ValueError('Communicative success requires as many actions as states, '
+                             'but there are %s states and %s actions.'
+                             % (game.number_of_states(), game.number_of_actions()))
+        return np.einsum('t,...tm,...mt->...', game.compile().priors, sender_values, receiver_values)
+
+    def plot(self, measurements, axis, steps=None):
+        axis.set_title(self.name)
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
+        axis.set_ylim(0, 1)
+        axis.set_xlim(xmin=0)
+
+
+def neighbour_structure(game):
+    if not hasattr(game.states, 'neighbour_structure'):
+        raise ValueError('Category metrics require states in a metric space')
+    return game.states.neighbour_structure()
+
+
+class CategoryConvexityMetric(SimulationMetric):
+    name = 'Category convexity'
+
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        u, t, v = neighbour_structure(game).between_triples
+        sender_values = np.asarray(sender_values)
+        shared_category = sender_values[..., u, :] * sender_values[..., v, :]
+        in_between = np.sum(shared_category * sender_values[..., t, :], axis=(-2, -1))
+        total = np.sum(shared_category, axis=(-2, -1))
+        positive_total = np.where(total > 0, total, 1)
+        return np.where(total > 0, in_between / positive_total, 1)
+
+    def plot(self, measurements, axis, steps=None):
+        axis.set_title(self.name)
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
+        axis.set_ylim(0, 1)
+        axis.set_xlim(xmin=0)
+
+
+class CategoryConnectednessMetric(SimulationMetric):
+    name = 'Category connectedness'
+
+    def calculate_values(self, sender_values, receiver_values, game, context=None):
+        adjacency = neighbour_structure(game).adjacency.tocoo()
+        categories = np.argmax(sender_values, axis=-1)
+        n_states = categories.shape[-1]
+        connectedness = np.zeros(categories.shape[:-1])
+        for index in np.ndindex(*categories.shape[:-1]):
+            category = categories[index]
+            same_category = category[adjacency.row] == category[adjacency.col]
+            graph = sparse.csr_matrix((np.ones(np.sum(same_category)),
+                                       (adjacency.row[same_category], adjacency.col[same_category])),
+                                      shape=(n_states, n_states))
+            n_components, labels = connected_components(graph, directed=False)
+            component_sizes = np.bincount(labels, minlength=n_components)
+            component_categories = np.zeros(n_components, dtype=int)
+            component_categories[labels] = category
+            largest_components = np.zeros(np.shape(sender_values)[-1], dtype=int)
+            np.maximum.at(largest_components, component_categories, component_sizes)
+            connectedness[index] = np.sum(largest_components) / n_states
+        return connectedness
+
+    def plot(self, measurements, axis, steps=None):
+        axis.set_title(self.name)
+        axis.plot(list(range(len(measurements))) if steps is None else steps, measurements, marker='.')
+        axis.set_ylim(0, 1)
+        axis.set_xlim(xmin=0)
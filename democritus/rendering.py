@@ -0,0 +1,224 @@
+from __future__ import division
+
+import time
+from queue import Empty
+
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+
+from democritus.types import WCSMunsellPalette
+
+style_names = ['seaborn-v0_8-deep', 'seaborn-deep']
+
+
+def configure_style():
+    plt.rcParams['toolbar'] = 'None'
+    for style_name in style_names:
+        if style_name in plt.style.available:
+            plt.style.use(style_name)
+            return
+
+
+def color_map(name):
+    if hasattr(matplotlib, 'colormaps'):
+        return matplotlib.colormaps[name]
+    return matplotlib.cm.get_cmap(name)
+
+
+def wcs_chip_indices(chips):
+    value_indices = [WCSMunsellPalette.wcs_values.index(chip[WCSMunsellPalette.wcs_value_key]) for chip in chips]
+    hue_indices = [chip[WCSMunsellPalette.wcs_hue_key] for chip in chips]
+    return value_indices, hue_indices
+
+
+def wcs_priors_image(chips, priors):
+    image = np.full((10, 41), np.nan)
+    image[wcs_chip_indices(chips)] = priors
+    return image
+
+
+def wcs_strategy_image(chips, chip_probabilities):
+    colors = np.array(color_map('Set1').colors)
+    image = np.zeros((10, 41, 4))
+    image[..., :3] = colors[0]
+    message_indices = np.argmax(chip_probabilities, axis=1)
+    value_indices, hue_indices = wcs_chip_indices(chips)
+    image[value_indices, hue_indices, :3] = colors[message_indices]
+    image[value_indices, hue_indices, 3] = chip_probabilities[np.arange(len(chips)), message_indices]
+    return image
+
+
+def plot_measurements(measurements_collector):
+    metric_names = list(measurements_collector.metrics.keys())
+    n_metrics = len(metric_names)
+    for i in range(n_metrics):
+        axi = plt.subplot2grid((n_metrics, 1), (i, 0))
+        metric_class = measurements_collector.metrics.get(metric_names[i])
+        metric_class.plot(measurements_collector.measurements[metric_names[i]], axi,
+                          measurements_collector.measurement_steps[metric_names[i]])
+    plt.tight_layout(h_pad=0.5, w_pad=0)
+
+
+def plot_simulation(simulation, block=False):
+    game = simulation.game
+    n_rows = 2
+    n_cols = (4 if game.confusion is not None else 2)
+    states_plot_span = n_cols // 2
+    utility_plot_span = n_cols // 2 // (2 if game.confusion is not None else 1)
+    strategy_plot_span = n_cols // 2
+    plot_grid_shape = (n_rows, n_cols)
+
+    plt.figure(0)
+    ax1 = plt.subplot2grid(plot_grid_shape, (0, 0), colspan=states_plot_span)
+    ax1.set_title('Priors')
+    game.states.plot(ax1)
+
+    ax2 = plt.subplot2grid(plot_grid_shape, (0, states_plot_span), colspan=utility_plot_span)
+    ax2.set_title('Utility')
+    game.utility.plot(ax2)
+    if game.confusion is not None:
+        ax4 = plt.subplot2grid(plot_grid_shape, (0, states_plot_span + utility_plot_span),
+                               colspan=utility_plot_span)
+        ax4.set_title('Confusion')
+        game.confusion.plot(ax4)
+
+    ax5 = plt.subplot2grid(plot_grid_shape, (1, 0), colspan=strategy_plot_span)
+    ax5.set_title('Sender strategy')
+    simulation.get_current_sender_strategy().plot(ax5)
+
+    ax6 = plt.subplot2grid(plot_grid_shape, (1, strategy_plot_span), colspan=strategy_plot_span)
+    ax6.set_title('Receiver strategy')
+    simulation.get_current_receiver_strategy().plot(ax6)
+
+    if simulation.measurements_collector.number_of_metrics() > 0:
+        plt.figure(1)
+        plot_measurements(simulation.measurements_collector)
+
+    plt.figure(0)
+    plt.tight_layout(h_pad=0.5, w_pad=0)
+    plt.show(block=block)
+    plt.pause(0.00001)
+
+
+class LiveFigure(object):
+    def __init__(self, layout):
+        self.layout = layout
+        self.wcs = layout['wcs']
+        n_cols = (4 if layout['confusion'] is not None else 2)
+        states_plot_span = n_cols // 2
+        utility_plot_span = n_cols // 2 // (2 if layout['confusion'] is not None else 1)
+        strategy_plot_span = n_cols // 2
+        plot_grid_shape = (2, n_cols)
+
+        self.figure = plt.figure(0)
+        priors_axis = plt.subplot2grid(plot_grid_shape, (0, 0), colspan=states_plot_span)
+        priors_axis.set_title('Priors')
+        if self.wcs:
+            priors_axis.imshow(wcs_priors_image(layout['states'], layout['priors']), origin='upper',
+                               interpolation='none')
+            priors_axis.axis('off')
+        else:
+            priors_axis.plot(layout['states'], layout['priors'], marker='.')
+            priors_axis.set_ylim(bottom=0)
+        utility_axis = plt.subplot2grid(plot_grid_shape, (0, states_plot_span), colspan=utility_plot_span)
+        utility_axis.set_title('Utility')
+        utility_axis.imshow(layout['utility'], origin='upper', interpolation='none')
+        if layout['confusion'] is not None:
+            confusion_axis = plt.subplot2grid(plot_grid_shape, (0, states_plot_span + utility_plot_span),
+                                              colspan=utility_plot_span)
+            confusion_axis.set_title('Confusion')
+            confusion_axis.imshow(layout['confusion'], origin='upper', interpolation='none')
+
+        self.sender_axis = plt.subplot2grid(plot_grid_shape, (1, 0), colspan=strategy_plot_span)
+        self.receiver_axis = plt.subplot2grid(plot_grid_shape, (1, strategy_plot_span), colspan=strategy_plot_span)
+        self.sender_artists = self.create_strategy_artists(self.sender_axis, 'Sender strategy', layout['states'])
+        self.receiver_artists = self.create_strategy_artists(self.receiver_axis, 'Receiver strategy',
+                                                             layout['actions'])
+        self.sender_axis.set_ylim(-0.1, 1.1)
+        self.receiver_axis.set_ylim(-0.1, 1.1)
+        self.figure.tight_layout(h_pad=0.5, w_pad=0)
+
+        self.metrics_figure = None
+        self.metric_lines = {}
+        self.metric_points = {}
+        if len(layout['metrics']) > 0:
+            self.metrics_figure = plt.figure(1)
+            for i, (metric_name, title) in enumerate(layout['metrics']):
+                axis = plt.subplot2grid((len(layout['metrics']), 1), (i, 0))
+                axis.set_title(title)
+                self.metric_lines[metric_name] = axis.plot([], [], marker='.')[0]
+                self.metric_points[metric_name] = ([], [])
+            self.metrics_figure.tight_layout(h_pad=0.5, w_pad=0)
+
+    def create_strategy_artists(self, axis, title, elements):
+        axis.set_title(title)
+        if self.wcs:
+            return axis.imshow(np.zeros((10, 41, 4)), origin='upper', interpolation='none')
+        lines = [axis.plot(elements, np.zeros(len(elements)), label='$' + str(message) + '$', marker='.')[0]
+                 for message in self.layout['messages']]
+        axis.legend(loc='lower left')
+        return lines
+
+    def update_strategy_artists(self, artists, elements, chip_probabilities):
+        if self.wcs:
+            artists.set_data(wcs_strategy_image(elements, chip_probabilities))
+            return
+        for line, probabilities in zip(artists, np.transpose(chip_probabilities)):
+            line.set_ydata(probabilities)
+
+    def update(self, frames):
+        for frame in frames:
+            for metric_name, (steps, values) in frame['measurements'].items():
+                self.metric_points[metric_name][0].extend(steps)
+                self.metric_points[metric_name][1].extend(values)
+        frame = frames[-1]
+        self.update_strategy_artists(self.sender_artists, self.layout['states'], frame['sender'])
+        self.update_strategy_artists(self.receiver_artists, self.layout['actions'], np.transpose(frame['receiver']))
+        self.figure.suptitle('Step %d' % frame['step'])
+        for metric_name, line in self.metric_lines.items():
+            line.set_data(*self.metric_points[metric_name])
+            line.axes.relim()
+            line.axes.autoscale_view()
+
+    def draw(self):
+        for figure in [self.figure, self.metrics_figure]:
+            if figure is not None:
+                figure.canvas.draw_idle()
+                figure.canvas.flush_events()
+
+
+def receive_frames(queue):
+    frames = [queue.get()]
+    while frames[-1] is not None:
+        try:
+            frames.append(queue.get_nowait())
+        except Empty:
+            break
+    return frames
+
+
+def run_live_view(queue, layout, max_fps=10, keep_open=False):
+    configure_style()
+    live_figure = LiveFigure(layout)
+    plt.show(block=False)
+    frame_interval = 1 / max_fps
+    while True:
+        frames = receive_frames(queue)
+        closed = frames[-1] is None
+        frames = [frame for frame in frames if frame is not None]
+        if len(frames) > 0:
+            drawing_start = time.time()
+            live_figure.update(frames)
+            live_figure.draw()
+            remaining_time = frame_interval - (time.time() - drawing_start)
+            if remaining_time > 0 and not closed:
+                plt.pause(remaining_time)
+        if closed:
+            break
+    if keep_open:
+        plt.show(block=True)
+    plt.close('all')
+
+
+configure_style()
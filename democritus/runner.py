@@ -1,11 +1,21 @@
 import argparse
 import os
+import shutil
 import sys
 import time
 
 import numpy as np
+import yaml
 
+from democritus import utils
+from democritus.cache import ResultCache
+from democritus.checkpoint import Checkpointer, load_checkpoint
 from democritus.converters import SimulationSpecReader
+from democritus.live import LiveView
+from democritus.simulation import SimulationMeasurementsCollector
+from democritus.sinks import CSVMetricSink, JSONLinesMetricSink
+from democritus.store import ResultStore, batch_records, simulation_record
+from democritus.sweep import run_sweep
 
 
 def existing_dir(prospective_dir):
@@ -15,6 +25,44 @@ def existing_dir(prospective_dir):
         return prospective_dir
 
 
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('%s is not a positive integer' % value)
+    return number
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError('%s is not a non-negative integer' % value)
+    return number
+
+
+def positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError('%s is not a positive number' % value)
+    return number
+
+
+def non_negative_float(value):
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError('%s is not a non-negative number' % value)
+    return number
+
+
+def shard(value):
+    try:
+        shard_index, n_shards = [int(number) for number in value.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('%s is not a shard of the form i/N' % value)
+    if n_shards < 1 or not 0 <= shard_index < n_shards:
+        raise argparse.ArgumentTypeError('%s is not a shard with 0 <= i < N' % value)
+    return shard_index, n_shards
+
+
 class SimulationRunner(object):
     def __init__(self, args):
         arg_parser = argparse.ArgumentParser()
@@ -23,20 +71,180 @@ class SimulationRunner(object):
         arg_parser.add_argument('--batch', action='store_true')
         arg_parser.add_argument('--output-prefix', default=time.strftime('%Y%m%d-%H%M%S'))
         arg_parser.add_argument('--output-dir', type=existing_dir, default='.')
+        arg_parser.add_argument('--replicates', type=positive_int)
+        arg_parser.add_argument('--metrics-output', choices=['memory', 'csv', 'jsonl'], default='memory')
+        arg_parser.add_argument('--save-history', action='store_true')
+        arg_parser.add_argument('--checkpoint-interval', type=non_negative_float)
+        arg_parser.add_argument('--resume', action='store_true')
+        arg_parser.add_argument('--max-fps', type=positive_float, default=10)
+        arg_parser.add_argument('--workers', type=positive_int)
+        arg_parser.add_argument('--seed', type=non_negative_int)
+        arg_parser.add_argument('--replicate', type=non_negative_int)
+        arg_parser.add_argument('--results-store')
+        arg_parser.add_argument('--results-batch-size', type=positive_int, default=100)
+        arg_parser.add_argument('--cache-dir')
+        arg_parser.add_argument('--cache-size', type=positive_float)
+        arg_parser.add_argument('--shard', type=shard)
         self.args = arg_parser.parse_args(args)
-        self.simulation = SimulationSpecReader.read_from_file(self.args.configfile)
+        if self.args.replicate is not None and self.args.replicates is not None:
+            arg_parser.error('--replicate reruns a single replicate and cannot be combined with --replicates')
+        if self.args.replicate is not None and self.args.seed is None:
+            arg_parser.error('--replicate requires the --seed of the batch it comes from')
+        self.seed = np.random.SeedSequence().entropy if self.args.seed is None else self.args.seed
+        if self.args.resume and not os.path.isfile(self.checkpoint_file_name()):
+            arg_parser.error('there is no checkpoint to resume from at %s' % self.checkpoint_file_name())
+        spec = SimulationSpecReader.load_from_file(self.args.configfile)
+        self.spec = spec
+        self.sweep_results = None
+        self.simulation = None
+        if self.args.shard is not None:
+            if 'sweep' not in spec:
+                arg_parser.error('--shard splits the points of a sweep, but the spec has no sweep')
+            if self.args.results_store is None or self.args.seed is None:
+                arg_parser.error('--shard requires --results-store and the --seed shared by all shards')
+        if 'sweep' in spec:
+            return
+        if self.args.replicates is None:
+            random_generator, dynamics_random_generator = self.create_random_generators()
+            self.simulation = SimulationSpecReader.read(spec, self.create_metric_sinks(),
+                                                        keep_measurements=self.args.metrics_output == 'memory'
+                                                        or not self.args.batch,
+                                                        history_directory=self.history_directory(),
+                                                        random_generator=random_generator,
+                                                        append_history=self.args.resume,
+                                                        dynamics_random_generator=dynamics_random_generator)
+            if self.args.resume:
+                load_checkpoint(self.simulation, self.checkpoint_file_name())
+        else:
+            self.simulation = SimulationSpecReader.read_batch(spec, self.args.replicates, self.seed)
+
+    def create_random_generators(self):
+        if self.args.replicate is None:
+            return np.random.default_rng(self.seed), None
+        return utils.spawned_random_generator(self.seed, self.args.replicate), \
+            utils.tie_breaking_random_generator(self.seed, self.args.replicate)
+
+    def checkpoint_file_name(self):
+        return os.path.join(self.args.output_dir, self.args.output_prefix + '-checkpoint.npz')
+
+    def create_checkpointer(self):
+        if self.args.checkpoint_interval is None:
+            return None
+        return Checkpointer(self.checkpoint_file_name(), self.args.checkpoint_interval)
+
+    def create_result_store(self):
+        if self.args.results_store is None:
+            return None
+        if self.args.shard is None:
+            return ResultStore(self.args.results_store, batch_size=self.args.results_batch_size)
+        shard_name = 'shard-%d-of-%d' % self.args.shard
+        shard_directory = os.path.join(self.args.results_store, shard_name)
+        if os.path.isdir(shard_directory):
+            shutil.rmtree(shard_directory)
+        return ResultStore(shard_directory, name=shard_name, batch_size=self.args.results_batch_size)
+
+    def create_result_cache(self):
+        if self.args.cache_dir is None:
+            return None
+        max_size = None if self.args.cache_size is None else int(self.args.cache_size * 1024 * 1024)
+        return ResultCache(self.args.cache_dir, max_size)
+
+    def history_directory(self):
+        if not self.args.save_history:
+            return None
+        return os.path.join(self.args.output_dir, self.args.output_prefix + '-trajectory')
+
+    def create_metric_sinks(self):
+        output_path_prefix = os.path.join(self.args.output_dir, self.args.output_prefix)
+        if self.args.metrics_output == 'csv':
+            return [CSVMetricSink(output_path_prefix + '-metrics.csv', append=self.args.resume)]
+        if self.args.metrics_output == 'jsonl':
+            return [JSONLinesMetricSink(output_path_prefix + '-metrics.jsonl', append=self.args.resume)]
+        return []
 
     def run(self, block_at_end=True):
-        plot_steps = not self.args.batch
-        self.simulation.run_until_converged(max_steps=self.args.max_steps, plot_steps=plot_steps,
-                                            block_at_end=block_at_end)
+        if self.simulation is None:
+            self.sweep_results = run_sweep(self.spec, max_steps=self.args.max_steps, workers=self.args.workers,
+                                           seed=self.seed, store=self.create_result_store(),
+                                           cache=self.create_result_cache(), shard=self.args.shard)
+            return
+        if self.args.replicates is not None:
+            self.simulation.run_until_converged(max_steps=self.args.max_steps)
+            return
+        checkpointer = self.create_checkpointer()
+        live_view = None
+        if not self.args.batch:
+            live_view = LiveView(self.simulation, max_fps=self.args.max_fps, keep_open=block_at_end)
+            live_view.update(self.simulation, force=True)
+        self.simulation.run_until_converged(max_steps=self.args.max_steps, checkpointer=checkpointer,
+                                            live_view=live_view)
+        if live_view is not None:
+            live_view.close(self.simulation)
+        if checkpointer is not None:
+            checkpointer.checkpoint(self.simulation, force=True)
+        self.simulation.measurements_collector.close()
 
     def write_results(self):
+        if self.simulation is None:
+            if self.args.results_store is None:
+                self.write_sweep_results()
+            return
+        if self.args.results_store is not None:
+            self.store_results()
+            return
+        self.write_run_summary()
+        if self.args.replicates is not None:
+            self.write_batch_results()
+            return
+        if self.args.save_history:
+            self.simulation.close_history()
+            return
         sender_output_filename = os.path.join(self.args.output_dir, self.args.output_prefix + '-sender.csv')
         receiver_output_filename = os.path.join(self.args.output_dir, self.args.output_prefix + '-receiver.csv')
         np.savetxt(sender_output_filename, self.simulation.get_current_sender_strategy(), delimiter=',')
         np.savetxt(receiver_output_filename, self.simulation.get_current_receiver_strategy(), delimiter=',')
 
+    def store_results(self):
+        store = self.create_result_store()
+        if self.args.replicates is None:
+            if self.args.save_history:
+                self.simulation.close_history()
+            store.append(simulation_record(self.simulation, self.spec, self.seed, run=self.args.replicate))
+        else:
+            metrics = SimulationMeasurementsCollector(self.spec.get('metrics') or []).metrics
+            for record in batch_records(self.simulation, self.spec, self.seed, metrics):
+                store.append(record)
+        store.close()
+
+    def write_batch_results(self):
+        output_path_prefix = os.path.join(self.args.output_dir, self.args.output_prefix)
+        np.save(output_path_prefix + '-sender.npy', self.simulation.sender_strategies)
+        np.save(output_path_prefix + '-receiver.npy', self.simulation.receiver_strategies)
+        np.savetxt(output_path_prefix + '-convergence.csv', self.simulation.convergence_steps, fmt='%d',
+                   delimiter=',')
+
+    def write_sweep_results(self):
+        sweep_filename = os.path.join(self.args.output_dir, self.args.output_prefix + '-sweep.csv')
+        self.sweep_results.to_csv(sweep_filename)
+
+    def write_run_summary(self):
+        summary = {'update schedule': self.simulation.dynamics.update_schedule,
+                   'steps': self.simulation.current_step,
+                   'seed': self.seed}
+        if self.args.replicate is not None:
+            summary['replicate'] = self.args.replicate
+        if self.args.replicates is None:
+            summary['converged'] = self.simulation.converged()
+            last_measurements = self.simulation.measurements_collector.last_measurements
+            if len(last_measurements) > 0:
+                summary['metrics'] = {metric_name: float(measurement)
+                                      for metric_name, (step, measurement) in last_measurements.items()}
+        else:
+            summary['converged replicates'] = int(np.sum(self.simulation.converged()))
+        summary_filename = os.path.join(self.args.output_dir, self.args.output_prefix + '-summary.yml')
+        with open(summary_filename, 'w') as summary_file:
+            yaml.safe_dump(summary, summary_file, default_flow_style=False)
+
 
 if __name__ == "__main__":
     runner = SimulationRunner(sys.argv[1:])
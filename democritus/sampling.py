@@ -0,0 +1,58 @@
+from __future__ import division
+
+import math
+
+
+class MetricSampler(object):
+    samples_at_end = False
+
+    def samples(self, step):
+        raise NotImplementedError('Subclasses of MetricSampler must implement \'samples\' method')
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+
+class EveryStepSampler(MetricSampler):
+    def samples(self, step):
+        return True
+
+
+class IntervalSampler(MetricSampler):
+    def __init__(self, interval):
+        if interval < 1:
+            raise ValueError('Sampling interval should be at least 1, but is %s' % interval)
+        self.interval = interval
+
+    def samples(self, step):
+        return step % self.interval == 0
+
+
+class LogSpacedSampler(MetricSampler):
+    def __init__(self, factor=2):
+        if factor <= 1:
+            raise ValueError('Sampling factor should be greater than 1, but is %s' % factor)
+        self.factor = factor
+        self.next_step = 0
+
+    def samples(self, step):
+        if step < self.next_step:
+            return False
+        self.next_step = max(step + 1, int(math.ceil(step * self.factor)))
+        return True
+
+    def get_state(self):
+        return {'next step': self.next_step}
+
+    def set_state(self, state):
+        self.next_step = int(state['next step'])
+
+
+class ConvergenceSampler(MetricSampler):
+    samples_at_end = True
+
+    def samples(self, step):
+        return False
@@ -1,10 +1,26 @@
+import json
+import os
 from collections import OrderedDict
 
-import matplotlib.pyplot as plt
 import numpy as np
 
+from democritus import utils
+from democritus.context import StepContext
+from democritus.exceptions import InvalidValueInSpecification
 from democritus.factories import SenderStrategyFactory, ReceiverStrategyFactory
-from democritus.metrics import ExpectedUtilityMetric, SenderNormalizedEntropyMetric, ReceiverNormalizedEntropyMetric
+from democritus.history import StrategyHistory, KeptStrategies
+from democritus.metrics import ExpectedUtilityMetric, SenderNormalizedEntropyMetric, ReceiverNormalizedEntropyMetric, \
+    MutualInformationMetric, CommunicativeSuccessMetric, CategoryConvexityMetric, CategoryConnectednessMetric
+from democritus.sampling import EveryStepSampler, IntervalSampler, LogSpacedSampler, ConvergenceSampler
+from democritus.specification import Specification
+from democritus.trajectory import TrajectoryFiles, write_trajectory_metadata
+
+
+def strategies_converged(previous_sender_values, previous_receiver_values, sender_values, receiver_values,
+                         threshold=0.01):
+    sender_change = np.sum(np.abs(sender_values - previous_sender_values), axis=(-2, -1))
+    receiver_change = np.sum(np.abs(receiver_values - previous_receiver_values), axis=(-2, -1))
+    return (sender_change < threshold) & (receiver_change < threshold)
 
 
 class SimulationMetricConverter(object):
@@ -17,18 +33,71 @@ class SimulationMetricConverter(object):
             return SenderNormalizedEntropyMetric()
         elif name == 'receiver entropy':
             return ReceiverNormalizedEntropyMetric()
+        elif name == 'mutual information':
+            return MutualInformationMetric()
+        elif name == 'communicative success':
+            return CommunicativeSuccessMetric()
+        elif name == 'category convexity':
+            return CategoryConvexityMetric()
+        elif name == 'category connectedness':
+            return CategoryConnectednessMetric()
         else:
             raise ValueError('Unknown simulation metric with name: %s', name)
 
 
+def calculate_metric_series(simulation_metrics, sender_history, receiver_history, game, chunk_size=None):
+    series = OrderedDict()
+    for metric_name in simulation_metrics:
+        metric = SimulationMetricConverter.create(metric_name)
+        series[metric_name.lower()] = metric.calculate_series(sender_history, receiver_history, game, chunk_size)
+    return series
+
+
+class MetricSamplerConverter(object):
+    @staticmethod
+    def create(spec):
+        if not isinstance(spec, dict):
+            spec = Specification.from_dict({'type': spec})
+        sampling_type = spec.get('type') or 'every step'
+        if sampling_type == 'every step':
+            return EveryStepSampler()
+        if sampling_type == 'interval':
+            interval = spec.get_or_fail('interval')
+            if type(interval) is not int or interval < 1:
+                raise InvalidValueInSpecification(spec, 'interval', interval)
+            return IntervalSampler(interval)
+        if sampling_type == 'log-spaced':
+            factor = spec.get('factor', 2)
+            if not isinstance(factor, (int, float)) or factor <= 1:
+                raise InvalidValueInSpecification(spec, 'factor', factor)
+            return LogSpacedSampler(factor)
+        if sampling_type == 'at convergence':
+            return ConvergenceSampler()
+        else:
+            raise InvalidValueInSpecification(spec, 'type', sampling_type)
+
+
 class SimulationMeasurementsCollector(object):
-    def __init__(self, simulation_metrics):
+    def __init__(self, simulation_metrics, sinks=None, keep_measurements=True):
         self.metrics = OrderedDict()
+        self.samplers = OrderedDict()
         self.measurements = OrderedDict()
-        for metric_name in simulation_metrics:
-            metric_name = metric_name.lower()
+        self.measurement_steps = OrderedDict()
+        self.last_measurements = OrderedDict()
+        self.sinks = sinks or []
+        self.keep_measurements = keep_measurements
+        for metric_spec in simulation_metrics:
+            if isinstance(metric_spec, dict):
+                metric_spec = Specification.from_dict(metric_spec)
+                metric_name = metric_spec.get_or_fail('name').lower()
+                sampler = MetricSamplerConverter.create(metric_spec.get('sampling') or 'every step')
+            else:
+                metric_name = metric_spec.lower()
+                sampler = EveryStepSampler()
             self.metrics[metric_name] = SimulationMetricConverter.create(metric_name)
+            self.samplers[metric_name] = sampler
             self.measurements[metric_name] = []
+            self.measurement_steps[metric_name] = []
 
     def number_of_metrics(self):
         return len(self.metrics)
@@ -39,124 +108,460 @@ class SimulationMeasurementsCollector(object):
     def get_measurements(self, metric_name):
         return self.measurements.get(metric_name.lower())
 
+    def get_measurement_steps(self, metric_name):
+        return self.measurement_steps.get(metric_name.lower())
+
     def calculate_all(self, simulation):
         for metric_name, metric_class in self.metrics.items():
-            measurements = self.measurements.get(metric_name)
-            new_measurement = metric_class.calculate(simulation)
-            measurements.append(new_measurement)
-            self.measurements[metric_name] = measurements
+            if self.samplers[metric_name].samples(simulation.current_step):
+                self.record(metric_name, simulation.current_step, metric_class.calculate(simulation))
+
+    def calculate_final(self, simulation):
+        for metric_name, metric_class in self.metrics.items():
+            last_measurement = self.last_measurements.get(metric_name)
+            if self.samplers[metric_name].samples_at_end and \
+                    (last_measurement is None or last_measurement[0] != simulation.current_step):
+                self.record(metric_name, simulation.current_step, metric_class.calculate(simulation))
+
+    def record(self, metric_name, step, measurement):
+        self.last_measurements[metric_name] = (step, measurement)
+        if self.keep_measurements:
+            self.measurements[metric_name].append(measurement)
+            self.measurement_steps[metric_name].append(step)
+        for sink in self.sinks:
+            sink.write(metric_name, step, measurement)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def get_state(self):
+        state = {}
+        for metric_name in self.metrics:
+            metric_state = {'steps': np.array(self.measurement_steps[metric_name], dtype=int),
+                            'values': np.array(self.measurements[metric_name], dtype=float)}
+            if metric_name in self.last_measurements:
+                metric_state['last step'], metric_state['last value'] = self.last_measurements[metric_name]
+            metric_state.update(utils.prefixed_state('sampler', self.samplers[metric_name].get_state()))
+            state.update(utils.prefixed_state('metric/' + metric_name, metric_state))
+        for index, sink in enumerate(self.sinks):
+            state.update(utils.prefixed_state('sink/%d' % index, sink.get_state()))
+        return state
+
+    def set_state(self, state):
+        for metric_name in self.metrics:
+            metric_state = utils.unprefixed_state('metric/' + metric_name, state)
+            self.measurement_steps[metric_name] = [int(step) for step in metric_state['steps']]
+            self.measurements[metric_name] = list(metric_state['values'])
+            self.last_measurements.pop(metric_name, None)
+            if 'last step' in metric_state:
+                self.last_measurements[metric_name] = (int(metric_state['last step']),
+                                                       metric_state['last value'][()])
+            self.samplers[metric_name].set_state(utils.unprefixed_state('sampler', metric_state))
+        for index, sink in enumerate(self.sinks):
+            sink.set_state(utils.unprefixed_state('sink/%d' % index, state))
 
     def plot(self):
-        metric_names = list(self.metrics.keys())
-        n_metrics = len(metric_names)
-        for i in range(n_metrics):
-            axi = plt.subplot2grid((n_metrics, 1), (i, 0))
-            metric_class = self.metrics.get(metric_names[i])
-            metric_class.plot(self.measurements[metric_names[i]], axi)
-        plt.tight_layout(h_pad=0.5, w_pad=0)
+        from democritus import rendering
+        rendering.plot_measurements(self)
 
 
 class Simulation(object):
-    def __init__(self, game, dynamics, simulation_metrics=None, sender_strategy=None, receiver_strategy=None):
+    def __init__(self, game, dynamics, simulation_metrics=None, sender_strategy=None, receiver_strategy=None,
+                 accelerator=None, history_policy='all', history_size=None, history_interval=None, metric_sinks=None,
+                 keep_measurements=True, history_directory=None, spec=None, random_generator=None,
+                 append_history=False):
         self.game = game
         self.dynamics = dynamics
+        self.accelerator = accelerator
         self.current_step = 0
-        self.sender_strategies = []
-        self.receiver_strategies = []
+        self.random_generator = np.random.default_rng() if random_generator is None else random_generator
+        if hasattr(dynamics, 'random_generator') and dynamics.random_generator is None:
+            dynamics.random_generator = self.random_generator
+        self.recycles_strategies = history_policy != 'all'
+        self.provided_strategies = [strategy for strategy in (sender_strategy, receiver_strategy)
+                                    if strategy is not None]
         if sender_strategy is None:
-            sender_strategy = SenderStrategyFactory.create_random(game.states, game.messages)
+            sender_strategy = SenderStrategyFactory.create_random(game.states, game.messages, self.random_generator)
         if receiver_strategy is None:
-            receiver_strategy = ReceiverStrategyFactory.create_random(game.messages, game.actions)
-        self.sender_strategies.append(sender_strategy)
-        self.receiver_strategies.append(receiver_strategy)
-        self.measurements_collector = SimulationMeasurementsCollector(simulation_metrics or [])
+            receiver_strategy = ReceiverStrategyFactory.create_random(game.messages, game.actions,
+                                                                      self.random_generator)
+        self.sender_strategy = sender_strategy
+        self.receiver_strategy = receiver_strategy
+        self.previous_sender_strategy = None
+        self.previous_receiver_strategy = None
+        self.rationality_path = []
+        self.schedule_level = None
+        self.level_start_step = None
+        self.history_files = None
+        self.appends_history = False
+        sender_history_file = None
+        receiver_history_file = None
+        steps_history_file = None
+        if history_directory is not None:
+            if not os.path.isdir(history_directory):
+                os.makedirs(history_directory)
+            self.history_files = TrajectoryFiles(history_directory)
+            self.appends_history = append_history and all(os.path.isfile(file_name) for file_name in (
+                self.history_files.sender, self.history_files.receiver, self.history_files.steps))
+            if not self.appends_history:
+                write_trajectory_metadata(history_directory, game, spec)
+            sender_history_file = self.history_files.sender
+            receiver_history_file = self.history_files.receiver
+            steps_history_file = self.history_files.steps
+        self.sender_history = StrategyHistory(np.shape(sender_strategy.values), history_policy, history_size,
+                                              history_interval, file_name=sender_history_file,
+                                              steps_file_name=steps_history_file, append=self.appends_history)
+        self.receiver_history = StrategyHistory(np.shape(receiver_strategy.values), history_policy, history_size,
+                                                history_interval, file_name=receiver_history_file,
+                                                append=self.appends_history)
+        if self.appends_history:
+            self.receiver_history.set_kept_steps(self.sender_history.kept_steps())
+        else:
+            self.record_history()
+        self.context = StepContext(sender_strategy.values, receiver_strategy.values, game)
+        self.measurements_collector = SimulationMeasurementsCollector(simulation_metrics or [], metric_sinks,
+                                                                      keep_measurements)
         self.measurements_collector.calculate_all(self)
-        plt.rcParams['toolbar'] = 'None'
-        plt.style.use('seaborn-deep')
+
+    @property
+    def sender_strategies(self):
+        return KeptStrategies(self.get_kept_steps, self.get_sender_strategy)
+
+    @property
+    def receiver_strategies(self):
+        return KeptStrategies(self.get_kept_steps, self.get_receiver_strategy)
+
+    def record_history(self):
+        self.sender_history.record(self.current_step, self.sender_strategy.values)
+        self.receiver_history.record(self.current_step, self.receiver_strategy.values)
+
+    def flush_history(self):
+        self.sender_history.flush()
+        self.receiver_history.flush()
+
+    def close_history(self):
+        self.flush_history()
+        self.sender_history.close()
+        self.receiver_history.close()
+
+    def get_state(self):
+        state = {'step': self.current_step,
+                 'sender': self.sender_strategy.values,
+                 'receiver': self.receiver_strategy.values,
+                 'random state': json.dumps(self.random_generator.bit_generator.state)}
+        dynamics_random_generator = getattr(self.dynamics, 'random_generator', None)
+        if dynamics_random_generator is not None and dynamics_random_generator is not self.random_generator:
+            state['dynamics/random state'] = json.dumps(dynamics_random_generator.bit_generator.state)
+        if self.previous_sender_strategy is not None:
+            state['previous sender'] = self.previous_sender_strategy.values
+            state['previous receiver'] = self.previous_receiver_strategy.values
+        if getattr(self.dynamics, 'rationality', None) is not None:
+            state['dynamics/rationality'] = self.dynamics.rationality
+        if self.schedule_level is not None:
+            state['schedule/level'] = self.schedule_level
+            state['schedule/path'] = np.reshape(np.array(self.rationality_path, dtype=float), (-1, 2))
+            if self.level_start_step is not None:
+                state['schedule/level start step'] = self.level_start_step
+        if self.accelerator is not None:
+            state.update(utils.prefixed_state('accelerator', self.accelerator.get_state()))
+        state.update(utils.prefixed_state('measurements', self.measurements_collector.get_state()))
+        return state
+
+    def set_state(self, state):
+        self.current_step = int(state['step'])
+        self.sender_strategy = self.restored_sender_strategy(state['sender'])
+        self.receiver_strategy = self.restored_receiver_strategy(state['receiver'])
+        self.previous_sender_strategy = None
+        self.previous_receiver_strategy = None
+        if 'previous sender' in state:
+            self.previous_sender_strategy = self.restored_sender_strategy(state['previous sender'])
+            self.previous_receiver_strategy = self.restored_receiver_strategy(state['previous receiver'])
+        self.random_generator.bit_generator.state = json.loads(str(state['random state']))
+        if 'dynamics/random state' in state:
+            self.dynamics.random_generator.bit_generator.state = json.loads(str(state['dynamics/random state']))
+        if 'dynamics/rationality' in state:
+            self.dynamics.rationality = state['dynamics/rationality'][()]
+        self.schedule_level = None
+        self.level_start_step = None
+        self.rationality_path = []
+        if 'schedule/level' in state:
+            self.schedule_level = int(state['schedule/level'])
+            self.rationality_path = [(rationality, int(step)) for rationality, step in state['schedule/path']]
+            if 'schedule/level start step' in state:
+                self.level_start_step = int(state['schedule/level start step'])
+        if self.accelerator is not None:
+            self.accelerator.set_state(utils.unprefixed_state('accelerator', state))
+        self.measurements_collector.set_state(utils.unprefixed_state('measurements', state))
+        if self.appends_history:
+            self.sender_history.rewind(self.current_step)
+            self.receiver_history.rewind(self.current_step)
+        else:
+            self.sender_history.clear()
+            self.receiver_history.clear()
+        if not self.sender_history.contains(self.current_step):
+            self.record_history()
+        self.context = StepContext(self.sender_strategy.values, self.receiver_strategy.values, self.game)
+
+    def restored_sender_strategy(self, values):
+        strategy = SenderStrategyFactory.create(self.game.states, self.game.messages, values)
+        np.copyto(strategy.values, values)
+        return strategy
+
+    def restored_receiver_strategy(self, values):
+        strategy = ReceiverStrategyFactory.create(self.game.messages, self.game.actions, values)
+        np.copyto(strategy.values, values)
+        return strategy
+
+    def absolute_step(self, step):
+        absolute_step = step + self.current_step + 1 if step < 0 else step
+        if absolute_step < 0 or absolute_step > self.current_step:
+            raise IndexError('Step %s is outside of the simulation, which is at step %s' % (step, self.current_step))
+        return absolute_step
 
     def get_sender_strategy(self, step):
-        return self.sender_strategies[step]
+        step = self.absolute_step(step)
+        if step == self.current_step:
+            return self.sender_strategy
+        if step == self.current_step - 1:
+            return self.previous_sender_strategy
+        return SenderStrategyFactory.create(self.game.states, self.game.messages, self.sender_history.get(step))
 
     def get_receiver_strategy(self, step):
-        return self.receiver_strategies[step]
+        step = self.absolute_step(step)
+        if step == self.current_step:
+            return self.receiver_strategy
+        if step == self.current_step - 1:
+            return self.previous_receiver_strategy
+        return ReceiverStrategyFactory.create(self.game.messages, self.game.actions, self.receiver_history.get(step))
+
+    def get_kept_steps(self):
+        recent_steps = [step for step in (self.current_step - 1, self.current_step) if step >= 0]
+        return np.union1d(self.sender_history.kept_steps(), recent_steps).astype(int)
+
+    def get_sender_history(self):
+        return self.get_history(self.sender_history, self.previous_sender_strategy, self.sender_strategy)
+
+    def get_receiver_history(self):
+        return self.get_history(self.receiver_history, self.previous_receiver_strategy, self.receiver_strategy)
+
+    def get_history(self, history, previous_strategy, strategy):
+        kept_steps = self.get_kept_steps()
+        steps, values = history.stacked()
+        if len(steps) == len(kept_steps):
+            return values
+        stacked_values = np.empty((len(kept_steps),) + history.shape)
+        stacked_values[np.searchsorted(kept_steps, steps)] = values
+        for step, recent_strategy in ((self.current_step - 1, previous_strategy), (self.current_step, strategy)):
+            if step >= 0 and not history.contains(step):
+                stacked_values[np.searchsorted(kept_steps, step)] = recent_strategy.values
+        return stacked_values
 
     def get_current_sender_strategy(self):
-        return self.get_sender_strategy(self.current_step)
+        return self.sender_strategy
 
     def get_current_receiver_strategy(self):
-        return self.get_receiver_strategy(self.current_step)
+        return self.receiver_strategy
 
     def converged(self):
         if self.current_step < 1:
             return False
-        previous_sender_strategy = self.get_sender_strategy(self.current_step - 1)
-        previous_receiver_strategy = self.get_receiver_strategy(self.current_step - 1)
-        if np.sum(abs(self.get_current_sender_strategy().values - previous_sender_strategy.values)) < 0.01 \
-                and np.sum(abs(self.get_current_receiver_strategy().values - previous_receiver_strategy.values)) < 0.01:
-            return True
-        else:
-            return False
+        return bool(strategies_converged(self.previous_sender_strategy.values, self.previous_receiver_strategy.values,
+                                         self.sender_strategy.values, self.receiver_strategy.values))
 
-    def step(self):
-        sender_strategy = self.get_current_sender_strategy()
-        receiver_strategy = self.get_current_receiver_strategy()
+    def recyclable(self, strategy):
+        if not self.recycles_strategies or strategy is None \
+                or any(strategy is provided for provided in self.provided_strategies):
+            return None
+        return strategy
 
-        new_sender_strategy = self.dynamics.update_sender(sender_strategy, receiver_strategy, self.game)
-        new_receiver_strategy = self.dynamics.update_receiver(sender_strategy, receiver_strategy, self.game)
+    def step(self):
+        sender_strategy = self.sender_strategy
+        receiver_strategy = self.receiver_strategy
+        recycled_sender_strategy = self.recyclable(self.previous_sender_strategy)
+        recycled_receiver_strategy = self.recyclable(self.previous_receiver_strategy)
+        sender_out = None if recycled_sender_strategy is None else recycled_sender_strategy.values
+        receiver_out = None if recycled_receiver_strategy is None else recycled_receiver_strategy.values
+
+        new_sender_values, new_receiver_values = self.dynamics.update_values(sender_strategy.values,
+                                                                             receiver_strategy.values, self.game,
+                                                                             sender_out, receiver_out,
+                                                                             step=self.current_step,
+                                                                             context=self.context)
+        if self.accelerator is not None:
+            new_sender_values, new_receiver_values = self.accelerator.accelerate(sender_strategy.values,
+                                                                                 receiver_strategy.values,
+                                                                                 new_sender_values,
+                                                                                 new_receiver_values)
+        if recycled_sender_strategy is None:
+            new_sender_strategy = SenderStrategyFactory.create(self.game.states, self.game.messages,
+                                                               new_sender_values)
+        else:
+            np.copyto(sender_out, new_sender_values)
+            new_sender_strategy = recycled_sender_strategy
+        if recycled_receiver_strategy is None:
+            new_receiver_strategy = ReceiverStrategyFactory.create(self.game.messages, self.game.actions,
+                                                                   new_receiver_values)
+        else:
+            np.copyto(receiver_out, new_receiver_values)
+            new_receiver_strategy = recycled_receiver_strategy
 
-        self.sender_strategies.append(new_sender_strategy)
-        self.receiver_strategies.append(new_receiver_strategy)
+        self.previous_sender_strategy = sender_strategy
+        self.previous_receiver_strategy = receiver_strategy
+        self.sender_strategy = new_sender_strategy
+        self.receiver_strategy = new_receiver_strategy
         self.current_step += 1
+        self.record_history()
+        self.context = StepContext(new_sender_strategy.values, new_receiver_strategy.values, self.game)
 
         self.measurements_collector.calculate_all(self)
 
-    def run_until_converged(self, max_steps=100, plot_steps=False, block_at_end=False):
+    def run_until_converged(self, max_steps=100, plot_steps=False, block_at_end=False, checkpointer=None,
+                            live_view=None):
         if type(max_steps) is not int:
             raise TypeError('Value of max_steps should be int')
 
-        while self.current_step < max_steps and not self.converged():
-            if plot_steps:
-                self.plot()
-            self.step()
+        if getattr(self.dynamics, 'rationality_schedule', None) is not None:
+            self.run_rationality_schedule(max_steps_per_level=max_steps, plot_steps=plot_steps,
+                                          checkpointer=checkpointer, live_view=live_view)
+        else:
+            while self.current_step < max_steps and not self.converged():
+                if plot_steps:
+                    self.plot()
+                self.step()
+                if live_view is not None:
+                    live_view.update(self)
+                if checkpointer is not None:
+                    checkpointer.checkpoint(self)
+        self.measurements_collector.calculate_final(self)
 
         if plot_steps:
             self.plot(block=block_at_end)
 
+    def run_rationality_schedule(self, max_steps_per_level=100, plot_steps=False, checkpointer=None,
+                                 live_view=None):
+        if self.schedule_level is None:
+            self.schedule_level = 0
+            self.level_start_step = None
+            self.rationality_path = []
+        schedule = self.dynamics.rationality_schedule
+        while self.schedule_level < len(schedule):
+            rationality = schedule[self.schedule_level]
+            if self.level_start_step is None:
+                self.dynamics.rationality = rationality
+                if self.accelerator is not None:
+                    self.accelerator.reset()
+                self.level_start_step = self.current_step
+            while self.current_step - self.level_start_step < max_steps_per_level \
+                    and (self.current_step == self.level_start_step or not self.converged()):
+                if plot_steps:
+                    self.plot()
+                self.step()
+                if live_view is not None:
+                    live_view.update(self)
+                if checkpointer is not None:
+                    checkpointer.checkpoint(self)
+            self.rationality_path.append((rationality, self.current_step))
+            self.schedule_level += 1
+            self.level_start_step = None
+
     def plot(self, block=False):
-        n_rows = 2
-        n_cols = (4 if self.game.confusion is not None else 2)
-        states_plot_span = n_cols // 2
-        utility_plot_span = n_cols // 2 // (2 if self.game.confusion is not None else 1)
-        strategy_plot_span = n_cols // 2
-        plot_grid_shape = (n_rows, n_cols)
-
-        plt.figure(0)
-        ax1 = plt.subplot2grid(plot_grid_shape, (0, 0), colspan=states_plot_span)
-        ax1.set_title('Priors')
-        self.game.states.plot(ax1)
-
-        ax2 = plt.subplot2grid(plot_grid_shape, (0, states_plot_span), colspan=utility_plot_span)
-        ax2.set_title('Utility')
-        self.game.utility.plot(ax2)
-        if self.game.confusion is not None:
-            ax4 = plt.subplot2grid(plot_grid_shape, (0, states_plot_span + utility_plot_span),
-                                   colspan=utility_plot_span)
-            ax4.set_title('Confusion')
-            self.game.confusion.plot(ax4)
-
-        ax5 = plt.subplot2grid(plot_grid_shape, (1, 0), colspan=strategy_plot_span)
-        ax5.set_title('Sender strategy')
-        self.get_current_sender_strategy().plot(ax5)
-
-        ax6 = plt.subplot2grid(plot_grid_shape, (1, strategy_plot_span), colspan=strategy_plot_span)
-        ax6.set_title('Receiver strategy')
-        self.get_current_receiver_strategy().plot(ax6)
-
-        if self.measurements_collector.number_of_metrics() > 0:
-            plt.figure(1)
-            self.measurements_collector.plot()
-
-        plt.figure(0)
-        plt.tight_layout(h_pad=0.5, w_pad=0)
-        plt.show(block=block)
-        plt.pause(0.00001)
+        from democritus import rendering
+        rendering.plot_simulation(self, block)
+
+
+class BatchSimulation(object):
+    def __init__(self, game, dynamics, n_replicates, sender_strategies=None, receiver_strategies=None,
+                 random_generators=None):
+        self.game = game
+        self.dynamics = dynamics
+        self.n_replicates = n_replicates
+        self.current_step = 0
+        if sender_strategies is not None:
+            sender_strategies = utils.make_row_stochastic(sender_strategies)
+        if receiver_strategies is not None:
+            receiver_strategies = utils.make_row_stochastic(receiver_strategies)
+        if random_generators is None:
+            random_generators = utils.spawn_random_generators(None, n_replicates)
+        if len(random_generators) != n_replicates:
+            raise ValueError('There should be one random generator per replicate, '
+                             'but there are %s generators for %s replicates.'
+                             % (len(random_generators), n_replicates))
+        if hasattr(dynamics, 'random_generator') and dynamics.random_generator is None:
+            dynamics.random_generator = utils.ReplicateRandomGenerators(random_generators)
+        if sender_strategies is None or receiver_strategies is None:
+            random_strategies = [(SenderStrategyFactory.create_random(game.states, game.messages,
+                                                                      random_generator).values,
+                                  ReceiverStrategyFactory.create_random(game.messages, game.actions,
+                                                                        random_generator).values)
+                                 for random_generator in random_generators]
+            if sender_strategies is None:
+                sender_strategies = np.array([values for values, _ in random_strategies])
+            if receiver_strategies is None:
+                receiver_strategies = np.array([values for _, values in random_strategies])
+        self.sender_strategies = sender_strategies
+        self.receiver_strategies = receiver_strategies
+        expected_sender_shape = (n_replicates, game.number_of_states(), game.number_of_messages())
+        expected_receiver_shape = (n_replicates, game.number_of_messages(), game.number_of_actions())
+        if self.sender_strategies.shape != expected_sender_shape \
+                or self.receiver_strategies.shape != expected_receiver_shape:
+            raise ValueError('Incorrect dimensions for batch strategies. '
+                             'Sender strategies should have dimensions %s and receiver strategies %s, '
+                             'but have dimensions %s and %s.' %
+                             (expected_sender_shape, expected_receiver_shape,
+                              self.sender_strategies.shape, self.receiver_strategies.shape))
+        self.convergence_steps = np.full(n_replicates, -1)
+
+    def get_sender_strategy(self, replicate):
+        return SenderStrategyFactory.create(self.game.states, self.game.messages, self.sender_strategies[replicate])
+
+    def get_receiver_strategy(self, replicate):
+        return ReceiverStrategyFactory.create(self.game.messages, self.game.actions,
+                                              self.receiver_strategies[replicate])
+
+    def converged(self):
+        return self.convergence_steps >= 0
+
+    def step(self):
+        active = np.flatnonzero(~self.converged())
+        if len(active) == 0:
+            return
+        sender_strategies = self.sender_strategies[active]
+        receiver_strategies = self.receiver_strategies[active]
+        random_generator = getattr(self.dynamics, 'random_generator', None)
+        if isinstance(random_generator, utils.ReplicateRandomGenerators):
+            random_generator.select(active)
+
+        new_sender_strategies, new_receiver_strategies = self.dynamics.update_values(sender_strategies,
+                                                                                     receiver_strategies,
+                                                                                     self.game,
+                                                                                     step=self.current_step)
+
+        self.sender_strategies[active] = new_sender_strategies
+        self.receiver_strategies[active] = new_receiver_strategies
+        self.current_step += 1
+
+        newly_converged = strategies_converged(sender_strategies, receiver_strategies,
+                                               new_sender_strategies, new_receiver_strategies)
+        self.convergence_steps[active[newly_converged]] = self.current_step
+
+    def run_until_converged(self, max_steps=100):
+        if type(max_steps) is not int:
+            raise TypeError('Value of max_steps should be int')
+
+        if getattr(self.dynamics, 'rationality_schedule', None) is not None:
+            self.run_rationality_schedule(max_steps_per_level=max_steps)
+        else:
+            while self.current_step < max_steps and not np.all(self.converged()):
+                self.step()
+
+    def run_rationality_schedule(self, max_steps_per_level=100):
+        self.rationality_path = []
+        for rationality in self.dynamics.rationality_schedule:
+            self.dynamics.rationality = rationality
+            self.convergence_steps[:] = -1
+            level_start_step = self.current_step
+            while self.current_step - level_start_step < max_steps_per_level \
+                    and (self.current_step == level_start_step or not np.all(self.converged())):
+                self.step()
+            self.rationality_path.append((rationality, self.current_step))
@@ -0,0 +1,54 @@
+import csv
+import json
+import os
+
+
+def open_output(file_name, append):
+    if append and os.path.isfile(file_name) and os.path.getsize(file_name) > 0:
+        return open(file_name, 'a', 1), True
+    return open(file_name, 'w', 1), False
+
+
+class MetricSink(object):
+    def write(self, metric_name, step, value):
+        raise NotImplementedError('Subclasses of MetricSink must implement \'write\' method')
+
+    def close(self):
+        pass
+
+    def get_state(self):
+        return {}
+
+    def set_state(self, state):
+        pass
+
+
+class FileMetricSink(MetricSink):
+    def get_state(self):
+        self.file.flush()
+        return {'position': self.file.tell()}
+
+    def set_state(self, state):
+        self.file.truncate(int(state['position']))
+
+    def close(self):
+        self.file.close()
+
+
+class CSVMetricSink(FileMetricSink):
+    def __init__(self, file_name, append=False):
+        self.file, appending = open_output(file_name, append)
+        self.writer = csv.writer(self.file, lineterminator='\n')
+        if not appending:
+            self.writer.writerow(['step', 'metric', 'value'])
+
+    def write(self, metric_name, step, value):
+        self.writer.writerow([step, metric_name, repr(float(value))])
+
+
+class JSONLinesMetricSink(FileMetricSink):
+    def __init__(self, file_name, append=False):
+        self.file, appending = open_output(file_name, append)
+
+    def write(self, metric_name, step, value):
+        self.file.write(json.dumps({'step': step, 'metric': metric_name, 'value': float(value)}) + '\n')
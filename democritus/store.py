@@ -0,0 +1,118 @@
+import io
+import os
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pyarrow
+import pyarrow.dataset
+import pyarrow.parquet
+import yaml
+
+from democritus.trajectory import plain_data
+
+strategy_columns = ['sender', 'receiver']
+
+
+def array_bytes(values):
+    output = io.BytesIO()
+    np.save(output, np.asarray(values), allow_pickle=False)
+    return output.getvalue()
+
+
+def bytes_array(value):
+    return np.load(io.BytesIO(value), allow_pickle=False)
+
+
+def run_record(spec, seed, sender_values, receiver_values, steps, converged, metrics, parameters=None, run=None):
+    record = OrderedDict()
+    record['run'] = run
+    record['seed'] = None if seed is None else str(seed)
+    record.update(parameters or {})
+    record['steps'] = int(steps)
+    record['converged'] = bool(converged)
+    for metric_name, measurement in metrics.items():
+        record[metric_name] = float(measurement)
+    record['spec'] = None if spec is None else yaml.safe_dump(plain_data(spec), default_flow_style=False)
+    record['sender'] = array_bytes(sender_values)
+    record['receiver'] = array_bytes(receiver_values)
+    return record
+
+
+def simulation_record(simulation, spec, seed, parameters=None, run=None):
+    metrics = OrderedDict((metric_name, measurement) for metric_name, (step, measurement)
+                          in simulation.measurements_collector.last_measurements.items())
+    return run_record(spec, seed, simulation.get_current_sender_strategy().values,
+                      simulation.get_current_receiver_strategy().values, simulation.current_step,
+                      simulation.converged(), metrics, parameters, run)
+
+
+def batch_records(simulation, spec, seed, metrics):
+    converged = simulation.converged()
+    steps = np.where(converged, simulation.convergence_steps, simulation.current_step)
+    measurements = OrderedDict((metric_name, metric.calculate_values(simulation.sender_strategies,
+                                                                     simulation.receiver_strategies,
+                                                                     simulation.game))
+                               for metric_name, metric in metrics.items())
+    return [run_record(spec, seed, simulation.sender_strategies[replicate], simulation.receiver_strategies[replicate],
+                       steps[replicate], converged[replicate],
+                       OrderedDict((metric_name, values[replicate]) for metric_name, values in measurements.items()),
+                       run=replicate)
+            for replicate in range(simulation.n_replicates)]
+
+
+class ResultStore(object):
+    def __init__(self, directory, name=None, batch_size=100):
+        if batch_size < 1:
+            raise ValueError('Batch size should be positive, but is %s' % batch_size)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.name = uuid.uuid4().hex if name is None else name
+        self.batch_size = batch_size
+        self.records = []
+        self.parts = 0
+
+    def append(self, record):
+        self.records.append(record)
+        if len(self.records) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.records) == 0:
+            return
+        part_name = '%s-%05d.parquet' % (self.name, self.parts)
+        temporary_file_name = os.path.join(self.directory, '.' + part_name + '.tmp')
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(self.records), temporary_file_name)
+        os.replace(temporary_file_name, os.path.join(self.directory, part_name))
+        self.parts += 1
+        self.records = []
+
+    def close(self):
+        self.flush()
+
+
+def open_results(directory):
+    fragments = list(pyarrow.dataset.dataset(directory, format='parquet').get_fragments())
+    if len(fragments) == 0:
+        raise ValueError('There are no results in %s' % directory)
+    schema = pyarrow.unify_schemas([fragment.physical_schema for fragment in fragments], promote_options='permissive')
+    return pyarrow.dataset.dataset(directory, format='parquet', schema=schema)
+
+
+def read_results(directory, where=None, columns=None, strategies=False):
+    dataset = open_results(directory)
+    if columns is None:
+        columns = [column for column in dataset.schema.names if strategies or column not in strategy_columns]
+    expression = None
+    for column, value in (where or {}).items():
+        if column == 'seed':
+            value = [str(seed) for seed in value] if isinstance(value, list) else str(value)
+        condition = pyarrow.dataset.field(column).isin(value) if isinstance(value, list) \
+            else pyarrow.dataset.field(column) == value
+        expression = condition if expression is None else expression & condition
+    results = dataset.to_table(columns=columns, filter=expression).to_pandas()
+    for column in strategy_columns:
+        if column in results.columns:
+            results[column] = [None if value is None else bytes_array(value) for value in results[column]]
+    return results
@@ -0,0 +1,141 @@
+import copy
+import itertools
+import multiprocessing
+from collections import OrderedDict
+
+import numpy as np
+import pandas
+
+from democritus.cache import result_key, stable_hash
+from democritus.converters import SimulationSpecReader
+from democritus.exceptions import InvalidValueInSpecification
+from democritus.specification import Specification
+from democritus.store import run_record
+
+
+def set_spec_value(spec, path, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        if not isinstance(spec.get(key), dict):
+            spec[key] = Specification.empty()
+        spec = spec[key]
+    spec[keys[-1]] = value
+
+
+def apply_overrides(spec, overrides):
+    spec = copy.deepcopy(spec)
+    spec.pop('sweep', None)
+    if 'history' not in spec:
+        spec['history'] = Specification.from_dict({'type': 'none'})
+    for path, value in overrides.items():
+        set_spec_value(spec, path, value)
+    return spec
+
+
+class SweepReader(object):
+    @staticmethod
+    def read(spec):
+        sweep_type = spec.get('type') or 'grid'
+        if sweep_type == 'grid':
+            parameters = spec.get_or_fail('parameters')
+            if not isinstance(parameters, dict) or len(parameters) == 0:
+                raise InvalidValueInSpecification(spec, 'parameters', parameters)
+            for path, values in parameters.items():
+                if not isinstance(values, list) or len(values) == 0:
+                    raise InvalidValueInSpecification(spec, 'parameters', parameters)
+            paths = sorted(parameters.keys())
+            return [OrderedDict(zip(paths, values))
+                    for values in itertools.product(*[parameters[path] for path in paths])]
+        if sweep_type == 'list':
+            runs = spec.get_or_fail('runs')
+            if not isinstance(runs, list) or len(runs) == 0 or not all(isinstance(run, dict) for run in runs):
+                raise InvalidValueInSpecification(spec, 'runs', runs)
+            return [OrderedDict(sorted(run.items())) for run in runs]
+        else:
+            raise InvalidValueInSpecification(spec, 'type', sweep_type)
+
+
+def run_sweep_point(arguments):
+    spec, overrides, max_steps, seed_sequence = arguments
+    simulation = SimulationSpecReader.read(apply_overrides(spec, overrides), keep_measurements=False,
+                                           random_generator=np.random.default_rng(seed_sequence))
+    simulation.run_until_converged(max_steps=max_steps)
+    result = OrderedDict(overrides)
+    result['steps'] = simulation.current_step
+    result['converged'] = simulation.converged()
+    for metric_name, (step, measurement) in simulation.measurements_collector.last_measurements.items():
+        result[metric_name] = float(measurement)
+    return result, simulation.get_current_sender_strategy().values, simulation.get_current_receiver_strategy().values
+
+
+def point_seed_sequence(seed_sequence, overrides, occurrence=0):
+    digest = stable_hash(overrides)
+    spawn_key = tuple(int(digest[start:start + 8], 16) for start in range(0, 32, 8))
+    return np.random.SeedSequence(seed_sequence.entropy, spawn_key=spawn_key + ((occurrence,) if occurrence > 0 else ()))
+
+
+def point_occurrences(points):
+    counts = {}
+    occurrences = []
+    for overrides in points:
+        digest = stable_hash(overrides)
+        occurrences.append(counts.get(digest, 0))
+        counts[digest] = occurrences[-1] + 1
+    return occurrences
+
+
+def store_sweep_point(store, spec, seed, run, overrides, point_result):
+    result, sender_values, receiver_values = point_result
+    metrics = OrderedDict((name, value) for name, value in result.items()
+                          if name not in overrides and name not in ['steps', 'converged'])
+    store.append(run_record(apply_overrides(spec, overrides), seed, sender_values, receiver_values, result['steps'],
+                            result['converged'], metrics, overrides, run))
+
+
+def shard_runs(n_points, shard=None):
+    if shard is None:
+        return list(range(n_points))
+    shard_index, n_shards = shard
+    if n_shards < 1 or not 0 <= shard_index < n_shards:
+        raise ValueError('Shard should be an index between 0 and %s, but is %s' % (n_shards - 1, shard_index))
+    return list(range(shard_index, n_points, n_shards))
+
+
+def run_sweep(spec, max_steps=100, workers=None, seed=None, store=None, cache=None, shard=None):
+    all_points = SweepReader.read(spec.get_or_fail('sweep'))
+    runs = shard_runs(len(all_points), shard)
+    points = [all_points[run] for run in runs]
+    occurrences = point_occurrences(all_points)
+    seed_sequence = np.random.SeedSequence(seed)
+    arguments = [(spec, overrides, max_steps, point_seed_sequence(seed_sequence, overrides, occurrences[run]))
+                 for run, overrides in zip(runs, points)]
+    keys = [None if cache is None else result_key(apply_overrides(spec, overrides), point_arguments[3], max_steps)
+            for overrides, point_arguments in zip(points, arguments)]
+    cached_results = [None if key is None else cache.get(key) for key in keys]
+    missing_arguments = [point_arguments for point_arguments, cached_result in zip(arguments, cached_results)
+                         if cached_result is None]
+    pool = None if workers == 1 or len(missing_arguments) == 0 else multiprocessing.Pool(workers)
+    try:
+        point_results = (run_sweep_point(point_arguments) for point_arguments in missing_arguments) if pool is None \
+            else pool.imap(run_sweep_point, missing_arguments, chunksize=1)
+        results = []
+        for run, overrides, key, point_result in zip(runs, points, keys, cached_results):
+            if point_result is None:
+                point_result = next(point_results)
+                if cache is not None:
+                    cache.put(key, point_result)
+            results.append(point_result[0])
+            if store is not None:
+                store_sweep_point(store, spec, seed_sequence.entropy, run, overrides, point_result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if store is not None:
+        store.flush()
+    return sweep_results_frame(results, all_points)
+
+
+def sweep_results_frame(results, points):
+    parameters = sorted(set(path for overrides in points for path in overrides))
+    return pandas.DataFrame(results, columns=None if len(results) > 0 else parameters).set_index(parameters)
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import yaml
+from scipy import sparse
+
+from democritus.specification import Specification
+
+
+def plain_data(value):
+    if isinstance(value, dict):
+        return {key: plain_data(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain_data(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def dense_values(function):
+    values = getattr(function, 'values', function)
+    return values.toarray() if sparse.issparse(values) else np.asarray(values, dtype=float)
+
+
+class TrajectoryFiles(object):
+    def __init__(self, directory):
+        self.directory = directory
+        self.sender = os.path.join(directory, 'sender.npy')
+        self.receiver = os.path.join(directory, 'receiver.npy')
+        self.steps = os.path.join(directory, 'steps.npy')
+        self.game = os.path.join(directory, 'game.npz')
+        self.metadata = os.path.join(directory, 'metadata.yml')
+
+
+def write_trajectory_metadata(directory, game, spec=None):
+    files = TrajectoryFiles(directory)
+    metadata = {'game type': type(game).__name__,
+                'states': game.number_of_states(),
+                'messages': game.number_of_messages(),
+                'actions': game.number_of_actions(),
+                'spec': None if spec is None else plain_data(spec)}
+    with open(files.metadata, 'w') as metadata_file:
+        yaml.safe_dump(metadata, metadata_file, default_flow_style=False)
+    game_arrays = {'priors': np.asarray(game.states.priors, dtype=float), 'utility': dense_values(game.utility)}
+    if game.confusion is not None:
+        game_arrays['confusion'] = dense_values(game.confusion)
+    np.savez(files.game, **game_arrays)
+
+
+class Trajectory(object):
+    def __init__(self, directory):
+        files = TrajectoryFiles(directory)
+        with open(files.metadata) as metadata_file:
+            self.metadata = yaml.safe_load(metadata_file)
+        self.spec = None if self.metadata['spec'] is None else Specification.from_dict(self.metadata['spec'])
+        self.game_arrays = np.load(files.game)
+        steps = np.load(files.steps)
+        self.steps = steps[:np.count_nonzero(steps >= 0)]
+        self.sender = np.load(files.sender, mmap_mode='r')[:len(self.steps)]
+        self.receiver = np.load(files.receiver, mmap_mode='r')[:len(self.steps)]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def get_sender_values(self, step):
+        return self.sender[self.index(step)]
+
+    def get_receiver_values(self, step):
+        return self.receiver[self.index(step)]
+
+    def index(self, step):
+        index = np.searchsorted(self.steps, step)
+        if index == len(self.steps) or self.steps[index] != step:
+            raise IndexError('Step %s is not in the trajectory' % step)
+        return index
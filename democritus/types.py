@@ -1,7 +1,7 @@
 from builtins import range
 
-import matplotlib.cm as cm
 import numpy as np
+from scipy import sparse
 
 from democritus import utils
 
@@ -34,6 +34,7 @@ class MetricSpace(ElementSet):
     def __init__(self, elements, metric):
         ElementSet.__init__(self, elements)
         self.distances = np.array(metric)
+        self.neighbours = None
         if self.distances.shape[0] != len(self.elements) or self.distances.shape[1] != len(self.elements):
             raise ValueError('Incorrect dimensions of metric. '
                              'Metric should be square matrix of order %s.' % len(self.elements))
@@ -43,6 +44,29 @@ class MetricSpace(ElementSet):
         y_index = self.index(y)
         return self.distances[x_index, y_index]
 
+    def neighbour_structure(self):
+        if self.neighbours is None or self.neighbours.distances is not self.distances:
+            self.neighbours = NeighbourStructure(self.distances)
+        return self.neighbours
+
+
+class NeighbourStructure(object):
+    def __init__(self, distances):
+        self.distances = distances
+        distances = np.asarray(distances, dtype=float)
+        off_diagonal_distances = distances + np.diag(np.full(len(distances), np.inf))
+        nearest_distances = np.min(off_diagonal_distances, axis=1) if len(distances) > 1 else np.zeros(1)
+        self.radius = np.max(nearest_distances)
+        self.adjacency = sparse.csr_matrix(off_diagonal_distances <= self.radius)
+        triples = [np.zeros((3, 0), dtype=int)]
+        for t in range(len(distances)):
+            neighbours = self.adjacency.indices[self.adjacency.indptr[t]:self.adjacency.indptr[t + 1]]
+            first, second = np.triu_indices(len(neighbours), 1)
+            u, v = neighbours[first], neighbours[second]
+            between = distances[u, v] > np.maximum(distances[u, t], distances[t, v])
+            triples.append(np.array([u[between], np.full(np.sum(between), t), v[between]], dtype=int))
+        self.between_triples = np.concatenate(triples, axis=1)
+
 
 class StateSet(ElementSetWithPriors):
     def plot(self, axis):
@@ -95,6 +119,9 @@ class BivariateFunction(object):
     def __len__(self):
         return len(self.values)
 
+    def __array__(self, dtype=None, copy=None):
+        return np.array(self.values, dtype=dtype, copy=copy)
+
     def make_row_stochastic(self):
         self.values = utils.make_row_stochastic(self.values)
 
@@ -102,6 +129,36 @@ class BivariateFunction(object):
         axis.imshow(self.values, origin='upper', interpolation='none')
 
 
+class SparseBivariateFunction(BivariateFunction):
+    def __init__(self, values):
+        self.values = sparse.csr_matrix(values, dtype=float)
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            item = self.values[index]
+            return item.toarray() if sparse.issparse(item) else item
+        return self.values[index].toarray()[0]
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        if copy is False:
+            raise ValueError('A sparse function cannot be converted to a dense array without copying')
+        return self.values.toarray() if dtype is None else self.values.toarray().astype(dtype, copy=False)
+
+    def make_row_stochastic(self):
+        row_sums = np.ravel(self.values.sum(axis=1))
+        zero_rows = row_sums == 0
+        row_sums[zero_rows] = 1
+        uniform_rows = sparse.csr_matrix(zero_rows[:, np.newaxis] / self.values.shape[1]).dot(
+            sparse.csr_matrix(np.ones((1, self.values.shape[1]))))
+        self.values = sparse.csr_matrix(sparse.diags(1 / row_sums).dot(self.values) + uniform_rows)
+
+    def plot(self, axis):
+        axis.imshow(self.values.toarray(), origin='upper', interpolation='none')
+
+
 class BehavioralStrategy(BivariateFunction):
     def __init__(self, choice_points, choices, probabilities):
         BivariateFunction.__init__(self, probabilities)
@@ -133,18 +190,9 @@ class SenderStrategy(BehavioralStrategy):
 
 class WCSMunsellSenderStrategy(SenderStrategy):
     def plot(self, axis):
-        color_map = cm.get_cmap('Set1')
-        probabilities = np.array([[color_map.colors[0] + (0,)] * 41] * 10)
-        for chip_index in range(len(self.states.elements)):
-            chip = self.states.elements[chip_index]
-            wcs_value_index = WCSMunsellPalette.wcs_values.index(chip[WCSMunsellPalette.wcs_value_key])
-            wcs_hue_index = chip[WCSMunsellPalette.wcs_hue_key]
-            message_index = np.argmax(self.values[chip_index])
-            probability = self.values[chip_index, message_index]
-            color = color_map.colors[message_index] + (probability,)
-            probabilities[wcs_value_index, wcs_hue_index] = color
-        axis.imshow(probabilities, origin='upper', interpolation='none')
-        # axis.axis('off')
+        from democritus import rendering
+        axis.imshow(rendering.wcs_strategy_image(self.states.elements, self.values), origin='upper',
+                    interpolation='none')
 
 
 class ReceiverStrategy(BehavioralStrategy):
@@ -164,15 +212,6 @@ class ReceiverStrategy(BehavioralStrategy):
 
 class WCSMunsellReceiverStrategy(ReceiverStrategy):
     def plot(self, axis):
-        color_map = cm.get_cmap('Set1')
-        probabilities = np.array([[color_map.colors[0] + (0,)] * 41] * 10)
-        for chip_index in range(len(self.actions.elements)):
-            chip = self.actions.elements[chip_index]
-            wcs_value_index = WCSMunsellPalette.wcs_values.index(chip[WCSMunsellPalette.wcs_value_key])
-            wcs_hue_index = chip[WCSMunsellPalette.wcs_hue_key]
-            message_index = np.argmax(self.values[:, chip_index])
-            probability = self.values[message_index, chip_index]
-            color = color_map.colors[message_index] + (probability,)
-            probabilities[wcs_value_index, wcs_hue_index] = color
-        axis.imshow(probabilities, origin='upper', interpolation='none')
-        # axis.axis('off')
+        from democritus import rendering
+        axis.imshow(rendering.wcs_strategy_image(self.actions.elements, np.transpose(self.values)), origin='upper',
+                    interpolation='none')
@@ -1,6 +1,7 @@
 from __future__ import division
 
 import numpy as np
+from scipy import sparse
 
 
 def make_stochastic(vector):
@@ -9,8 +10,87 @@ def make_stochastic(vector):
     return vector / np.sum(vector)
 
 
-def make_row_stochastic(matrix):
-    new_matrix = np.array(matrix)
-    for i in range(len(matrix)):
-        new_matrix[i] = make_stochastic(matrix[i])
-    return new_matrix
+def make_row_stochastic(matrix, out=None):
+    if out is not None:
+        row_sums = np.sum(matrix, axis=-1, keepdims=True)
+        zero_rows = row_sums == 0
+        np.divide(matrix, row_sums, out=out, where=~zero_rows)
+        if np.any(zero_rows):
+            out[zero_rows[..., 0]] = 1 / out.shape[-1]
+        return out
+    new_matrix = np.array(matrix, dtype=float)
+    row_sums = np.sum(new_matrix, axis=-1, keepdims=True)
+    zero_rows = row_sums[..., 0] == 0
+    new_matrix[zero_rows] = 1
+    row_sums[zero_rows] = new_matrix.shape[-1]
+    return new_matrix / row_sums
+
+
+def stacked_matmul(matrix, values):
+    values = np.asarray(values)
+    if values.ndim == 2:
+        return np.asarray(matrix.dot(values))
+    stacked_values = np.moveaxis(values, -2, 0)
+    product = np.asarray(matrix.dot(stacked_values.reshape(stacked_values.shape[0], -1)))
+    return np.moveaxis(product.reshape((matrix.shape[0],) + stacked_values.shape[1:]), 0, -2)
+
+
+def matmul(left, right, out=None):
+    if sparse.issparse(left) or np.ndim(left) == 2 < np.ndim(right):
+        product = stacked_matmul(left, right)
+    elif sparse.issparse(right) or np.ndim(right) == 2 < np.ndim(left):
+        product = np.swapaxes(stacked_matmul(right.T, np.swapaxes(left, -1, -2)), -1, -2)
+    else:
+        return np.matmul(left, right, out=out)
+    if out is None:
+        return product
+    np.copyto(out, product)
+    return out
+
+
+class Workspace(object):
+    def __init__(self):
+        self.arrays = {}
+
+    def get(self, name, shape):
+        array = self.arrays.get(name)
+        if array is None or array.shape != shape:
+            array = np.empty(shape)
+            self.arrays[name] = array
+        return array
+
+
+def spawn_random_generators(seed, n_generators):
+    return [np.random.default_rng(seed_sequence) for seed_sequence in np.random.SeedSequence(seed).spawn(n_generators)]
+
+
+def spawned_random_generator(seed, index):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+
+
+def tie_breaking_random_generator(seed, index):
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index, 0)))
+
+
+class ReplicateRandomGenerators(object):
+    def __init__(self, random_generators):
+        self.random_generators = random_generators
+        self.active = np.arange(len(random_generators))
+
+    def select(self, active):
+        self.active = active
+
+    def random(self, shape):
+        if len(shape) == 0 or shape[0] != len(self.active):
+            raise ValueError('Random values should be drawn for %s active replicates, but shape is %s'
+                             % (len(self.active), shape))
+        return np.array([self.random_generators[replicate].random(shape[1:])
+                         for replicate in self.active]).reshape(shape)
+
+
+def prefixed_state(prefix, state):
+    return {prefix + '/' + key: value for key, value in state.items()}
+
+
+def unprefixed_state(prefix, state):
+    return {key[len(prefix) + 1:]: value for key, value in state.items() if key.startswith(prefix + '/')}
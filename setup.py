@@ -1,11 +1,18 @@
 # coding=utf-8
+import os
+import re
+
 from setuptools import setup, find_packages
 
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'democritus', '__init__.py')) as init_file:
+    version = re.search(r"^__version__ = '([^']+)'", init_file.read(), re.MULTILINE).group(1)
+
 setup(name='democritus',
-      version='1.0.0',
+      version=version,
       description='Tools for working with signaling games',
       url='https://github.com/carangorango/democritus',
       author='José Pedro Correia',
       author_email='zepedro.correia@gmail.com',
       license='GPL 2.0',
-      packages=find_packages())
+      packages=find_packages(),
+      python_requires='>=3.8')
@@ -5,7 +5,7 @@ from democritus.converters import StatesFactory, GameFactory, DynamicsFactory
 from democritus.games import SimMaxGame
 from democritus.simulation import Simulation
 from democritus.specification import Specification
-from democritus.types import StateSet, MessageSet, SenderStrategy, ReceiverStrategy, ActionSet
+from democritus.types import StateSet, MessageSet, SenderStrategy, ReceiverStrategy, ActionSet, BivariateFunction
 
 
 @pytest.fixture(name='states')
@@ -40,6 +40,38 @@ def fixture_sim_max_game():
     return SimMaxGame(states, messages, similarity)
 
 
+@pytest.fixture(name='truncated_nosofsky_game')
+def fixture_truncated_nosofsky_game():
+    game_spec = Specification.from_dict({'type': 'sim-max',
+                                         'states': {'type': 'metric space',
+                                                    'elements': {'type': 'numeric range', 'size': 5},
+                                                    'priors': {'type': 'normal'},
+                                                    'metric': {'type': 'euclidean'}},
+                                         'messages': {'elements': {'type': 'numbered labels', 'size': 2}},
+                                         'similarity': {'type': 'nosofsky', 'decay': 1.5,
+                                                        'truncation threshold': 0.1},
+                                         'confusion': {'type': 'nosofsky', 'decay': 0.5,
+                                                       'truncation threshold': 0.01}})
+    return GameFactory.create(game_spec)
+
+
+@pytest.fixture(name='densified_truncated_nosofsky_game')
+def fixture_densified_truncated_nosofsky_game(truncated_nosofsky_game):
+    game = truncated_nosofsky_game
+    return SimMaxGame(game.states, game.messages, BivariateFunction(np.asarray(game.similarity)),
+                      BivariateFunction(np.asarray(game.confusion)))
+
+
+@pytest.fixture(name='line_game')
+def fixture_line_game():
+    line_game_spec = Specification.from_dict({'type': 'sim-max',
+                                              'states': {'type': 'metric space',
+                                                         'elements': {'type': 'numeric range', 'size': 5},
+                                                         'metric': {'type': 'euclidean'}},
+                                              'messages': {'elements': {'type': 'numbered labels', 'size': 2}}})
+    return GameFactory.create(line_game_spec)
+
+
 @pytest.fixture(name='game')
 def fixture_game():
     sim_max_2x2_spec = Specification.from_dict({'type': 'sim-max',
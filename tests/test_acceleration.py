@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from democritus.acceleration import Accelerator, AndersonAcceleration, project_on_simplex
+
+
+class TestAccelerator(object):
+    def test_reset_raises_exception(self):
+        accelerator = Accelerator()
+        with pytest.raises(NotImplementedError):
+            accelerator.reset()
+
+    def test_extrapolate_raises_exception(self):
+        accelerator = Accelerator()
+        with pytest.raises(NotImplementedError):
+            accelerator.extrapolate(None, None)
+
+
+def test_project_on_simplex():
+    values = np.array([[0.5, 0.7, -0.2], [1, 1, 0]])
+    assert project_on_simplex(values).tolist() == [[0.5 / 1.2, 0.7 / 1.2, 0], [0.5, 0.5, 0]]
+
+
+def test_project_on_simplex_non_finite_values():
+    assert project_on_simplex(np.array([[np.nan, 1]])) is None
+
+
+def test_project_on_simplex_non_positive_row():
+    assert project_on_simplex(np.array([[-1, 0], [0.5, 0.5]])) is None
+
+
+class TestAndersonAcceleration(object):
+    def test_constructor_defaults(self):
+        accelerator = AndersonAcceleration()
+        assert accelerator.depth == 5
+        assert accelerator.residuals_history == []
+
+    def test_constructor_invalid_depth_raises_exception(self):
+        with pytest.raises(ValueError):
+            AndersonAcceleration(depth=0)
+
+    def test_extrapolate_solves_linear_fixed_point(self):
+        # g(x) = A x + b is a contraction whose fixed point plain iteration approaches slowly
+        matrix = np.array([[0.9, 0.05], [0.02, 0.95]])
+        offset = np.array([0.1, 0.2])
+        fixed_point = np.linalg.solve(np.eye(2) - matrix, offset)
+        accelerator = AndersonAcceleration(depth=2)
+        values = np.zeros(2)
+        for _ in range(4):
+            extrapolated_values = accelerator.extrapolate(values, np.dot(matrix, values) + offset)
+            values = np.dot(matrix, values) + offset if extrapolated_values is None else extrapolated_values
+        assert np.allclose(values, fixed_point)
+
+    def test_extrapolate_without_history_returns_none(self):
+        accelerator = AndersonAcceleration()
+        assert accelerator.extrapolate(np.zeros(2), np.ones(2)) is None
+        assert len(accelerator.residuals_history) == 1
+
+    def test_extrapolate_restarts_when_residual_grows(self):
+        accelerator = AndersonAcceleration()
+        accelerator.extrapolate(np.zeros(2), np.full(2, 0.1))
+        accelerator.extrapolate(np.zeros(2), np.full(2, 0.05))
+        assert len(accelerator.residuals_history) == 2
+        assert accelerator.extrapolate(np.zeros(2), np.ones(2)) is None
+        assert len(accelerator.residuals_history) == 1
+
+    def test_accelerate_keeps_strategies_on_simplex(self):
+        accelerator = AndersonAcceleration()
+        sender_values = np.array([[0.5, 0.5], [0.5, 0.5]])
+        receiver_values = np.array([[0.5, 0.5], [0.5, 0.5]])
+        accelerator.accelerate(sender_values, receiver_values,
+                               np.array([[0.6, 0.4], [0.3, 0.7]]), np.array([[0.5, 0.5], [0.5, 0.5]]))
+        new_sender_values, new_receiver_values = accelerator.accelerate(
+            np.array([[0.6, 0.4], [0.3, 0.7]]), np.array([[0.5, 0.5], [0.5, 0.5]]),
+            np.array([[0.65, 0.35], [0.2, 0.8]]), np.array([[0.6, 0.4], [0.4, 0.6]]))
+        assert new_sender_values.shape == (2, 2)
+        assert new_receiver_values.shape == (2, 2)
+        assert np.all(new_sender_values >= 0)
+        assert np.all(new_receiver_values >= 0)
+        assert np.allclose(np.sum(new_sender_values, axis=-1), 1)
+        assert np.allclose(np.sum(new_receiver_values, axis=-1), 1)
+
+    def test_accelerate_without_history_returns_mapped_values(self):
+        accelerator = AndersonAcceleration()
+        new_sender_values = np.array([[0.6, 0.4]])
+        new_receiver_values = np.array([[0.3, 0.7]])
+        result = accelerator.accelerate(np.array([[0.5, 0.5]]), np.array([[0.5, 0.5]]),
+                                        new_sender_values, new_receiver_values)
+        assert result[0] is new_sender_values
+        assert result[1] is new_receiver_values
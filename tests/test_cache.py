@@ -0,0 +1,71 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from democritus.cache import ResultCache, result_key, stable_hash
+from democritus.specification import Specification
+
+
+def create_value(steps):
+    return OrderedDict([('steps', steps), ('converged', True)]), np.eye(3, 2), np.eye(2, 3)
+
+
+def test_stable_hash_ignores_key_order():
+    spec = Specification.from_dict({'b': {'c': [1, 2]}, 'a': 1})
+    assert stable_hash({'a': 1, 'b': {'c': [1, 2]}}) == stable_hash(spec)
+    assert stable_hash({'a': 1}) != stable_hash({'a': 2})
+
+
+def test_result_key_depends_on_seed_and_max_steps():
+    spec = {'dynamics': {'type': 'replicator'}}
+    key = result_key(spec, np.random.SeedSequence(1), 10)
+    assert key == result_key(spec, np.random.SeedSequence(1), 10)
+    assert key != result_key(spec, np.random.SeedSequence(2), 10)
+    assert key != result_key(spec, np.random.SeedSequence(1, spawn_key=(3,)), 10)
+    assert key != result_key(spec, np.random.SeedSequence(1), 20)
+
+
+class TestResultCache(object):
+    def test_get_and_put(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        assert cache.get('abc') is None
+        cache.put('abc', create_value(4))
+        result, sender_values, receiver_values = ResultCache(str(tmpdir)).get('abc')
+        assert result == OrderedDict([('steps', 4), ('converged', True)])
+        assert np.array_equal(sender_values, np.eye(3, 2))
+        assert np.array_equal(receiver_values, np.eye(2, 3))
+
+    def test_evicts_least_recently_used_entries(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        cache.put('aa', create_value(1))
+        entry_size = cache.size
+        cache = ResultCache(str(tmpdir), max_size=2 * entry_size)
+        cache.put('bb', create_value(2))
+        os.utime(cache.entry_file_name('aa'), (0, 0))
+        os.utime(cache.entry_file_name('bb'), (1, 1))
+        cache.get('aa')
+        cache.put('cc', create_value(3))
+        assert cache.get('bb') is None
+        assert cache.get('aa') is not None
+        assert cache.get('cc') is not None
+        assert cache.size == 2 * entry_size
+
+    def test_other_versions_are_invalidated(self, tmpdir):
+        ResultCache(str(tmpdir), version='0.9').put('abc', create_value(1))
+        tmpdir.mkdir('unrelated')
+        cache = ResultCache(str(tmpdir), version='1.0')
+        assert cache.get('abc') is None
+        assert sorted(os.listdir(str(tmpdir))) == ['1.0', 'unrelated']
+
+    def test_clear(self, tmpdir):
+        cache = ResultCache(str(tmpdir))
+        cache.put('abc', create_value(1))
+        cache.clear()
+        assert cache.get('abc') is None
+        assert cache.size == 0
+
+    def test_non_positive_max_size_raises_exception(self, tmpdir):
+        with pytest.raises(ValueError):
+            ResultCache(str(tmpdir), max_size=0)
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from democritus.acceleration import AndersonAcceleration
+from democritus.checkpoint import Checkpointer, save_checkpoint, load_checkpoint
+from democritus.dynamics import BestResponseDynamics, QuantalResponseDynamics, ReplicatorDynamics
+from democritus.simulation import Simulation
+
+
+def create_simulation(game, dynamics=None, accelerator=None, random_generator=None):
+    metrics = ['expected utility', {'name': 'sender entropy', 'sampling': 'log-spaced'}]
+    return Simulation(game, dynamics or ReplicatorDynamics(), metrics, accelerator=accelerator,
+                      random_generator=random_generator)
+
+
+class StepCheckpointer(object):
+    def __init__(self, file_name, step):
+        self.file_name = file_name
+        self.step = step
+
+    def checkpoint(self, simulation, force=False):
+        if simulation.current_step == self.step:
+            save_checkpoint(simulation, self.file_name)
+            return True
+        return False
+
+
+class TestCheckpoint(object):
+    @pytest.mark.parametrize('create_dynamics, accelerator', [
+        (ReplicatorDynamics, AndersonAcceleration(3)),
+        (lambda: BestResponseDynamics(tie_tolerance=1, tie_breaking='random'), None)])
+    def test_resume_is_bit_identical(self, sim_max_game, create_dynamics, accelerator, tmpdir):
+        file_name = str(tmpdir.join('checkpoint.npz'))
+        simulation = create_simulation(sim_max_game, create_dynamics(), accelerator, np.random.default_rng(3))
+        for _ in range(4):
+            simulation.step()
+        save_checkpoint(simulation, file_name)
+        for _ in range(5):
+            simulation.step()
+
+        resumed_accelerator = None if accelerator is None else AndersonAcceleration(3)
+        resumed_simulation = create_simulation(sim_max_game, create_dynamics(), resumed_accelerator,
+                                               np.random.default_rng(4))
+        load_checkpoint(resumed_simulation, file_name)
+        assert resumed_simulation.current_step == 4
+        for _ in range(5):
+            resumed_simulation.step()
+
+        assert np.array_equal(resumed_simulation.get_current_sender_strategy().values,
+                              simulation.get_current_sender_strategy().values)
+        assert np.array_equal(resumed_simulation.get_current_receiver_strategy().values,
+                              simulation.get_current_receiver_strategy().values)
+        assert resumed_simulation.converged() == simulation.converged()
+        for metric_name in ['expected utility', 'sender entropy']:
+            collector = simulation.measurements_collector
+            resumed_collector = resumed_simulation.measurements_collector
+            assert resumed_collector.get_measurement_steps(metric_name) == collector.get_measurement_steps(metric_name)
+            assert resumed_collector.get_measurements(metric_name) == collector.get_measurements(metric_name)
+
+    def test_resume_rationality_schedule_mid_level(self, sim_max_game, tmpdir):
+        file_name = str(tmpdir.join('checkpoint.npz'))
+        simulation = create_simulation(sim_max_game, QuantalResponseDynamics(1, [1, 5, 20]),
+                                       random_generator=np.random.default_rng(3))
+        simulation.run_until_converged(max_steps=50)
+        first_level_end_step = simulation.rationality_path[0][1]
+        assert simulation.rationality_path[1][1] > first_level_end_step + 1
+
+        interrupted_simulation = create_simulation(sim_max_game, QuantalResponseDynamics(1, [1, 5, 20]),
+                                                   random_generator=np.random.default_rng(3))
+        interrupted_simulation.run_until_converged(max_steps=50,
+                                                   checkpointer=StepCheckpointer(file_name, first_level_end_step + 1))
+        resumed_simulation = create_simulation(sim_max_game, QuantalResponseDynamics(1, [1, 5, 20]),
+                                               random_generator=np.random.default_rng(4))
+        load_checkpoint(resumed_simulation, file_name)
+        assert resumed_simulation.dynamics.rationality == 5
+        resumed_simulation.run_until_converged(max_steps=50)
+
+        assert resumed_simulation.rationality_path == simulation.rationality_path
+        assert resumed_simulation.current_step == simulation.current_step
+        assert np.array_equal(resumed_simulation.get_current_sender_strategy().values,
+                              simulation.get_current_sender_strategy().values)
+
+    def test_save_replaces_checkpoint_atomically(self, sim_max_game, tmpdir):
+        file_name = str(tmpdir.join('checkpoint.npz'))
+        simulation = create_simulation(sim_max_game)
+        save_checkpoint(simulation, file_name)
+        simulation.step()
+        save_checkpoint(simulation, file_name)
+        assert os.listdir(str(tmpdir)) == ['checkpoint.npz']
+        with np.load(file_name) as checkpoint:
+            assert int(checkpoint['step']) == 1
+
+    def test_checkpointer_respects_interval(self, sim_max_game, tmpdir):
+        simulation = create_simulation(sim_max_game)
+        checkpointer = Checkpointer(str(tmpdir.join('checkpoint.npz')), interval=3600)
+        assert not checkpointer.checkpoint(simulation)
+        assert checkpointer.checkpoint(simulation, force=True)
+        assert Checkpointer(str(tmpdir.join('other.npz')), interval=0).checkpoint(simulation)
+
+    def test_negative_interval_raises_exception(self, tmpdir):
+        with pytest.raises(ValueError):
+            Checkpointer(str(tmpdir.join('checkpoint.npz')), interval=-1)
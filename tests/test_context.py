@@ -0,0 +1,55 @@
+import numpy as np
+
+from democritus.context import StepContext
+from democritus.dynamics import ReplicatorDynamics, receiver_expected_utility, sender_expected_utility
+
+
+class TestStepContext(object):
+    def test_expected_utility_is_computed_once(self, sim_max_game):
+        sender_values = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_values = np.array([[0.2, 0.8], [0.9, 0.1]])
+        context = StepContext(sender_values, receiver_values, sim_max_game)
+        sender_eu = context.sender_expected_utility()
+        receiver_eu = context.receiver_expected_utility()
+        assert context.sender_expected_utility() is sender_eu
+        assert context.receiver_expected_utility() is receiver_eu
+        assert np.allclose(sender_eu, sender_expected_utility(receiver_values, sim_max_game))
+        assert np.allclose(receiver_eu, receiver_expected_utility(sender_values, sim_max_game))
+
+    def test_expected_utility_into_output_buffer(self, sim_max_game):
+        context = StepContext(np.array([[0.3, 0.7], [0.4, 0.6]]), np.array([[0.2, 0.8], [0.9, 0.1]]), sim_max_game)
+        out = np.empty((2, 2))
+        assert context.sender_expected_utility(out=out) is out
+        assert context.sender_expected_utility() is out
+
+    def test_dynamics_fill_context(self, sim_max_game):
+        sender_values = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_values = np.array([[0.2, 0.8], [0.9, 0.1]])
+        context = StepContext(sender_values, receiver_values, sim_max_game)
+        dynamics = ReplicatorDynamics()
+        new_values = dynamics.update_values(sender_values, receiver_values, sim_max_game, context=context)
+        assert 'sender expected utility' in context.quantities
+        assert 'receiver expected utility' in context.quantities
+        assert np.allclose(new_values, ReplicatorDynamics().update_values(sender_values, receiver_values,
+                                                                          sim_max_game))
+
+    def test_dynamics_reuse_context(self, sim_max_game):
+        sender_values = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_values = np.array([[0.2, 0.8], [0.9, 0.1]])
+        context = StepContext(sender_values, receiver_values, sim_max_game)
+        context.quantities['sender expected utility'] = np.array([[1.0, 0.0], [0.0, 1.0]])
+        dynamics = ReplicatorDynamics()
+        new_sender_values = dynamics.update_sender_values(sender_values, receiver_values, sim_max_game,
+                                                          context=context)
+        assert np.allclose(new_sender_values, [[1, 0], [0, 1]])
+
+    def test_sequential_update_ignores_stale_context(self, sim_max_game):
+        sender_values = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_values = np.array([[0.2, 0.8], [0.9, 0.1]])
+        context = StepContext(sender_values, receiver_values, sim_max_game)
+        dynamics = ReplicatorDynamics('sender first')
+        new_values = dynamics.update_values(sender_values, receiver_values, sim_max_game, context=context)
+        assert 'receiver expected utility' not in context.quantities
+        assert np.allclose(new_values, ReplicatorDynamics('sender first').update_values(sender_values,
+                                                                                        receiver_values,
+                                                                                        sim_max_game))
@@ -3,16 +3,20 @@ from __future__ import division
 import numpy as np
 import pytest
 
-from democritus.converters import DynamicsFactory, ElementsFactory, BivariateFunctionReader, StatesFactory, \
-    GameFactory, MetricFactory, PriorsFactory, SimulationSpecReader, ElementSetFactory, MessageSetFactory, \
-    ActionSetFactory
-from democritus.dynamics import ReplicatorDynamics, BestResponseDynamics, QuantalResponseDynamics
+from democritus.acceleration import AndersonAcceleration
+from democritus.converters import AccelerationFactory, DynamicsFactory, ElementsFactory, BivariateFunctionReader, \
+    StatesFactory, GameFactory, MetricFactory, PriorsFactory, SimulationSpecReader, ElementSetFactory, \
+    MessageSetFactory, ActionSetFactory, HistoryPolicyReader
+from democritus.dynamics import ReplicatorDynamics, BestResponseDynamics, QuantalResponseDynamics, \
+    ContinuousReplicatorDynamics
 from democritus.exceptions import InvalidValueInSpecification, MissingFieldInSpecification, \
     IncompatibilityInSpecification, SpecificationError
 from democritus.games import SimMaxGame, Game
 from democritus.metrics import ExpectedUtilityMetric
+from democritus.simulation import BatchSimulation
 from democritus.specification import Specification
-from democritus.types import StateSet, StateMetricSpace, ElementSet, MessageSet, ActionSet, WCSMunsellPalette
+from democritus.types import StateSet, StateMetricSpace, ElementSet, MessageSet, ActionSet, WCSMunsellPalette, \
+    SparseBivariateFunction
 
 
 class TestElementsFactory(object):
@@ -441,6 +445,19 @@ class TestBivariateFunctionReader(object):
         assert np.round(func[1], decimals=3).tolist() == [0.779, 1, 0.779]
         assert np.round(func[2], decimals=3).tolist() == [0.368, 0.779, 1]
 
+    def test_create_nosofsky_with_truncation_threshold(self, states):
+        func_spec = Specification.from_dict({'type': 'nosofsky', 'decay': 2, 'truncation threshold': 0.5})
+        func = BivariateFunctionReader.create(func_spec, states)
+        assert type(func) is SparseBivariateFunction
+        assert np.round(func[0], decimals=3).tolist() == [1, 0.779, 0]
+        assert np.round(func[2], decimals=3).tolist() == [0, 0.779, 1]
+
+    @pytest.mark.parametrize('truncation_threshold', [0, -0.1, 1.5, 'high'])
+    def test_invalid_truncation_threshold_raises_exception(self, states, truncation_threshold):
+        func_spec = Specification.from_dict({'type': 'nosofsky', 'truncation threshold': truncation_threshold})
+        with pytest.raises(InvalidValueInSpecification):
+            BivariateFunctionReader.create(func_spec, states)
+
     def test_create_from_file(self, tmpdir, states):
         func_file_content = '''
             0.0,  0.4,  0.6
@@ -573,6 +590,25 @@ class TestDynamicsFactory(object):
         dynamics_spec = Specification.from_dict({'type': 'quantal response', 'rationality': 10})
         assert type(DynamicsFactory.create(dynamics_spec)) is QuantalResponseDynamics
 
+    def test_continuous_replicator(self):
+        dynamics_spec = Specification.from_dict({'type': 'continuous replicator', 'time step': 10,
+                                                 'stationarity tolerance': 0.001, 'method': 'LSODA'})
+        dynamics = DynamicsFactory.create(dynamics_spec)
+        assert type(dynamics) is ContinuousReplicatorDynamics
+        assert dynamics.time_step == 10
+        assert dynamics.stationarity_tolerance == 0.001
+        assert dynamics.method == 'LSODA'
+
+    def test_continuous_replicator_defaults(self):
+        dynamics = DynamicsFactory.create(Specification.from_dict({'type': 'continuous replicator'}))
+        assert dynamics.time_step == 1.0
+        assert dynamics.method == 'RK45'
+
+    def test_continuous_replicator_non_positive_time_step_raises_exception(self):
+        dynamics_spec = Specification.from_dict({'type': 'continuous replicator', 'time step': 0})
+        with pytest.raises(InvalidValueInSpecification):
+            DynamicsFactory.create(dynamics_spec)
+
     def test_missing_type_defaults_to_replicator(self):
         dynamics_spec = Specification.empty()
         dynamics = DynamicsFactory.create(dynamics_spec)
@@ -583,12 +619,107 @@ class TestDynamicsFactory(object):
         with pytest.raises(InvalidValueInSpecification):
             DynamicsFactory.create(dynamics_spec)
 
+    def test_update_schedule(self):
+        dynamics_spec = Specification.from_dict({'type': 'quantal response', 'rationality': 10,
+                                                 'update schedule': 'receiver first'})
+        dynamics = DynamicsFactory.create(dynamics_spec)
+        assert dynamics.update_schedule == 'receiver first'
+
+    def test_missing_update_schedule_defaults_to_simultaneous(self):
+        dynamics_spec = Specification.from_dict({'type': 'best response'})
+        assert DynamicsFactory.create(dynamics_spec).update_schedule == 'simultaneous'
+
+    def test_unknown_update_schedule_raises_exception(self):
+        dynamics_spec = Specification.from_dict({'type': 'replicator', 'update schedule': '???????'})
+        with pytest.raises(InvalidValueInSpecification):
+            DynamicsFactory.create(dynamics_spec)
+
+    def test_continuous_replicator_sequential_update_schedule_raises_exception(self):
+        dynamics_spec = Specification.from_dict({'type': 'continuous replicator', 'update schedule': 'sender first'})
+        with pytest.raises(InvalidValueInSpecification):
+            DynamicsFactory.create(dynamics_spec)
+
+    def test_best_response_tie_breaking(self):
+        dynamics_spec = Specification.from_dict({'type': 'best response', 'tie tolerance': 0.001,
+                                                 'tie breaking': 'lowest index'})
+        dynamics = DynamicsFactory.create(dynamics_spec)
+        assert dynamics.tie_tolerance == 0.001
+        assert dynamics.tie_breaking == 'lowest index'
+
+    def test_best_response_unknown_tie_breaking_raises_exception(self):
+        dynamics_spec = Specification.from_dict({'type': 'best response', 'tie breaking': '???????'})
+        with pytest.raises(InvalidValueInSpecification):
+            DynamicsFactory.create(dynamics_spec)
+
+    def test_best_response_negative_tie_tolerance_raises_exception(self):
+        dynamics_spec = Specification.from_dict({'type': 'best response', 'tie tolerance': -1})
+        with pytest.raises(InvalidValueInSpecification):
+            DynamicsFactory.create(dynamics_spec)
+
+    def test_quantal_response_rationality_schedule(self):
+        dynamics_spec = Specification.from_dict({'type': 'quantal response', 'rationality schedule': [1, 5, 10]})
+        dynamics = DynamicsFactory.create(dynamics_spec)
+        assert type(dynamics) is QuantalResponseDynamics
+        assert dynamics.rationality == 1
+        assert dynamics.rationality_schedule == [1, 5, 10]
+
+    def test_quantal_response_decreasing_rationality_schedule_raises_exception(self):
+        dynamics_spec = Specification.from_dict({'type': 'quantal response', 'rationality schedule': [10, 5]})
+        with pytest.raises(InvalidValueInSpecification):
+            DynamicsFactory.create(dynamics_spec)
+
     def test_quantal_response_missing_rationality_raises_exception(self):
         dynamics_spec = Specification.from_dict({'type': 'quantal response'})
         with pytest.raises(MissingFieldInSpecification):
             DynamicsFactory.create(dynamics_spec)
 
 
+class TestAccelerationFactory(object):
+    def test_missing_type_defaults_to_anderson(self):
+        accelerator = AccelerationFactory.create(Specification.empty())
+        assert type(accelerator) is AndersonAcceleration
+        assert accelerator.depth == 5
+
+    def test_anderson_depth(self):
+        accelerator = AccelerationFactory.create(Specification.from_dict({'type': 'anderson', 'depth': 3}))
+        assert accelerator.depth == 3
+
+    def test_anderson_invalid_depth_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            AccelerationFactory.create(Specification.from_dict({'type': 'anderson', 'depth': 0}))
+
+    def test_none(self):
+        assert AccelerationFactory.create(Specification.from_dict({'type': 'none'})) is None
+
+    def test_unknown_type_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            AccelerationFactory.create(Specification.from_dict({'type': '???????'}))
+
+
+class TestHistoryPolicyReader(object):
+    def test_missing_type_defaults_to_all(self):
+        assert HistoryPolicyReader.read(Specification.empty()) == ('all', None, None)
+
+    def test_last(self):
+        assert HistoryPolicyReader.read(Specification.from_dict({'type': 'last', 'size': 3})) == ('last', 3, None)
+
+    def test_every(self):
+        assert HistoryPolicyReader.read(Specification.from_dict({'type': 'every', 'interval': 10})) == \
+            ('every', None, 10)
+
+    def test_last_without_size_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            HistoryPolicyReader.read(Specification.from_dict({'type': 'last'}))
+
+    def test_every_invalid_interval_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            HistoryPolicyReader.read(Specification.from_dict({'type': 'every', 'interval': 0}))
+
+    def test_unknown_type_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            HistoryPolicyReader.read(Specification.from_dict({'type': '???????'}))
+
+
 class TestSimulationSpecReader(object):
     def test_read_from_file_sim_max_3_5_with_metrics(self, tmpdir):
         simulation_spec_yml = '''
@@ -654,3 +785,63 @@ class TestSimulationSpecReader(object):
         assert type(simulation.game) is SimMaxGame
         assert type(simulation.dynamics) is ReplicatorDynamics
         assert simulation.measurements_collector.number_of_metrics() == 0
+
+    def test_read_batch(self):
+        simulation_spec = Specification.from_dict({
+            'game': {'type': 'sim-max',
+                     'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 5}}},
+            'dynamics': {'type': 'replicator'}})
+        simulation = SimulationSpecReader.read_batch(simulation_spec, 10)
+        assert type(simulation) is BatchSimulation
+        assert type(simulation.dynamics) is ReplicatorDynamics
+        assert simulation.sender_strategies.shape == (10, 3, 5)
+        assert simulation.receiver_strategies.shape == (10, 5, 3)
+
+    def test_read_batch_with_acceleration_raises_exception(self):
+        simulation_spec = Specification.from_dict({
+            'game': {'type': 'sim-max',
+                     'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 5}}},
+            'dynamics': {'type': 'replicator', 'acceleration': {'type': 'anderson', 'depth': 2}}})
+        with pytest.raises(InvalidValueInSpecification):
+            SimulationSpecReader.read_batch(simulation_spec, 10)
+
+    def test_read_batch_without_acceleration(self):
+        simulation_spec = Specification.from_dict({
+            'game': {'type': 'sim-max',
+                     'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 5}}},
+            'dynamics': {'type': 'replicator', 'acceleration': {'type': 'none'}}})
+        simulation = SimulationSpecReader.read_batch(simulation_spec, 10)
+        assert type(simulation) is BatchSimulation
+
+    def test_read_dynamics_with_acceleration(self):
+        simulation_spec = Specification.from_dict({
+            'game': {'type': 'sim-max',
+                     'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 5}}},
+            'dynamics': {'type': 'replicator', 'acceleration': {'type': 'anderson', 'depth': 2}}})
+        simulation = SimulationSpecReader.read(simulation_spec)
+        assert type(simulation.accelerator) is AndersonAcceleration
+        assert simulation.accelerator.depth == 2
+
+    def test_read_missing_acceleration_defaults_to_none(self):
+        simulation_spec = Specification.from_dict({
+            'game': {'type': 'sim-max',
+                     'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 5}}},
+            'dynamics': {'type': 'replicator'}})
+        simulation = SimulationSpecReader.read(simulation_spec)
+        assert simulation.accelerator is None
+
+    def test_read_history_policy(self):
+        simulation_spec = Specification.from_dict({
+            'game': {'type': 'sim-max',
+                     'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 5}}},
+            'dynamics': {'type': 'replicator'},
+            'history': {'type': 'last', 'size': 4}})
+        simulation = SimulationSpecReader.read(simulation_spec)
+        assert simulation.sender_history.policy == 'last'
+        assert simulation.sender_history.size == 4
@@ -1,7 +1,44 @@
 import numpy as np
 import pytest
 
-from democritus.dynamics import Dynamics, ReplicatorDynamics, BestResponseDynamics, QuantalResponseDynamics
+from democritus.dynamics import Dynamics, ReplicatorDynamics, BestResponseDynamics, QuantalResponseDynamics, \
+    ContinuousReplicatorDynamics, sender_expected_utility, receiver_expected_utility
+
+
+def test_sender_expected_utility(sim_max_game):
+    receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+    expected_utility = sender_expected_utility(receiver_strategy, sim_max_game)
+    assert np.round(expected_utility, decimals=3).tolist() == [[0.8, 1.85], [0.82, 0.19]]
+
+
+def test_receiver_expected_utility(sim_max_game):
+    sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+    expected_utility = receiver_expected_utility(sender_strategy, sim_max_game)
+    assert np.round(expected_utility, decimals=3).tolist() == [[0.44, 0.178], [0.96, 0.282]]
+
+
+def test_expected_utility_of_stacked_strategies(sim_max_game):
+    sender_strategies = np.array([[[0.3, 0.7], [0.4, 0.6]], [[1, 0], [0, 1]]])
+    receiver_strategies = np.array([[[0.2, 0.8], [0.9, 0.1]], [[1, 0], [0, 1]]])
+    sender_eu = sender_expected_utility(receiver_strategies, sim_max_game)
+    receiver_eu = receiver_expected_utility(sender_strategies, sim_max_game)
+    assert sender_eu.shape == (2, 2, 2)
+    assert receiver_eu.shape == (2, 2, 2)
+    assert np.allclose(sender_eu[0], sender_expected_utility(receiver_strategies[0], sim_max_game))
+    assert np.allclose(receiver_eu[1], receiver_expected_utility(sender_strategies[1], sim_max_game))
+
+
+@pytest.mark.parametrize('dynamics', [ReplicatorDynamics(), ContinuousReplicatorDynamics(), BestResponseDynamics(),
+                                      QuantalResponseDynamics(10)])
+def test_sparse_game_matches_dense_game(dynamics, truncated_nosofsky_game, densified_truncated_nosofsky_game):
+    sender_values = np.random.random((5, 2))
+    receiver_values = np.random.random((2, 5))
+    new_sender_values, new_receiver_values = dynamics.update_values(sender_values, receiver_values,
+                                                                    truncated_nosofsky_game)
+    dense_sender_values, dense_receiver_values = dynamics.update_values(sender_values, receiver_values,
+                                                                        densified_truncated_nosofsky_game)
+    assert np.allclose(new_sender_values, dense_sender_values)
+    assert np.allclose(new_receiver_values, dense_receiver_values)
 
 
 class TestDynamics(object):
@@ -15,6 +52,51 @@ class TestDynamics(object):
         with pytest.raises(NotImplementedError):
             dynamics.update_receiver(None, None, None)
 
+    def test_unknown_update_schedule_raises_exception(self):
+        with pytest.raises(ValueError):
+            Dynamics('??????')
+
+    def test_update_order(self):
+        assert Dynamics().update_order(1) == 'simultaneous'
+        assert Dynamics('receiver first').update_order(0) == 'receiver first'
+        assert [Dynamics('alternating').update_order(step) for step in range(3)] == \
+            ['sender first', 'receiver first', 'sender first']
+
+    def test_update_values_sender_first(self, sim_max_game):
+        dynamics = ReplicatorDynamics('sender first')
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        new_sender_strategy, new_receiver_strategy = dynamics.update_values(sender_strategy, receiver_strategy,
+                                                                            sim_max_game)
+        assert np.allclose(new_sender_strategy,
+                           dynamics.update_sender_values(sender_strategy, receiver_strategy, sim_max_game))
+        assert np.allclose(new_receiver_strategy,
+                           dynamics.update_receiver_values(new_sender_strategy, receiver_strategy, sim_max_game))
+
+    def test_update_values_receiver_first(self, sim_max_game):
+        dynamics = ReplicatorDynamics('receiver first')
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        new_sender_strategy, new_receiver_strategy = dynamics.update_values(sender_strategy, receiver_strategy,
+                                                                            sim_max_game)
+        assert np.allclose(new_receiver_strategy,
+                           dynamics.update_receiver_values(sender_strategy, receiver_strategy, sim_max_game))
+        assert np.allclose(new_sender_strategy,
+                           dynamics.update_sender_values(sender_strategy, new_receiver_strategy, sim_max_game))
+
+    def test_update_values_alternating(self, sim_max_game):
+        dynamics = BestResponseDynamics(update_schedule='alternating')
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        even_step_values = dynamics.update_values(sender_strategy, receiver_strategy, sim_max_game, step=2)
+        odd_step_values = dynamics.update_values(sender_strategy, receiver_strategy, sim_max_game, step=3)
+        sender_first_values = BestResponseDynamics(update_schedule='sender first').update_values(
+            sender_strategy, receiver_strategy, sim_max_game)
+        receiver_first_values = BestResponseDynamics(update_schedule='receiver first').update_values(
+            sender_strategy, receiver_strategy, sim_max_game)
+        assert np.allclose(even_step_values, sender_first_values)
+        assert np.allclose(odd_step_values, receiver_first_values)
+
 
 class TestReplicatorDynamics(object):
     def test_update_sender(self, sim_max_game):
@@ -52,6 +134,67 @@ class TestReplicatorDynamics(object):
         assert np.round(new_receiver_strategy, decimals=3).tolist() == [[0.620, 0.380], [0.938, 0.062]]
 
 
+    def test_update_values_into_output_buffers(self, sim_max_game):
+        game = sim_max_game
+        game.confusion = game.similarity
+        dynamics = ReplicatorDynamics()
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        sender_out = np.empty((2, 2))
+        receiver_out = np.empty((2, 2))
+        new_sender_strategy, new_receiver_strategy = dynamics.update_values(sender_strategy, receiver_strategy, game,
+                                                                            sender_out, receiver_out)
+        assert new_sender_strategy is sender_out
+        assert new_receiver_strategy is receiver_out
+        assert np.round(sender_out, decimals=3).tolist() == [[0.273, 0.727], [0.689, 0.311]]
+        assert np.round(receiver_out, decimals=3).tolist() == [[0.620, 0.380], [0.938, 0.062]]
+
+
+class TestContinuousReplicatorDynamics(object):
+    def test_constructor_non_positive_time_step_raises_exception(self):
+        with pytest.raises(ValueError):
+            ContinuousReplicatorDynamics(time_step=0)
+
+    def test_vector_field_is_replicator_step(self, sim_max_game):
+        game = sim_max_game
+        dynamics = ContinuousReplicatorDynamics()
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        sender_derivative, receiver_derivative = dynamics.vector_field(sender_strategy, receiver_strategy, game)
+        assert np.round(sender_derivative, decimals=3).tolist() == [[-0.144, 0.144], [0.342, -0.342]]
+        assert np.round(receiver_derivative, decimals=3).tolist() == [[0.182, -0.182], [0.068, -0.068]]
+
+    def test_update_values_stays_on_simplex(self, sim_max_game):
+        game = sim_max_game
+        game.confusion = game.similarity
+        dynamics = ContinuousReplicatorDynamics(time_step=5)
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        new_sender_strategy, new_receiver_strategy = dynamics.update_values(sender_strategy, receiver_strategy, game)
+        assert np.all(new_sender_strategy >= 0)
+        assert np.all(new_receiver_strategy >= 0)
+        assert np.allclose(np.sum(new_sender_strategy, axis=-1), 1)
+        assert np.allclose(np.sum(new_receiver_strategy, axis=-1), 1)
+
+    def test_update_values_approaches_replicator_fixed_point(self, sim_max_game):
+        game = sim_max_game
+        dynamics = ContinuousReplicatorDynamics(time_step=50)
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        new_sender_strategy, new_receiver_strategy = dynamics.update_values(sender_strategy, receiver_strategy, game)
+        assert np.round(new_sender_strategy, decimals=2).tolist() == [[0, 1], [1, 0]]
+        assert np.round(new_receiver_strategy, decimals=2).tolist() == [[0, 1], [1, 0]]
+
+    def test_update_values_at_stationary_point(self, sim_max_game):
+        game = sim_max_game
+        dynamics = ContinuousReplicatorDynamics()
+        sender_strategy = np.array([[1.0, 0.0], [0.0, 1.0]])
+        receiver_strategy = np.array([[1.0, 0.0], [0.0, 1.0]])
+        new_sender_strategy, new_receiver_strategy = dynamics.update_values(sender_strategy, receiver_strategy, game)
+        assert new_sender_strategy.tolist() == sender_strategy.tolist()
+        assert new_receiver_strategy.tolist() == receiver_strategy.tolist()
+
+
 class TestBestResponseDynamics(object):
     def test_update_sender(self, sim_max_game):
         game = sim_max_game
@@ -88,6 +231,66 @@ class TestBestResponseDynamics(object):
         assert np.round(new_receiver_strategy, decimals=3).tolist() == [[0.952, 0.048], [0.952, 0.048]]
 
 
+    def test_constructor_defaults(self):
+        dynamics = BestResponseDynamics()
+        assert dynamics.tie_tolerance == 0
+        assert dynamics.tie_breaking == 'uniform'
+
+    def test_constructor_negative_tie_tolerance_raises_exception(self):
+        with pytest.raises(ValueError):
+            BestResponseDynamics(tie_tolerance=-1)
+
+    def test_constructor_unknown_tie_breaking_raises_exception(self):
+        with pytest.raises(ValueError):
+            BestResponseDynamics(tie_breaking='?????')
+
+    def test_best_responses_uniform_over_ties(self):
+        dynamics = BestResponseDynamics()
+        expected_utility = np.array([[1, 1, 0.5], [0.2, 0.3, 0.1]])
+        best_responses = dynamics.best_responses(expected_utility)
+        assert best_responses.tolist() == [[True, True, False], [False, True, False]]
+
+    def test_best_responses_with_tie_tolerance(self):
+        dynamics = BestResponseDynamics(tie_tolerance=0.15)
+        expected_utility = np.array([[1, 0.9, 0.5], [0.2, 0.3, 0.1]])
+        best_responses = dynamics.best_responses(expected_utility)
+        assert best_responses.tolist() == [[True, True, False], [True, True, False]]
+
+    def test_best_responses_lowest_index(self):
+        dynamics = BestResponseDynamics(tie_breaking='lowest index')
+        expected_utility = np.array([[0.5, 1, 1], [0.2, 0.3, 0.1]])
+        best_responses = dynamics.best_responses(expected_utility)
+        assert best_responses.tolist() == [[0, 1, 0], [0, 1, 0]]
+
+    def test_best_responses_random(self):
+        dynamics = BestResponseDynamics(tie_breaking='random')
+        expected_utility = np.array([[[1, 1, 0.5]] * 100])
+        best_responses = dynamics.best_responses(expected_utility)
+        assert np.sum(best_responses, axis=-1).tolist() == [[1] * 100]
+        assert np.sum(best_responses[..., 2]) == 0
+        assert 0 < np.sum(best_responses[..., 0]) < 100
+
+    def test_update_receiver_lowest_index(self, sim_max_game):
+        game = sim_max_game
+        dynamics = BestResponseDynamics(tie_breaking='lowest index')
+        sender_strategy = np.array([[0.5, 0.5], [0.5, 0.5]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        game.utility = np.array([[1, 1], [1, 1]])
+        new_receiver_strategy = dynamics.update_receiver(sender_strategy, receiver_strategy, game)
+        assert np.round(new_receiver_strategy, decimals=3).tolist() == [[1, 0], [1, 0]]
+
+
+    def test_update_sender_values_into_output_buffer(self, sim_max_game):
+        game = sim_max_game
+        dynamics = BestResponseDynamics()
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        out = np.empty((2, 2))
+        new_sender_strategy = dynamics.update_sender_values(sender_strategy, receiver_strategy, game, out=out)
+        assert new_sender_strategy is out
+        assert out.tolist() == [[0, 1], [1, 0]]
+
+
 class TestQuantalResponseDynamics(object):
     def test_update_sender(self, sim_max_game):
         game = sim_max_game
@@ -122,3 +325,42 @@ class TestQuantalResponseDynamics(object):
         receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
         new_receiver_strategy = dynamics.update_receiver(sender_strategy, receiver_strategy, game)
         assert np.round(new_receiver_strategy, decimals=3).tolist() == [[0.852, 0.148], [0.938, 0.062]]
+
+    def test_update_sender_with_high_rationality_does_not_overflow(self, sim_max_game):
+        game = sim_max_game
+        dynamics = QuantalResponseDynamics(1000)
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        with np.errstate(over='raise', invalid='raise'):
+            new_sender_strategy = dynamics.update_sender(sender_strategy, receiver_strategy, game)
+        assert np.round(new_sender_strategy, decimals=3).tolist() == [[0, 1], [1, 0]]
+
+    def test_quantal_responses_match_softmax(self):
+        dynamics = QuantalResponseDynamics(2)
+        expected_utility = np.array([[0.1, 0.5, 0.2], [1, 1, 1]])
+        exponentiated_utility = np.exp(2 * expected_utility)
+        softmax = exponentiated_utility / np.sum(exponentiated_utility, axis=-1, keepdims=True)
+        assert np.allclose(dynamics.quantal_responses(expected_utility), softmax)
+
+    def test_constructor_rationality_schedule(self):
+        dynamics = QuantalResponseDynamics(1, [1, 2, 5])
+        assert dynamics.rationality == 1
+        assert dynamics.rationality_schedule == [1, 2, 5]
+
+    def test_constructor_decreasing_rationality_schedule_raises_exception(self):
+        with pytest.raises(ValueError):
+            QuantalResponseDynamics(5, [5, 2])
+
+    def test_constructor_empty_rationality_schedule_raises_exception(self):
+        with pytest.raises(ValueError):
+            QuantalResponseDynamics(5, [])
+
+    def test_update_receiver_values_into_output_buffer(self, sim_max_game):
+        game = sim_max_game
+        dynamics = QuantalResponseDynamics(5)
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        out = np.empty((2, 2))
+        new_receiver_strategy = dynamics.update_receiver_values(sender_strategy, receiver_strategy, game, out=out)
+        assert new_receiver_strategy is out
+        assert np.round(out, decimals=3).tolist() == [[0.788, 0.212], [0.967, 0.033]]
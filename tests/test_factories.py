@@ -1,4 +1,5 @@
 import numpy as np
+from scipy import sparse
 
 from democritus.factories import BivariateFunctionFactory, SenderStrategyFactory, ReceiverStrategyFactory
 from democritus.types import WCSMunsellSenderStrategy, SenderStrategy, ReceiverStrategy, WCSMunsellReceiverStrategy
@@ -17,6 +18,14 @@ class TestBivariateFunctionFactory(object):
         assert np.round(similarity[1], decimals=3).tolist() == [0.779, 1, 0.779]
         assert np.round(similarity[2], decimals=3).tolist() == [0.368, 0.779, 1]
 
+    def test_create_nosofsky_with_truncation_threshold(self):
+        similarity = BivariateFunctionFactory.create_nosofsky(np.array([[0, 1, 2], [1, 0, 1], [2, 1, 0]]), 2, 0.5)
+        assert sparse.issparse(similarity.values)
+        assert similarity.values.nnz == 7
+        assert np.round(similarity[0], decimals=3).tolist() == [1, 0.779, 0]
+        assert np.round(similarity[1], decimals=3).tolist() == [0.779, 1, 0.779]
+        assert np.round(similarity[2], decimals=3).tolist() == [0, 0.779, 1]
+
 
 class TestSenderStrategyFactory(object):
     def test_create_random(self, states, messages):
@@ -52,3 +61,15 @@ class TestReceiverStrategyFactory(object):
     def test_create_zeros_wcs_munsell(self, wcs_munsell_palette, messages):
         receiver_strategy = ReceiverStrategyFactory.create_random(messages, wcs_munsell_palette)
         assert type(receiver_strategy) is WCSMunsellReceiverStrategy
+
+
+class TestStrategyFactoryCreate(object):
+    def test_create_sender_strategy(self, states, messages):
+        sender_strategy = SenderStrategyFactory.create(states, messages, [[1, 1], [0, 1], [1, 0]])
+        assert type(sender_strategy) is SenderStrategy
+        assert sender_strategy.values.tolist() == [[0.5, 0.5], [0, 1], [1, 0]]
+
+    def test_create_receiver_strategy_wcs_munsell(self, wcs_munsell_palette, messages):
+        values = np.ones((messages.size(), wcs_munsell_palette.size()))
+        receiver_strategy = ReceiverStrategyFactory.create(messages, wcs_munsell_palette, values)
+        assert type(receiver_strategy) is WCSMunsellReceiverStrategy
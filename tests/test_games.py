@@ -1,3 +1,11 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from democritus.games import CompiledGame
+from democritus.types import MessageSet
+
+
 class TestGame(object):
     def test_number_of_states(self, game):
         assert game.number_of_states() == 2
@@ -8,8 +16,112 @@ class TestGame(object):
     def test_number_of_actions(self, game):
         assert game.number_of_actions() == 2
 
+    def test_compile(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        assert type(compiled_game) is CompiledGame
+        assert compiled_game.priors.tolist() == [0.6, 0.4]
+        assert compiled_game.utility.tolist() == [[2, 0.5], [0.1, 1]]
+        assert compiled_game.confusion is None
+
+    def test_compile_is_cached(self, sim_max_game):
+        assert sim_max_game.compile() is sim_max_game.compile()
+
+    def test_compile_after_changing_confusion(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        sim_max_game.confusion = np.array([[0.9, 0.1], [0.1, 0.9]])
+        recompiled_game = sim_max_game.compile()
+        assert recompiled_game is not compiled_game
+        assert recompiled_game.confusion.tolist() == [[0.9, 0.1], [0.1, 0.9]]
+        assert recompiled_game.confusion_transpose.tolist() == [[0.9, 0.1], [0.1, 0.9]]
+
 
 class TestSimMaxGame(object):
     def test_sim_max_game_actions_equal_states(self, sim_max_game):
         game = sim_max_game
         assert game.states.elements == game.actions.elements
+
+
+class TestCompiledGame(object):
+    def test_arrays_are_read_only(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        with pytest.raises(ValueError):
+            compiled_game.utility[0, 0] = 5
+        with pytest.raises(ValueError):
+            compiled_game.priors[0] = 5
+
+    def test_compiling_does_not_freeze_game_arrays(self, sim_max_game):
+        sim_max_game.compile()
+        sim_max_game.utility[0, 0] = 5
+        assert sim_max_game.utility[0, 0] == 5
+
+    def test_compile_after_changing_messages(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        sim_max_game.messages = MessageSet(['m1', 'm2', 'm3'])
+        recompiled_game = sim_max_game.compile()
+        assert recompiled_game is not compiled_game
+        assert recompiled_game.sender_entropy_normalizer == pytest.approx(2 * np.log(3))
+
+    def test_entropy_normalizers(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        assert compiled_game.sender_entropy_normalizer == pytest.approx(2 * np.log(2))
+        assert compiled_game.receiver_entropy_normalizer == pytest.approx(2 * np.log(2))
+
+    def test_compile_returns_itself(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        assert compiled_game.compile() is compiled_game
+
+    def test_maximum_expected_utility(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        assert compiled_game.maximum_expected_utility == pytest.approx(0.6 * 2 + 0.4 * 1)
+
+    def test_sender_expected_utility(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        receiver_strategy = np.array([[0.2, 0.8], [0.9, 0.1]])
+        expected_utility = compiled_game.sender_expected_utility(receiver_strategy)
+        assert np.round(expected_utility, decimals=3).tolist() == [[0.8, 1.85], [0.82, 0.19]]
+
+    def test_receiver_expected_utility(self, sim_max_game):
+        compiled_game = sim_max_game.compile()
+        sender_strategy = np.array([[0.3, 0.7], [0.4, 0.6]])
+        expected_utility = compiled_game.receiver_expected_utility(sender_strategy)
+        assert np.round(expected_utility, decimals=3).tolist() == [[0.44, 0.178], [0.96, 0.282]]
+
+    def test_normalize_values_with_confusion(self, sim_max_game):
+        sim_max_game.confusion = np.array([[0.5, 0.5], [0, 1]])
+        compiled_game = sim_max_game.compile()
+        sender_values = compiled_game.normalize_sender_values(np.array([[2, 0], [0, 1]]))
+        receiver_values = compiled_game.normalize_receiver_values(np.array([[2, 0], [0, 1]]))
+        assert np.round(sender_values, decimals=3).tolist() == [[0.5, 0.5], [0, 1]]
+        assert np.round(receiver_values, decimals=3).tolist() == [[1, 0], [0.333, 0.667]]
+
+    def test_compile_sparse_game(self, truncated_nosofsky_game, densified_truncated_nosofsky_game):
+        compiled_game = truncated_nosofsky_game.compile()
+        dense_compiled_game = densified_truncated_nosofsky_game.compile()
+        assert sparse.issparse(compiled_game.utility)
+        assert sparse.issparse(compiled_game.receiver_utility)
+        assert sparse.issparse(compiled_game.confusion)
+        assert compiled_game.utility.nnz < 25
+        assert compiled_game.maximum_expected_utility == pytest.approx(dense_compiled_game.maximum_expected_utility)
+
+    def test_sparse_expected_utility(self, truncated_nosofsky_game, densified_truncated_nosofsky_game):
+        compiled_game = truncated_nosofsky_game.compile()
+        dense_compiled_game = densified_truncated_nosofsky_game.compile()
+        sender_values = np.random.random((3, 5, 2))
+        receiver_values = np.random.random((3, 2, 5))
+        assert np.allclose(compiled_game.sender_expected_utility(receiver_values),
+                           dense_compiled_game.sender_expected_utility(receiver_values))
+        assert np.allclose(compiled_game.receiver_expected_utility(sender_values[0]),
+                           dense_compiled_game.receiver_expected_utility(sender_values[0]))
+        out = np.empty((3, 2, 5))
+        assert compiled_game.receiver_expected_utility(sender_values, out=out) is out
+        assert np.allclose(out, dense_compiled_game.receiver_expected_utility(sender_values))
+
+    def test_normalize_values_with_sparse_confusion(self, truncated_nosofsky_game, densified_truncated_nosofsky_game):
+        compiled_game = truncated_nosofsky_game.compile()
+        dense_compiled_game = densified_truncated_nosofsky_game.compile()
+        sender_values = np.random.random((5, 2))
+        receiver_values = np.random.random((2, 5))
+        assert np.allclose(compiled_game.normalize_sender_values(sender_values),
+                           dense_compiled_game.normalize_sender_values(sender_values))
+        assert np.allclose(compiled_game.normalize_receiver_values(receiver_values),
+                           dense_compiled_game.normalize_receiver_values(receiver_values))
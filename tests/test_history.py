@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from democritus.history import StrategyHistory, resize_npy_file
+
+
+class TestStrategyHistory(object):
+    def test_all_keeps_every_step(self):
+        history = StrategyHistory((2, 2), initial_capacity=1)
+        for step in range(5):
+            history.record(step, np.full((2, 2), step))
+        assert len(history) == 5
+        assert history.kept_steps().tolist() == [0, 1, 2, 3, 4]
+        assert history.get(3).tolist() == [[3, 3], [3, 3]]
+
+    def test_record_copies_values(self):
+        history = StrategyHistory((1, 2))
+        values = np.array([[0.5, 0.5]])
+        history.record(0, values)
+        values[0, 0] = 1
+        assert history.get(0).tolist() == [[0.5, 0.5]]
+
+    def test_last_keeps_most_recent_steps(self):
+        history = StrategyHistory((1, 1), 'last', size=3)
+        for step in range(7):
+            history.record(step, [[step]])
+        assert len(history) == 3
+        assert history.kept_steps().tolist() == [4, 5, 6]
+        assert history.get(5).tolist() == [[5]]
+        assert history.values.shape == (3, 1, 1)
+        with pytest.raises(IndexError):
+            history.get(3)
+
+    def test_stacked_orders_kept_steps(self):
+        history = StrategyHistory((1, 1), 'last', size=3)
+        for step in range(7):
+            history.record(step, [[step]])
+        steps, values = history.stacked()
+        assert steps.tolist() == [4, 5, 6]
+        assert values.ravel().tolist() == [4, 5, 6]
+
+    def test_stacked_is_a_view_of_all_steps(self):
+        history = StrategyHistory((1, 1), 'all')
+        for step in range(3):
+            history.record(step, [[step]])
+        steps, values = history.stacked()
+        assert steps.tolist() == [0, 1, 2]
+        assert np.shares_memory(values, history.values)
+
+    def test_every_keeps_multiples_of_interval(self):
+        history = StrategyHistory((1, 1), 'every', interval=3)
+        for step in range(8):
+            history.record(step, [[step]])
+        assert history.kept_steps().tolist() == [0, 3, 6]
+        assert not history.contains(4)
+        with pytest.raises(IndexError):
+            history.get(4)
+
+    def test_none_keeps_nothing(self):
+        history = StrategyHistory((1, 1), 'none')
+        for step in range(3):
+            history.record(step, [[step]])
+        assert len(history) == 0
+        assert history.kept_steps().tolist() == []
+
+    def test_unknown_policy_raises_exception(self):
+        with pytest.raises(ValueError):
+            StrategyHistory((1, 1), '???????')
+
+    def test_last_without_size_raises_exception(self):
+        with pytest.raises(ValueError):
+            StrategyHistory((1, 1), 'last')
+
+    def test_every_without_interval_raises_exception(self):
+        with pytest.raises(ValueError):
+            StrategyHistory((1, 1), 'every', interval=0)
+
+    def test_file_backed_history_grows_and_closes(self, tmpdir):
+        file_name = str(tmpdir.join('sender.npy'))
+        history = StrategyHistory((2, 2), initial_capacity=2, file_name=file_name)
+        for step in range(5):
+            history.record(step, np.full((2, 2), step))
+        assert history.get(4).tolist() == [[4, 4], [4, 4]]
+        history.close()
+        values = np.load(file_name, mmap_mode='r')
+        assert values.shape == (5, 2, 2)
+        assert values[:, 0, 0].tolist() == [0, 1, 2, 3, 4]
+
+    def test_file_backed_steps_are_written_as_steps_are_kept(self, tmpdir):
+        steps_file_name = str(tmpdir.join('steps.npy'))
+        history = StrategyHistory((1, 1), 'every', interval=2, initial_capacity=2,
+                                  file_name=str(tmpdir.join('sender.npy')), steps_file_name=steps_file_name)
+        for step in range(7):
+            history.record(step, [[step]])
+        history.flush()
+        assert np.load(steps_file_name).tolist() == [0, 2, 4, 6]
+        history.record(7, [[7]])
+        history.record(8, [[8]])
+        assert np.load(steps_file_name).tolist() == [0, 2, 4, 6, 8, -1, -1, -1]
+        history.close()
+        assert np.load(steps_file_name).tolist() == [0, 2, 4, 6, 8]
+
+    def test_append_reopens_files_and_rewinds(self, tmpdir):
+        file_name = str(tmpdir.join('sender.npy'))
+        steps_file_name = str(tmpdir.join('steps.npy'))
+        history = StrategyHistory((1, 1), initial_capacity=2, file_name=file_name, steps_file_name=steps_file_name)
+        for step in range(6):
+            history.record(step, [[step]])
+        history.flush()
+        appended_history = StrategyHistory((1, 1), file_name=file_name, steps_file_name=steps_file_name, append=True)
+        assert appended_history.kept_steps().tolist() == list(range(6))
+        appended_history.rewind(3)
+        appended_history.record(4, [[40]])
+        appended_history.close()
+        assert np.load(steps_file_name).tolist() == [0, 1, 2, 3, 4]
+        assert np.load(file_name).ravel().tolist() == [0, 1, 2, 3, 40]
+
+    def test_steps_file_requires_values_file(self, tmpdir):
+        with pytest.raises(ValueError):
+            StrategyHistory((1, 1), steps_file_name=str(tmpdir.join('steps.npy')))
+
+    def test_resize_npy_file_refuses_to_move_data(self, tmpdir):
+        file_name = str(tmpdir.join('values.npy'))
+        header = "{'descr': '<f8', 'fortran_order': False, 'shape': (1,), }".ljust(53) + '\n'
+        with open(file_name, 'wb') as npy_file:
+            npy_file.write(np.lib.format.magic(1, 0) + np.uint16(len(header)).tobytes() + header.encode('latin1'))
+            npy_file.write(np.zeros(1).tobytes())
+        with pytest.raises(ValueError):
+            resize_npy_file(file_name, (), np.dtype(float), 2)
+        assert np.load(file_name).tolist() == [0.0]
+
+    def test_file_backed_history_requires_ordered_policy(self, tmpdir):
+        with pytest.raises(ValueError):
+            StrategyHistory((1, 1), 'last', size=2, file_name=str(tmpdir.join('sender.npy')))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from democritus.live import LiveView, live_layout
+from democritus.simulation import Simulation
+
+
+@pytest.fixture(name='simulation')
+def fixture_simulation(game, dynamics):
+    return Simulation(game, dynamics, ['expected utility'])
+
+
+class TestLiveView(object):
+    def test_layout(self, simulation):
+        layout = live_layout(simulation)
+        assert layout['wcs'] is False
+        assert layout['states'] == simulation.game.states.elements
+        assert layout['metrics'] == [('expected utility', 'Expected utility')]
+
+    def test_update_drops_frames_when_queue_is_full(self, simulation):
+        live_view = LiveView(simulation, max_fps=1e6, queue_size=1, start=False)
+        live_view.queue.get(timeout=10)
+        assert live_view.update(simulation)
+        simulation.step()
+        assert not live_view.update(simulation)
+        assert live_view.dropped_frames == 1
+        assert live_view.pending_measurements['expected utility'][0] == [1]
+
+    def test_update_is_throttled(self, simulation):
+        live_view = LiveView(simulation, max_fps=1e-3, queue_size=10, start=False)
+        live_view.queue.get(timeout=10)
+        assert live_view.update(simulation)
+        simulation.step()
+        assert not live_view.update(simulation)
+        assert live_view.dropped_frames == 0
+        assert live_view.update(simulation, force=True)
+        frame = live_view.queue.get(timeout=10)
+        assert frame['measurements']['expected utility'][0] == [0]
+        frame = live_view.queue.get(timeout=10)
+        assert frame['step'] == 1
+        assert frame['measurements']['expected utility'][0] == [1]
+        assert np.array_equal(frame['sender'], simulation.get_current_sender_strategy().values)
+
+    def test_non_positive_frame_rate_raises_exception(self, simulation):
+        with pytest.raises(ValueError):
+            LiveView(simulation, max_fps=0, start=False)
+
+    def test_run_with_live_view(self, simulation, monkeypatch):
+        monkeypatch.setenv('MPLBACKEND', 'Agg')
+        live_view = LiveView(simulation, max_fps=100)
+        simulation.run_until_converged(max_steps=20, live_view=live_view)
+        live_view.close(simulation, timeout=60)
+        assert live_view.process.exitcode == 0
@@ -0,0 +1,106 @@
+import os
+
+import pandas
+import pytest
+import yaml
+
+from democritus.converters import SimulationSpecReader
+from democritus.merge import main, merge_shards
+from democritus.runner import SimulationRunner
+from democritus.store import read_results
+
+
+@pytest.fixture(name='sweep_config_file_name')
+def fixture_sweep_config_file_name(tmpdir):
+    spec = {'game': {'type': 'sim-max',
+                     'states': {'type': 'metric space',
+                                'elements': {'type': 'numeric range', 'size': 5},
+                                'metric': {'type': 'euclidean'}},
+                     'messages': {'elements': {'type': 'numbered labels', 'size': 2}},
+                     'similarity': {'type': 'nosofsky', 'decay': 1}},
+            'dynamics': {'type': 'replicator'},
+            'metrics': ['expected utility'],
+            'sweep': {'parameters': {'game.similarity.decay': [0.5, 2, 4],
+                                     'game.messages.elements.size': [2, 3]}}}
+    config_file_name = str(tmpdir.join('sweep.yml'))
+    with open(config_file_name, 'w') as config_file:
+        yaml.safe_dump(spec, config_file)
+    return config_file_name
+
+
+def run_shards(config_file_name, store_directory, shards, *extra_args):
+    for shard in shards:
+        simulation_runner = SimulationRunner([config_file_name, '--max-steps=3', '--workers=1', '--seed=4',
+                                              '--results-store=%s' % store_directory, '--shard=%s' % shard]
+                                             + list(extra_args))
+        simulation_runner.run()
+        simulation_runner.write_results()
+
+
+def test_shards_partition_the_sweep(sweep_config_file_name, tmpdir):
+    store_directory = str(tmpdir.join('results'))
+    run_shards(sweep_config_file_name, store_directory, ['0/4', '1/4', '2/4', '3/4'])
+    assert sorted(os.listdir(store_directory)) == ['shard-%d-of-4' % index for index in range(4)]
+    assert read_results(os.path.join(store_directory, 'shard-1-of-4'))['run'].tolist() == [1, 5]
+    assert sorted(read_results(store_directory)['run'].tolist()) == list(range(6))
+
+
+def test_rerunning_a_shard_replaces_its_partition(sweep_config_file_name, tmpdir):
+    store_directory = str(tmpdir.join('results'))
+    run_shards(sweep_config_file_name, store_directory, ['0/2', '1/2', '1/2'], '--results-batch-size=1')
+    assert sorted(read_results(store_directory)['run'].tolist()) == list(range(6))
+
+
+def test_merge_shards(sweep_config_file_name, tmpdir):
+    store_directory = str(tmpdir.join('results'))
+    run_shards(sweep_config_file_name, store_directory, ['0/2', '1/2'])
+    spec = SimulationSpecReader.load_from_file(sweep_config_file_name)
+    table, sweep_results = merge_shards(spec, store_directory)
+    assert table.column('run').to_pylist() == list(range(6))
+    assert list(sweep_results.index.names) == ['game.messages.elements.size', 'game.similarity.decay']
+    assert list(sweep_results.columns) == ['steps', 'converged', 'expected utility']
+
+    simulation_runner = SimulationRunner([sweep_config_file_name, '--max-steps=3', '--workers=1', '--seed=4',
+                                          '--output-prefix=unsharded', '--output-dir=%s' % str(tmpdir)])
+    simulation_runner.run()
+    simulation_runner.write_results()
+    main([sweep_config_file_name, store_directory, '--output-prefix=merged', '--output-dir=%s' % str(tmpdir)])
+    merged_results = pandas.read_csv(os.path.join(str(tmpdir), 'merged-sweep.csv'))
+    assert merged_results.equals(pandas.read_csv(os.path.join(str(tmpdir), 'unsharded-sweep.csv')))
+    assert len(read_results(os.path.join(str(tmpdir), 'merged-results.parquet'))) == 6
+
+
+def test_merge_incomplete_shards_fails(sweep_config_file_name, tmpdir):
+    store_directory = str(tmpdir.join('results'))
+    run_shards(sweep_config_file_name, store_directory, ['0/3', '2/3'])
+    spec = SimulationSpecReader.load_from_file(sweep_config_file_name)
+    with pytest.raises(ValueError, match=r'Runs \[1, 4\] are missing'):
+        merge_shards(spec, store_directory)
+    with pytest.raises(SystemExit):
+        main([sweep_config_file_name, store_directory, '--output-dir=%s' % str(tmpdir)])
+
+
+def test_merge_shards_with_different_seeds_fails(sweep_config_file_name, tmpdir):
+    store_directory = str(tmpdir.join('results'))
+    run_shards(sweep_config_file_name, store_directory, ['0/2'])
+    simulation_runner = SimulationRunner([sweep_config_file_name, '--max-steps=3', '--workers=1', '--seed=5',
+                                          '--results-store=%s' % store_directory, '--shard=1/2'])
+    simulation_runner.run()
+    spec = SimulationSpecReader.load_from_file(sweep_config_file_name)
+    with pytest.raises(ValueError, match='different seeds'):
+        merge_shards(spec, store_directory)
+
+
+@pytest.mark.parametrize('args', [['--shard=2/2', '--seed=1', '--results-store=results'],
+                                  ['--shard=1/0', '--seed=1', '--results-store=results'],
+                                  ['--shard=1', '--seed=1', '--results-store=results'],
+                                  ['--shard=0/2', '--results-store=results'],
+                                  ['--shard=0/2', '--seed=1']])
+def test_invalid_shard_arguments(sweep_config_file_name, args):
+    with pytest.raises(SystemExit):
+        SimulationRunner([sweep_config_file_name] + args)
+
+
+def test_shard_requires_sweep(config_file_name):
+    with pytest.raises(SystemExit):
+        SimulationRunner([config_file_name, '--shard=0/2', '--seed=1', '--results-store=results'])
@@ -1,7 +1,13 @@
+import numpy as np
 import pytest
 
+from democritus.dynamics import ReplicatorDynamics
+from democritus.factories import SenderStrategyFactory, ReceiverStrategyFactory
 from democritus.metrics import SimulationMetric, SenderNormalizedEntropyMetric, \
-    ReceiverNormalizedEntropyMetric, ExpectedUtilityMetric
+    ReceiverNormalizedEntropyMetric, ExpectedUtilityMetric, MutualInformationMetric, CommunicativeSuccessMetric, \
+    CategoryConvexityMetric, CategoryConnectednessMetric
+from democritus.simulation import Simulation
+from democritus.types import ActionSet
 
 
 class TestSimulationMetric(object):
@@ -11,6 +17,18 @@ class TestSimulationMetric(object):
         with pytest.raises(NotImplementedError):
             metric.calculate(simulation)
 
+    def test_calculate_series_raises_exception(self, game):
+        metric = SimulationMetric()
+        with pytest.raises(NotImplementedError):
+            metric.calculate_series(np.ones((3, 2, 2)), np.ones((3, 2, 2)), game)
+
+    def test_calculate_series_incorrect_dimensions_raises_exception(self, game):
+        metric = ExpectedUtilityMetric()
+        with pytest.raises(ValueError):
+            metric.calculate_series(np.ones((2, 2)), np.ones((2, 2)), game)
+        with pytest.raises(ValueError):
+            metric.calculate_series(np.ones((3, 2, 2)), np.ones((2, 2, 2)), game)
+
     def test_plot_raises_exception(self, converged_simulation):
         metric = SimulationMetric()
         with pytest.raises(NotImplementedError):
@@ -24,6 +42,26 @@ class TestExpectedUtilityMetric(object):
         expected_utility = metric.calculate(simulation)
         assert expected_utility == pytest.approx(0.849, abs=5e-4)
 
+    def test_calculate_with_sparse_utility(self, truncated_nosofsky_game, densified_truncated_nosofsky_game, dynamics):
+        game = truncated_nosofsky_game
+        sender_strategy = SenderStrategyFactory.create(game.states, game.messages, np.random.random((5, 2)))
+        receiver_strategy = ReceiverStrategyFactory.create(game.messages, game.actions, np.random.random((2, 5)))
+        simulation = Simulation(game, dynamics, sender_strategy=sender_strategy, receiver_strategy=receiver_strategy)
+        dense_simulation = Simulation(densified_truncated_nosofsky_game, dynamics, sender_strategy=sender_strategy,
+                                      receiver_strategy=receiver_strategy)
+        metric = ExpectedUtilityMetric()
+        assert metric.calculate(simulation) == pytest.approx(metric.calculate(dense_simulation))
+
+    def test_calculate_values_of_stacked_strategies(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        metric = ExpectedUtilityMetric()
+        sender_values = np.array([simulation.get_current_sender_strategy().values, [[1, 0], [0, 1]]])
+        receiver_values = np.array([simulation.get_current_receiver_strategy().values, [[1, 0], [0, 1]]])
+        expected_utilities = metric.calculate_values(sender_values, receiver_values, simulation.game)
+        assert expected_utilities.shape == (2,)
+        assert expected_utilities[0] == pytest.approx(metric.calculate(simulation))
+        assert expected_utilities[1] == pytest.approx(1)
+
 
 class TestSenderNormalizedEntropyMetric(object):
     def test_calculate(self, almost_converged_simulation):
@@ -32,6 +70,11 @@ class TestSenderNormalizedEntropyMetric(object):
         sender_entropy = metric.calculate(simulation)
         assert sender_entropy == pytest.approx(0.378, abs=5e-4)
 
+    def test_calculate_values_with_pure_and_uniform_strategies(self, game):
+        metric = SenderNormalizedEntropyMetric()
+        sender_values = np.array([[[1, 0], [0, 1]], [[0.5, 0.5], [0.5, 0.5]]])
+        assert metric.calculate_values(sender_values, None, game).tolist() == [0, 1]
+
 
 class TestReceiverNormalizedEntropyMetric(object):
     def test_calculate(self, almost_converged_simulation):
@@ -39,3 +82,71 @@ class TestReceiverNormalizedEntropyMetric(object):
         metric = ReceiverNormalizedEntropyMetric()
         receiver_entropy = metric.calculate(simulation)
         assert receiver_entropy == pytest.approx(0.422, abs=5e-4)
+
+
+class TestMutualInformationMetric(object):
+    def test_calculate_values(self, game):
+        metric = MutualInformationMetric()
+        assert metric.calculate_values(np.eye(2), np.eye(2), game) == pytest.approx(1)
+        assert metric.calculate_values(np.array([[1, 0], [1, 0]]), np.eye(2), game) == pytest.approx(0)
+
+    def test_calculate_values_of_stacked_strategies(self, game):
+        metric = MutualInformationMetric()
+        sender_values = np.array([np.eye(2), [[0.5, 0.5], [0.5, 0.5]]])
+        receiver_values = np.array([np.eye(2), np.eye(2)])
+        assert np.allclose(metric.calculate_values(sender_values, receiver_values, game), [1, 0])
+
+
+class TestCommunicativeSuccessMetric(object):
+    def test_calculate_values(self, game):
+        metric = CommunicativeSuccessMetric()
+        assert metric.calculate_values(np.eye(2), np.eye(2), game) == pytest.approx(1)
+        assert metric.calculate_values(np.eye(2), np.array([[0, 1], [1, 0]]), game) == pytest.approx(0)
+        assert metric.calculate_values(np.array([[1, 0], [1, 0]]), np.eye(2), game) == pytest.approx(0.5)
+
+    def test_different_number_of_actions_and_states_raises_exception(self, game):
+        game.actions = ActionSet(['a1', 'a2', 'a3'])
+        with pytest.raises(ValueError):
+            CommunicativeSuccessMetric().calculate_values(np.eye(2), np.ones((2, 3)), game)
+
+
+class TestCategoryConvexityMetric(object):
+    def test_calculate_values(self, line_game):
+        metric = CategoryConvexityMetric()
+        convex_sender_values = np.array([[1, 0], [1, 0], [0, 1], [0, 1], [0, 1]])
+        non_convex_sender_values = np.array([[1, 0], [0, 1], [1, 0], [0, 1], [0, 1]])
+        assert metric.calculate_values(convex_sender_values, None, line_game) == pytest.approx(1)
+        assert metric.calculate_values(non_convex_sender_values, None, line_game) == pytest.approx(0)
+        assert metric.calculate_values(np.full((5, 2), 0.5), None, line_game) == pytest.approx(0.5)
+
+    def test_states_without_metric_raise_exception(self, game):
+        with pytest.raises(ValueError):
+            CategoryConvexityMetric().calculate_values(np.eye(2), np.eye(2), game)
+
+
+class TestCategoryConnectednessMetric(object):
+    def test_calculate_values(self, line_game):
+        metric = CategoryConnectednessMetric()
+        sender_values = np.array([[[1, 0], [1, 0], [0, 1], [0, 1], [0, 1]],
+                                  [[1, 0], [0, 1], [1, 0], [0, 1], [0, 1]]])
+        assert np.allclose(metric.calculate_values(sender_values, None, line_game), [1, 0.6])
+
+
+@pytest.mark.parametrize('metric', [ExpectedUtilityMetric(), SenderNormalizedEntropyMetric(),
+                                    ReceiverNormalizedEntropyMetric()])
+@pytest.mark.parametrize('chunk_size', [None, 2])
+def test_calculate_series_matches_live_measurements(metric, chunk_size, almost_converged_simulation):
+    simulation = almost_converged_simulation
+    simulation.dynamics = ReplicatorDynamics()
+    measurements = [metric.calculate(simulation)]
+    for _ in range(4):
+        simulation.step()
+        measurements.append(metric.calculate(simulation))
+    series = metric.calculate_series(simulation.get_sender_history(), simulation.get_receiver_history(),
+                                     simulation.game, chunk_size)
+    assert series.shape == (5,)
+    assert np.allclose(series, measurements)
+
+
+def test_calculate_series_of_empty_history(game):
+    assert ExpectedUtilityMetric().calculate_series(np.ones((0, 2, 2)), np.ones((0, 2, 2)), game, 2).shape == (0,)
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import matplotlib
+import numpy as np
+
+matplotlib.use('Agg')
+
+from democritus import rendering
+from democritus.live import live_layout
+from democritus.simulation import Simulation
+
+
+def test_batch_simulation_does_not_import_matplotlib(config_file_name, tmpdir):
+    script = ('import sys\n'
+              'from democritus.runner import SimulationRunner\n'
+              'runner = SimulationRunner([%r, "--batch", "--max-steps=2", "--output-dir=%s"])\n'
+              'runner.run()\n'
+              'runner.write_results()\n'
+              'assert "matplotlib" not in sys.modules\n' % (config_file_name, str(tmpdir)))
+    subprocess.check_call([sys.executable, '-c', script], cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_color_map():
+    assert len(rendering.color_map('Set1').colors) == 9
+
+
+def test_plot_simulation(game, dynamics):
+    simulation = Simulation(game, dynamics, ['expected utility'])
+    simulation.step()
+    simulation.plot()
+    assert len(matplotlib.pyplot.figure(1).axes) == 1
+    matplotlib.pyplot.close('all')
+
+
+def test_live_figure_updates_artists_in_place(game, dynamics):
+    simulation = Simulation(game, dynamics, ['expected utility'])
+    live_figure = rendering.LiveFigure(live_layout(simulation))
+    sender_lines = list(live_figure.sender_artists)
+    frames = [{'step': 1, 'sender': np.array([[1, 0], [0, 1]]), 'receiver': np.array([[1, 0], [0, 1]]),
+               'measurements': {'expected utility': ([0], [0.5])}},
+              {'step': 2, 'sender': np.array([[0.2, 0.8], [0.6, 0.4]]), 'receiver': np.array([[1, 0], [0, 1]]),
+               'measurements': {'expected utility': ([1, 2], [0.7, 0.9])}}]
+    live_figure.update(frames)
+    live_figure.draw()
+    assert live_figure.sender_artists == sender_lines
+    assert list(sender_lines[0].get_ydata()) == [0.2, 0.6]
+    bottom, top = live_figure.receiver_axis.get_ylim()
+    for line in live_figure.receiver_artists:
+        assert np.all((bottom <= line.get_ydata()) & (line.get_ydata() <= top))
+    assert list(live_figure.metric_lines['expected utility'].get_xdata()) == [0, 1, 2]
+    matplotlib.pyplot.close('all')
+
+
+def test_wcs_strategy_image():
+    chips = [{'wcs.value': 'A', 'wcs.hue': 0}, {'wcs.value': 'C', 'wcs.hue': 5}]
+    image = rendering.wcs_strategy_image(chips, np.array([[0.25, 0.75], [0.9, 0.1]]))
+    assert image.shape == (10, 41, 4)
+    assert image[0, 0].tolist() == list(rendering.color_map('Set1').colors[1]) + [0.75]
+    assert image[2, 5].tolist() == list(rendering.color_map('Set1').colors[0]) + [0.9]
+    assert image[1, 1, 3] == 0
@@ -1,7 +1,10 @@
 import pytest
+import yaml
 
 from democritus.runner import *
-from democritus.simulation import Simulation
+from democritus.simulation import Simulation, BatchSimulation
+from democritus.store import read_results
+from democritus.trajectory import Trajectory
 
 
 class TestSimulationRunner(object):
@@ -57,3 +60,197 @@ class TestSimulationRunner(object):
         simulation_runner.write_results()
         assert os.path.isfile(os.path.join(str(tmpdir), 'test_write_results-sender.csv'))
         assert os.path.isfile(os.path.join(str(tmpdir), 'test_write_results-receiver.csv'))
+
+    def test_write_run_summary(self, config_file_name, tmpdir):
+        simulation_runner = SimulationRunner([config_file_name, '--max-steps=2', '--batch',
+                                              '--output-prefix=test_summary', '--output-dir=%s' % str(tmpdir)])
+        simulation_runner.run()
+        simulation_runner.write_results()
+        with open(os.path.join(str(tmpdir), 'test_summary-summary.yml')) as summary_file:
+            summary = yaml.safe_load(summary_file)
+        assert summary['update schedule'] == 'simultaneous'
+        assert summary['steps'] == simulation_runner.simulation.current_step
+        assert summary['converged'] == simulation_runner.simulation.converged()
+        assert summary['seed'] == simulation_runner.seed
+
+    def test_seed_argument_makes_runs_reproducible(self, config_file_name):
+        simulation_runners = [SimulationRunner([config_file_name, '--max-steps=3', '--batch', '--seed=12'])
+                              for _ in range(2)]
+        for simulation_runner in simulation_runners:
+            simulation_runner.run()
+        assert np.array_equal(simulation_runners[0].simulation.get_current_sender_strategy().values,
+                              simulation_runners[1].simulation.get_current_sender_strategy().values)
+
+    def test_replicate_argument_reruns_batch_replicate(self, config_file_name):
+        batch_runner = SimulationRunner([config_file_name, '--replicates=3', '--seed=12'])
+        replicate_runner = SimulationRunner([config_file_name, '--batch', '--seed=12', '--replicate=2'])
+        assert np.array_equal(batch_runner.simulation.sender_strategies[2],
+                              replicate_runner.simulation.get_current_sender_strategy().values)
+        batch_runner.run()
+        replicate_runner.run()
+        assert np.allclose(batch_runner.simulation.sender_strategies[2],
+                           replicate_runner.simulation.get_current_sender_strategy().values)
+
+    def test_results_store_argument(self, config_file_name, tmpdir):
+        store_directory = str(tmpdir.join('results'))
+        for args in [['--batch', '--replicate=1'], ['--replicates=3']]:
+            simulation_runner = SimulationRunner([config_file_name, '--max-steps=3', '--seed=12',
+                                                  '--results-store=%s' % store_directory, '--output-prefix=test_store',
+                                                  '--output-dir=%s' % str(tmpdir)] + args)
+            simulation_runner.run()
+            simulation_runner.write_results()
+        assert not any(file_name.startswith('test_store') for file_name in os.listdir(str(tmpdir)))
+        results = read_results(store_directory, strategies=True)
+        assert sorted(results['run'].tolist()) == [0, 1, 1, 2]
+        assert (results['seed'] == '12').all()
+        assert results.loc[0, 'sender'].shape == (3, 5)
+
+    def test_replicate_argument_reruns_batch_replicate_with_random_tie_breaking(self, tmpdir):
+        spec = {'game': {'type': 'sim-max',
+                         'states': {'elements': {'type': 'numbered labels', 'size': 3}},
+                         'messages': {'elements': {'type': 'numbered labels', 'size': 3}}},
+                'dynamics': {'type': 'best response', 'tie tolerance': 0.5, 'tie breaking': 'random'}}
+        config_file_name = str(tmpdir.join('random_ties.yml'))
+        with open(config_file_name, 'w') as config_file:
+            yaml.safe_dump(spec, config_file)
+        batch_runner = SimulationRunner([config_file_name, '--replicates=8', '--seed=3', '--max-steps=6'])
+        batch_runner.run()
+        for replicate in range(8):
+            replicate_runner = SimulationRunner([config_file_name, '--batch', '--seed=3', '--max-steps=6',
+                                                 '--replicate=%d' % replicate])
+            replicate_runner.run()
+            assert np.array_equal(batch_runner.simulation.sender_strategies[replicate],
+                                  replicate_runner.simulation.get_current_sender_strategy().values)
+            assert np.array_equal(batch_runner.simulation.receiver_strategies[replicate],
+                                  replicate_runner.simulation.get_current_receiver_strategy().values)
+
+    def test_replicate_argument_requires_seed(self, config_file_name):
+        with pytest.raises(SystemExit):
+            SimulationRunner([config_file_name, '--batch', '--replicate=2'])
+
+    def test_metrics_output_argument(self, tmpdir):
+        config_file = tmpdir.join('config-with-metrics.yml')
+        config_file.write('''
+            game:
+              type: sim-max
+              states:
+                elements:
+                  size: 3
+              messages:
+                elements:
+                  size: 2
+            dynamics:
+              type: replicator
+            metrics:
+              - expected utility
+              - name: sender entropy
+                sampling: at convergence
+        ''')
+        simulation_runner = SimulationRunner([str(config_file), '--batch', '--max-steps=3', '--metrics-output=csv',
+                                              '--output-prefix=test_metrics', '--output-dir=%s' % str(tmpdir)])
+        simulation_runner.run()
+        simulation_runner.write_results()
+        collector = simulation_runner.simulation.measurements_collector
+        assert collector.get_measurements('expected utility') == []
+        with open(os.path.join(str(tmpdir), 'test_metrics-metrics.csv')) as metrics_file:
+            rows = metrics_file.read().splitlines()
+        current_step = simulation_runner.simulation.current_step
+        assert rows[0] == 'step,metric,value'
+        assert len(rows) == 1 + (current_step + 1) + 1
+        assert rows[-1].startswith('%d,sender entropy,' % current_step)
+        with open(os.path.join(str(tmpdir), 'test_metrics-summary.yml')) as summary_file:
+            summary = yaml.safe_load(summary_file)
+        assert sorted(summary['metrics'].keys()) == ['expected utility', 'sender entropy']
+
+    def test_save_history_argument(self, config_file_name, tmpdir):
+        simulation_runner = SimulationRunner([config_file_name, '--batch', '--max-steps=3', '--save-history',
+                                              '--output-prefix=test_history', '--output-dir=%s' % str(tmpdir)])
+        simulation_runner.run()
+        simulation_runner.write_results()
+        trajectory = Trajectory(os.path.join(str(tmpdir), 'test_history-trajectory'))
+        n_steps = simulation_runner.simulation.current_step + 1
+        assert trajectory.sender.shape == (n_steps, 3, 5)
+        assert trajectory.receiver.shape == (n_steps, 5, 3)
+        assert trajectory.steps.tolist() == list(range(n_steps))
+        assert trajectory.get_sender_values(n_steps - 1).tolist() == \
+            simulation_runner.simulation.get_current_sender_strategy().values.tolist()
+        assert trajectory.spec['dynamics']['type'] == 'replicator'
+        assert not os.path.exists(os.path.join(str(tmpdir), 'test_history-sender.csv'))
+
+    def test_constructor_replicates_argument(self, config_file_name):
+        simulation_runner = SimulationRunner([config_file_name, '--replicates=7'])
+        assert simulation_runner.args.replicates == 7
+        assert type(simulation_runner.simulation) is BatchSimulation
+        assert simulation_runner.simulation.n_replicates == 7
+
+    def test_constructor_non_positive_replicates_argument(self, config_file_name):
+        with pytest.raises(SystemExit):
+            SimulationRunner([config_file_name, '--replicates=0'])
+
+    def test_run_and_write_batch_results(self, config_file_name, tmpdir):
+        simulation_runner = SimulationRunner([config_file_name, '--replicates=4', '--max-steps=3',
+                                              '--output-prefix=test_batch', '--output-dir=%s' % str(tmpdir)])
+        simulation_runner.run()
+        assert simulation_runner.simulation.current_step <= 3
+        simulation_runner.write_results()
+        assert np.load(os.path.join(str(tmpdir), 'test_batch-sender.npy')).shape == (4, 3, 5)
+        assert np.load(os.path.join(str(tmpdir), 'test_batch-receiver.npy')).shape == (4, 5, 3)
+        assert os.path.isfile(os.path.join(str(tmpdir), 'test_batch-convergence.csv'))
+        with open(os.path.join(str(tmpdir), 'test_batch-summary.yml')) as summary_file:
+            summary = yaml.safe_load(summary_file)
+        assert summary['converged replicates'] == int(np.sum(simulation_runner.simulation.converged()))
+
+    def test_resume_from_checkpoint(self, config_file_name, tmpdir):
+        with open(config_file_name) as config_file:
+            spec = yaml.safe_load(config_file)
+        spec['metrics'] = ['expected utility', 'sender entropy']
+        config_file_name = str(tmpdir.join('test_resume_spec.yml'))
+        with open(config_file_name, 'w') as config_file:
+            yaml.safe_dump(spec, config_file)
+
+        def run(prefix, max_steps, *extra_args):
+            simulation_runner = SimulationRunner([config_file_name, '--batch', '--max-steps=%d' % max_steps,
+                                                  '--metrics-output=csv', '--output-prefix=%s' % prefix,
+                                                  '--output-dir=%s' % str(tmpdir)] + list(extra_args))
+            simulation_runner.run()
+            return simulation_runner.simulation
+
+        run('interrupted', 3, '--checkpoint-interval=0', '--seed=5')
+        assert os.path.isfile(os.path.join(str(tmpdir), 'interrupted-checkpoint.npz'))
+        resumed_simulation = run('interrupted', 6, '--resume')
+        simulation = run('uninterrupted', 6, '--seed=5')
+        assert resumed_simulation.current_step == simulation.current_step == 6
+        assert np.array_equal(resumed_simulation.get_current_sender_strategy().values,
+                              simulation.get_current_sender_strategy().values)
+        with open(os.path.join(str(tmpdir), 'interrupted-metrics.csv')) as resumed_metrics_file, \
+                open(os.path.join(str(tmpdir), 'uninterrupted-metrics.csv')) as metrics_file:
+            assert resumed_metrics_file.read() == metrics_file.read()
+
+    def test_resume_keeps_saved_trajectory(self, config_file_name, tmpdir):
+        def create_runner(prefix, max_steps, *extra_args):
+            return SimulationRunner([config_file_name, '--batch', '--seed=6', '--save-history',
+                                     '--max-steps=%d' % max_steps, '--output-prefix=%s' % prefix,
+                                     '--output-dir=%s' % str(tmpdir)] + list(extra_args))
+
+        killed_runner = create_runner('killed', 3, '--checkpoint-interval=0')
+        killed_runner.simulation.run_until_converged(max_steps=3, checkpointer=killed_runner.create_checkpointer())
+        killed_runner.simulation.step()
+        killed_runner.simulation.step()
+        assert Trajectory(os.path.join(str(tmpdir), 'killed-trajectory')).steps.tolist() == list(range(6))
+
+        resumed_runner = create_runner('killed', 5, '--resume')
+        resumed_runner.run()
+        resumed_runner.write_results()
+        uninterrupted_runner = create_runner('uninterrupted', 5)
+        uninterrupted_runner.run()
+        uninterrupted_runner.write_results()
+
+        trajectory = Trajectory(os.path.join(str(tmpdir), 'killed-trajectory'))
+        uninterrupted_trajectory = Trajectory(os.path.join(str(tmpdir), 'uninterrupted-trajectory'))
+        assert trajectory.steps.tolist() == uninterrupted_trajectory.steps.tolist() == list(range(6))
+        assert np.array_equal(trajectory.sender, uninterrupted_trajectory.sender)
+        assert np.array_equal(trajectory.receiver, uninterrupted_trajectory.receiver)
+
+    def test_resume_without_checkpoint(self, config_file_name, tmpdir):
+        with pytest.raises(SystemExit):
+            SimulationRunner([config_file_name, '--resume', '--output-dir=%s' % str(tmpdir)])
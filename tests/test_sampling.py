@@ -0,0 +1,47 @@
+import pytest
+
+from democritus.sampling import MetricSampler, EveryStepSampler, IntervalSampler, LogSpacedSampler, \
+    ConvergenceSampler
+
+
+def sampled_steps(sampler, n_steps):
+    return [step for step in range(n_steps) if sampler.samples(step)]
+
+
+class TestMetricSampler(object):
+    def test_samples_raises_exception(self):
+        with pytest.raises(NotImplementedError):
+            MetricSampler().samples(0)
+
+
+class TestEveryStepSampler(object):
+    def test_samples(self):
+        assert sampled_steps(EveryStepSampler(), 4) == [0, 1, 2, 3]
+
+
+class TestIntervalSampler(object):
+    def test_samples(self):
+        assert sampled_steps(IntervalSampler(3), 10) == [0, 3, 6, 9]
+
+    def test_constructor_non_positive_interval_raises_exception(self):
+        with pytest.raises(ValueError):
+            IntervalSampler(0)
+
+
+class TestLogSpacedSampler(object):
+    def test_samples(self):
+        assert sampled_steps(LogSpacedSampler(), 40) == [0, 1, 2, 4, 8, 16, 32]
+
+    def test_samples_with_factor(self):
+        assert sampled_steps(LogSpacedSampler(1.5), 20) == [0, 1, 2, 3, 5, 8, 12, 18]
+
+    def test_constructor_small_factor_raises_exception(self):
+        with pytest.raises(ValueError):
+            LogSpacedSampler(1)
+
+
+class TestConvergenceSampler(object):
+    def test_samples_only_at_end(self):
+        sampler = ConvergenceSampler()
+        assert sampled_steps(sampler, 10) == []
+        assert sampler.samples_at_end is True
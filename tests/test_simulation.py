@@ -1,12 +1,35 @@
 from collections import OrderedDict
 
+import numpy as np
 import pytest
 
-from democritus.metrics import ExpectedUtilityMetric, SenderNormalizedEntropyMetric, ReceiverNormalizedEntropyMetric
-from democritus.simulation import Simulation, SimulationMetricConverter, SimulationMeasurementsCollector
+from democritus import utils
+from democritus.acceleration import AndersonAcceleration
+from democritus.dynamics import QuantalResponseDynamics, ReplicatorDynamics, ContinuousReplicatorDynamics, \
+    BestResponseDynamics
+from democritus.exceptions import InvalidValueInSpecification
+from democritus.metrics import ExpectedUtilityMetric, SenderNormalizedEntropyMetric, ReceiverNormalizedEntropyMetric, \
+    MutualInformationMetric, CommunicativeSuccessMetric, CategoryConvexityMetric, CategoryConnectednessMetric
+from democritus.sampling import EveryStepSampler, IntervalSampler, LogSpacedSampler, ConvergenceSampler
+from democritus.simulation import Simulation, SimulationMetricConverter, SimulationMeasurementsCollector, \
+    MetricSamplerConverter, BatchSimulation, strategies_converged, calculate_metric_series
+from democritus.sinks import MetricSink
+from democritus.specification import Specification
 from democritus.types import SenderStrategy, ReceiverStrategy
 
 
+class ListMetricSink(MetricSink):
+    def __init__(self):
+        self.records = []
+        self.closed = False
+
+    def write(self, metric_name, step, value):
+        self.records.append((metric_name, step, value))
+
+    def close(self):
+        self.closed = True
+
+
 class TestSimulationMetricConverter(object):
     def test_create_expected_utility(self):
         metric = SimulationMetricConverter.create('expected utility')
@@ -24,11 +47,41 @@ class TestSimulationMetricConverter(object):
         metric = SimulationMetricConverter.create('receiver entropy')
         assert type(metric) is ReceiverNormalizedEntropyMetric
 
+    @pytest.mark.parametrize('name, metric_class', [('mutual information', MutualInformationMetric),
+                                                    ('communicative success', CommunicativeSuccessMetric),
+                                                    ('category convexity', CategoryConvexityMetric),
+                                                    ('category connectedness', CategoryConnectednessMetric)])
+    def test_create_information_and_category_metrics(self, name, metric_class):
+        assert type(SimulationMetricConverter.create(name)) is metric_class
+
     def test_create_unknown_metric_throws_exception(self):
         with pytest.raises(ValueError):
             SimulationMetricConverter.create('?????????????')
 
 
+class TestMetricSamplerConverter(object):
+    def test_create_from_name(self):
+        assert type(MetricSamplerConverter.create('every step')) is EveryStepSampler
+        assert type(MetricSamplerConverter.create('at convergence')) is ConvergenceSampler
+        assert type(MetricSamplerConverter.create('log-spaced')) is LogSpacedSampler
+
+    def test_create_interval(self):
+        sampler = MetricSamplerConverter.create(Specification.from_dict({'type': 'interval', 'interval': 5}))
+        assert type(sampler) is IntervalSampler
+        assert sampler.interval == 5
+
+    def test_create_log_spaced_with_factor(self):
+        sampler = MetricSamplerConverter.create(Specification.from_dict({'type': 'log-spaced', 'factor': 10}))
+        assert sampler.factor == 10
+
+    @pytest.mark.parametrize('sampling_spec', [{'type': '?????'}, {'type': 'interval', 'interval': 0},
+                                               {'type': 'interval', 'interval': 1.5},
+                                               {'type': 'log-spaced', 'factor': 1}])
+    def test_invalid_sampling_raises_exception(self, sampling_spec):
+        with pytest.raises(InvalidValueInSpecification):
+            MetricSamplerConverter.create(Specification.from_dict(sampling_spec))
+
+
 class TestSimulationMeasurementsCollector(object):
     def test_constructor_defaults(self):
         collector = SimulationMeasurementsCollector([])
@@ -57,6 +110,38 @@ class TestSimulationMeasurementsCollector(object):
         assert len(collector.get_measurements(ExpectedUtilityMetric.name)) == 1
         assert len(collector.get_measurements(SenderNormalizedEntropyMetric.name)) == 1
 
+    def test_constructor_with_sampling(self):
+        collector = SimulationMeasurementsCollector([{'name': 'Expected utility',
+                                                      'sampling': {'type': 'interval', 'interval': 2}},
+                                                     {'name': 'sender entropy'}])
+        assert type(collector.samplers['expected utility']) is IntervalSampler
+        assert type(collector.samplers['sender entropy']) is EveryStepSampler
+
+    def test_sampled_measurements(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        collector = SimulationMeasurementsCollector([{'name': 'expected utility', 'sampling': 'log-spaced'},
+                                                     {'name': 'sender entropy', 'sampling': 'at convergence'}])
+        simulation.measurements_collector = collector
+        for _ in range(5):
+            collector.calculate_all(simulation)
+            simulation.step()
+        collector.calculate_final(simulation)
+        collector.calculate_final(simulation)
+        assert collector.get_measurement_steps('expected utility') == [0, 1, 2, 4]
+        assert collector.get_measurement_steps('sender entropy') == [5]
+        assert len(collector.get_measurements('sender entropy')) == 1
+
+    def test_streams_measurements_to_sinks(self, converged_simulation):
+        sink = ListMetricSink()
+        collector = SimulationMeasurementsCollector([ExpectedUtilityMetric.name], sinks=[sink],
+                                                    keep_measurements=False)
+        collector.calculate_all(converged_simulation)
+        collector.close()
+        assert collector.get_measurements(ExpectedUtilityMetric.name) == []
+        assert collector.last_measurements['expected utility'][0] == 0
+        assert sink.records == [('expected utility', 0, collector.last_measurements['expected utility'][1])]
+        assert sink.closed is True
+
 
 class TestSimulation(object):
     def test_constructor_defaults(self, game, dynamics):
@@ -80,6 +165,18 @@ class TestSimulation(object):
         assert new_simulation.get_current_sender_strategy() == sender_strategy
         assert new_simulation.get_current_receiver_strategy() == receiver_strategy
 
+    def test_random_generator_makes_runs_reproducible(self, game):
+        simulations = [Simulation(game, BestResponseDynamics(tie_tolerance=1, tie_breaking='random'),
+                                  random_generator=np.random.default_rng(11)) for _ in range(2)]
+        for simulation in simulations:
+            assert simulation.dynamics.random_generator is simulation.random_generator
+            simulation.run_until_converged(max_steps=5)
+        assert simulations[0].current_step == simulations[1].current_step
+        assert np.array_equal(simulations[0].get_current_sender_strategy().values,
+                              simulations[1].get_current_sender_strategy().values)
+        assert np.array_equal(simulations[0].get_current_receiver_strategy().values,
+                              simulations[1].get_current_receiver_strategy().values)
+
     def test_step_generates_strategies_and_steps_forward(self, almost_converged_simulation_with_eu_metric):
         simulation = almost_converged_simulation_with_eu_metric
         initial_sender = simulation.get_current_sender_strategy()
@@ -132,3 +229,304 @@ class TestSimulation(object):
         assert simulation.converged() is False
         with pytest.raises(Exception):
             simulation.run_until_converged(max_steps=None)
+
+    def test_run_rationality_schedule(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        dynamics = QuantalResponseDynamics(1, [1, 5, 20])
+        simulation.dynamics = dynamics
+        simulation.run_until_converged(max_steps=50)
+        assert dynamics.rationality == 20
+        assert [rationality for rationality, step in simulation.rationality_path] == [1, 5, 20]
+        level_end_steps = [step for rationality, step in simulation.rationality_path]
+        assert level_end_steps == sorted(level_end_steps)
+        assert level_end_steps[-1] == simulation.current_step
+        assert simulation.converged() is True
+
+    def test_run_rationality_schedule_runs_every_level_at_least_once(self, converged_simulation):
+        simulation = converged_simulation
+        simulation.dynamics = QuantalResponseDynamics(10, [10, 10])
+        simulation.run_until_converged(max_steps=1)
+        assert simulation.current_step == 2
+        assert simulation.rationality_path == [(10, 1), (10, 2)]
+
+    def test_run_until_converged_with_accelerator(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        simulation.dynamics = ReplicatorDynamics()
+        simulation.accelerator = AndersonAcceleration()
+        simulation.run_until_converged(max_steps=100)
+        assert simulation.converged() is True
+        assert np.allclose(np.sum(simulation.get_current_sender_strategy().values, axis=-1), 1)
+        assert np.all(simulation.get_current_receiver_strategy().values >= 0)
+
+    def test_run_until_converged_continuous_replicator(self, almost_converged_simulation_with_eu_metric):
+        simulation = almost_converged_simulation_with_eu_metric
+        simulation.dynamics = ContinuousReplicatorDynamics(time_step=10)
+        simulation.run_until_converged(max_steps=100)
+        assert simulation.converged() is True
+        measurements = simulation.measurements_collector.get_measurements(ExpectedUtilityMetric.name)
+        assert len(measurements) == simulation.current_step + 1
+        assert measurements[-1] == pytest.approx(1, abs=1e-3)
+
+    def test_run_until_converged_samples_at_convergence(self, game, dynamics):
+        sender_strategy = SenderStrategy(game.states, game.messages, [[0.9, 0.1], [0.05, 0.95]])
+        receiver_strategy = ReceiverStrategy(game.messages, game.actions, [[0.95, 0.05], [0.13, 0.87]])
+        simulation = Simulation(game, dynamics, [{'name': 'expected utility', 'sampling': 'at convergence'}],
+                                sender_strategy=sender_strategy, receiver_strategy=receiver_strategy)
+        assert simulation.measurements_collector.get_measurements('expected utility') == []
+        simulation.run_until_converged()
+        assert simulation.measurements_collector.get_measurement_steps('expected utility') == \
+            [simulation.current_step]
+        assert simulation.measurements_collector.get_measurements('expected utility') == [pytest.approx(1)]
+
+    def test_step_without_history_keeps_two_strategies(self, game, dynamics):
+        sender_strategy = SenderStrategy(game.states, game.messages, [[0.9, 0.1], [0.05, 0.95]])
+        receiver_strategy = ReceiverStrategy(game.messages, game.actions, [[0.95, 0.05], [0.13, 0.87]])
+        simulation = Simulation(game, dynamics, sender_strategy=sender_strategy,
+                                receiver_strategy=receiver_strategy, history_policy='none')
+        simulation.step()
+        simulation.step()
+        recycled_sender_values = simulation.get_sender_strategy(1).values
+        simulation.step()
+        assert simulation.current_step == 3
+        assert len(simulation.sender_strategies) == 2
+        assert len(simulation.receiver_strategies) == 2
+        assert simulation.get_current_sender_strategy().values is recycled_sender_values
+        assert sender_strategy.values.tolist() == [[0.9, 0.1], [0.05, 0.95]]
+        with pytest.raises(IndexError):
+            simulation.get_sender_strategy(1)
+
+    def test_step_with_full_history_does_not_reuse_returned_strategies(self, game):
+        simulation = Simulation(game, ReplicatorDynamics())
+        sender_strategy = simulation.get_current_sender_strategy()
+        sender_values = sender_strategy.values.tolist()
+        for _ in range(3):
+            simulation.step()
+        assert sender_strategy.values.tolist() == sender_values
+        assert simulation.get_current_sender_strategy() is not sender_strategy
+
+    def test_history(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        simulation.step()
+        simulation.step()
+        assert simulation.get_kept_steps().tolist() == [0, 1, 2]
+        assert simulation.get_sender_history().shape == (3, 2, 2)
+        assert simulation.get_receiver_history()[1].tolist() == simulation.get_receiver_strategy(1).values.tolist()
+
+    def test_history_without_keeping_history(self, game, dynamics):
+        simulation = Simulation(game, dynamics, history_policy='none')
+        for _ in range(3):
+            simulation.step()
+        assert simulation.get_kept_steps().tolist() == [2, 3]
+        assert simulation.get_sender_history().shape == (2, 2, 2)
+
+    def test_history_keeping_last_steps(self, game, dynamics):
+        simulation = Simulation(game, dynamics, history_policy='last', history_size=3)
+        for _ in range(5):
+            simulation.step()
+        assert simulation.get_kept_steps().tolist() == [3, 4, 5]
+        assert simulation.get_sender_strategy(3).values.tolist() == simulation.get_sender_history()[0].tolist()
+        with pytest.raises(IndexError):
+            simulation.get_sender_strategy(2)
+
+    def test_history_keeping_every_nth_step(self, game, dynamics):
+        simulation = Simulation(game, dynamics, history_policy='every', history_interval=2)
+        for _ in range(5):
+            simulation.step()
+        assert simulation.get_kept_steps().tolist() == [0, 2, 4, 5]
+        assert len(simulation.sender_strategies) == 4
+        assert simulation.sender_strategies[-1] is simulation.get_current_sender_strategy()
+        assert simulation.get_receiver_history().shape == (4, 2, 2)
+
+    @pytest.mark.parametrize('history_policy, history_size, history_interval', [
+        ('all', None, None), ('last', 2, None), ('every', None, 2), ('every', None, 3), ('none', None, None)])
+    def test_history_matches_kept_strategies(self, game, history_policy, history_size, history_interval):
+        simulation = Simulation(game, ReplicatorDynamics(), history_policy=history_policy, history_size=history_size,
+                                history_interval=history_interval)
+        for _ in range(4):
+            simulation.step()
+        expected_sender_history = [simulation.get_sender_strategy(step).values for step in simulation.get_kept_steps()]
+        expected_receiver_history = [simulation.get_receiver_strategy(step).values
+                                     for step in simulation.get_kept_steps()]
+        assert np.allclose(simulation.get_sender_history(), expected_sender_history, rtol=0, atol=1e-12)
+        assert np.allclose(simulation.get_receiver_history(), expected_receiver_history, rtol=0, atol=1e-12)
+
+    def test_history_is_not_copied_when_all_steps_are_kept(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        simulation.step()
+        assert np.shares_memory(simulation.get_sender_history(), simulation.sender_history.values)
+
+    def test_get_strategy_relative_to_current_step(self, almost_converged_simulation):
+        simulation = almost_converged_simulation
+        simulation.step()
+        assert simulation.get_sender_strategy(-1) is simulation.get_current_sender_strategy()
+        assert simulation.get_receiver_strategy(-2).values.tolist() == \
+            simulation.get_receiver_strategy(0).values.tolist()
+        with pytest.raises(IndexError):
+            simulation.get_sender_strategy(2)
+
+    @pytest.mark.parametrize('history_policy', ['all', 'last', 'every', 'none'])
+    def test_converged_under_history_policy(self, game, history_policy):
+        sender_strategy = SenderStrategy(game.states, game.messages, [[0.9, 0.1], [0.05, 0.95]])
+        receiver_strategy = ReceiverStrategy(game.messages, game.actions, [[0.95, 0.05], [0.13, 0.87]])
+        simulation = Simulation(game, ReplicatorDynamics(), ['expected utility'], sender_strategy=sender_strategy,
+                                receiver_strategy=receiver_strategy, history_policy=history_policy, history_size=3,
+                                history_interval=4)
+        simulation.run_until_converged()
+        assert simulation.converged()
+        assert simulation.measurements_collector.get_measurements('expected utility')[-1] == \
+            pytest.approx(1, abs=1e-3)
+
+    def test_step_renews_context(self, almost_converged_simulation_with_eu_metric):
+        simulation = almost_converged_simulation_with_eu_metric
+        context = simulation.context
+        assert 'sender expected utility' in context.quantities
+        simulation.step()
+        assert simulation.context is not context
+        assert simulation.context.sender_values is simulation.get_current_sender_strategy().values
+        assert simulation.context.receiver_values is simulation.get_current_receiver_strategy().values
+
+    def test_run_until_converged_without_history(self, game, dynamics):
+        sender_strategy = SenderStrategy(game.states, game.messages, [[0.9, 0.1], [0.05, 0.95]])
+        receiver_strategy = ReceiverStrategy(game.messages, game.actions, [[0.95, 0.05], [0.13, 0.87]])
+        simulation_with_history = Simulation(game, ReplicatorDynamics(), sender_strategy=sender_strategy,
+                                             receiver_strategy=receiver_strategy)
+        simulation_without_history = Simulation(game, ReplicatorDynamics(), sender_strategy=sender_strategy,
+                                                receiver_strategy=receiver_strategy, history_policy='none')
+        simulation_with_history.run_until_converged()
+        simulation_without_history.run_until_converged()
+        assert simulation_without_history.current_step == simulation_with_history.current_step
+        assert simulation_without_history.get_current_sender_strategy().values.tolist() == \
+            simulation_with_history.get_current_sender_strategy().values.tolist()
+        assert simulation_without_history.get_current_receiver_strategy().values.tolist() == \
+            simulation_with_history.get_current_receiver_strategy().values.tolist()
+
+
+def test_calculate_metric_series(almost_converged_simulation_with_eu_metric):
+    simulation = almost_converged_simulation_with_eu_metric
+    simulation.run_until_converged(max_steps=5)
+    series = calculate_metric_series(['Expected utility', 'sender entropy'], simulation.get_sender_history(),
+                                     simulation.get_receiver_history(), simulation.game)
+    assert list(series.keys()) == ['expected utility', 'sender entropy']
+    assert np.allclose(series['expected utility'],
+                       simulation.measurements_collector.get_measurements('expected utility'))
+    assert series['sender entropy'].shape == (simulation.current_step + 1,)
+
+
+def test_strategies_converged():
+    previous_values = np.array([[[1, 0], [0, 1]], [[1, 0], [0, 1]]])
+    values = np.array([[[0.999, 0.001], [0, 1]], [[0.5, 0.5], [0, 1]]])
+    assert strategies_converged(previous_values, previous_values, values, values).tolist() == [True, False]
+
+
+class TestBatchSimulation(object):
+    def test_constructor_defaults(self, game, dynamics):
+        simulation = BatchSimulation(game, dynamics, 5)
+        assert simulation.current_step == 0
+        assert simulation.sender_strategies.shape == (5, 2, 2)
+        assert simulation.receiver_strategies.shape == (5, 2, 2)
+        assert np.allclose(np.sum(simulation.sender_strategies, axis=-1), 1)
+        assert simulation.converged().tolist() == [False] * 5
+        assert type(simulation.get_sender_strategy(0)) is SenderStrategy
+        assert type(simulation.get_receiver_strategy(4)) is ReceiverStrategy
+
+    def test_constructor_incorrect_dimensions_raises_exception(self, game, dynamics):
+        with pytest.raises(ValueError):
+            BatchSimulation(game, dynamics, 3, sender_strategies=np.ones((2, 2, 2)))
+
+    def test_constructor_incorrect_number_of_random_generators_raises_exception(self, game, dynamics):
+        with pytest.raises(ValueError):
+            BatchSimulation(game, dynamics, 3, random_generators=utils.spawn_random_generators(1, 2))
+
+    def test_replicates_match_simulations_with_spawned_generators(self, game, dynamics):
+        batch_simulation = BatchSimulation(game, dynamics, 3, random_generators=utils.spawn_random_generators(7, 3))
+        for replicate in range(3):
+            simulation = Simulation(game, dynamics, random_generator=utils.spawned_random_generator(7, replicate))
+            assert np.array_equal(batch_simulation.sender_strategies[replicate],
+                                  simulation.get_current_sender_strategy().values)
+            assert np.array_equal(batch_simulation.receiver_strategies[replicate],
+                                  simulation.get_current_receiver_strategy().values)
+
+    def test_random_generators_break_ties_when_dynamics_has_none(self, game):
+        dynamics = BestResponseDynamics(tie_tolerance=1, tie_breaking='random')
+        simulation = BatchSimulation(game, dynamics, 3, random_generators=utils.spawn_random_generators(7, 3))
+        assert type(dynamics.random_generator) is utils.ReplicateRandomGenerators
+        simulation.run_until_converged(max_steps=5)
+        assert simulation.current_step == 5
+
+    def test_sequential_best_response_converges(self, game):
+        sender_strategies = np.array([[[0.9, 0.1], [0.6, 0.4]]])
+        receiver_strategies = np.array([[[0.1, 0.9], [0.8, 0.2]]])
+        simultaneous_simulation = BatchSimulation(game, BestResponseDynamics(), 1, sender_strategies,
+                                                  receiver_strategies)
+        sequential_simulation = BatchSimulation(game, BestResponseDynamics(update_schedule='sender first'), 1,
+                                                sender_strategies, receiver_strategies)
+        simultaneous_simulation.run_until_converged(max_steps=20)
+        sequential_simulation.run_until_converged(max_steps=20)
+        assert simultaneous_simulation.converged().tolist() == [False]
+        assert sequential_simulation.converged().tolist() == [True]
+
+    def test_step_matches_individual_simulations(self, game, dynamics):
+        sender_strategies = np.array([[[0.9, 0.1], [0.05, 0.95]], [[0, 1], [0.5, 0.5]]])
+        receiver_strategies = np.array([[[0.95, 0.05], [0.13, 0.87]], [[0.1, 0.9], [0.1, 0.9]]])
+        batch_simulation = BatchSimulation(game, dynamics, 2, sender_strategies, receiver_strategies)
+        batch_simulation.step()
+        for replicate in range(2):
+            simulation = Simulation(game, dynamics,
+                                    sender_strategy=SenderStrategy(game.states, game.messages,
+                                                                   sender_strategies[replicate]),
+                                    receiver_strategy=ReceiverStrategy(game.messages, game.actions,
+                                                                       receiver_strategies[replicate]))
+            simulation.step()
+            assert np.allclose(batch_simulation.sender_strategies[replicate],
+                               simulation.get_current_sender_strategy().values)
+            assert np.allclose(batch_simulation.receiver_strategies[replicate],
+                               simulation.get_current_receiver_strategy().values)
+
+    def test_run_until_converged_masks_converged_replicates(self, game, dynamics):
+        # first replicate is almost converged, second flip-flops under best response
+        sender_strategies = np.array([[[0.9, 0.1], [0.05, 0.95]], [[1, 0], [0, 1]]])
+        receiver_strategies = np.array([[[0.95, 0.05], [0.13, 0.87]], [[0, 1], [1, 0]]])
+        simulation = BatchSimulation(game, dynamics, 2, sender_strategies, receiver_strategies)
+        simulation.run_until_converged(max_steps=50)
+        assert simulation.current_step == 50
+        assert simulation.converged().tolist() == [True, False]
+        assert simulation.convergence_steps.tolist() == [2, -1]
+        assert simulation.sender_strategies[0].tolist() == [[1, 0], [0, 1]]
+
+    def test_run_until_converged_stops_when_all_converged(self, game, dynamics):
+        sender_strategies = np.array([[[0.9, 0.1], [0.05, 0.95]]] * 3)
+        receiver_strategies = np.array([[[0.95, 0.05], [0.13, 0.87]]] * 3)
+        simulation = BatchSimulation(game, dynamics, 3, sender_strategies, receiver_strategies)
+        simulation.run_until_converged()
+        assert simulation.current_step == 2
+        assert simulation.convergence_steps.tolist() == [2, 2, 2]
+
+    def test_run_rationality_schedule_matches_individual_simulation(self, game):
+        sender_strategies = np.array([[[0.9, 0.1], [0.05, 0.95]]])
+        receiver_strategies = np.array([[[0.95, 0.05], [0.13, 0.87]]])
+        batch_simulation = BatchSimulation(game, QuantalResponseDynamics(1, [1, 5, 20]), 1, sender_strategies,
+                                           receiver_strategies)
+        simulation = Simulation(game, QuantalResponseDynamics(1, [1, 5, 20]),
+                                sender_strategy=SenderStrategy(game.states, game.messages, sender_strategies[0]),
+                                receiver_strategy=ReceiverStrategy(game.messages, game.actions,
+                                                                   receiver_strategies[0]))
+        batch_simulation.run_until_converged(max_steps=50)
+        simulation.run_until_converged(max_steps=50)
+        assert batch_simulation.dynamics.rationality == 20
+        assert batch_simulation.rationality_path == simulation.rationality_path
+        assert batch_simulation.converged().tolist() == [simulation.converged()]
+        assert np.allclose(batch_simulation.sender_strategies[0], simulation.get_current_sender_strategy().values)
+
+    def test_run_rationality_schedule_runs_every_level_at_least_once(self, game):
+        sender_strategies = np.array([[[1, 0], [0, 1]]] * 2)
+        receiver_strategies = np.array([[[1, 0], [0, 1]]] * 2)
+        simulation = BatchSimulation(game, QuantalResponseDynamics(10, [10, 10]), 2, sender_strategies,
+                                     receiver_strategies)
+        simulation.run_until_converged(max_steps=1)
+        assert simulation.current_step == 2
+        assert simulation.rationality_path == [(10, 1), (10, 2)]
+
+    def test_run_until_converged_with_none_max_steps_throws_exception(self, game, dynamics):
+        simulation = BatchSimulation(game, dynamics, 2)
+        with pytest.raises(TypeError):
+            simulation.run_until_converged(max_steps=None)
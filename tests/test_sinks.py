@@ -0,0 +1,38 @@
+import csv
+import json
+
+import numpy as np
+import pytest
+
+from democritus.sinks import MetricSink, CSVMetricSink, JSONLinesMetricSink
+
+
+class TestMetricSink(object):
+    def test_write_raises_exception(self):
+        with pytest.raises(NotImplementedError):
+            MetricSink().write('expected utility', 0, 0.5)
+
+
+class TestCSVMetricSink(object):
+    def test_write(self, tmpdir):
+        file_name = str(tmpdir.join('metrics.csv'))
+        sink = CSVMetricSink(file_name)
+        sink.write('expected utility', 0, np.float64(0.25))
+        sink.write('sender entropy', 2, 1)
+        sink.close()
+        with open(file_name) as metrics_file:
+            rows = list(csv.reader(metrics_file))
+        assert rows == [['step', 'metric', 'value'], ['0', 'expected utility', '0.25'], ['2', 'sender entropy', '1.0']]
+
+
+class TestJSONLinesMetricSink(object):
+    def test_write(self, tmpdir):
+        file_name = str(tmpdir.join('metrics.jsonl'))
+        sink = JSONLinesMetricSink(file_name)
+        sink.write('expected utility', 0, np.float64(0.25))
+        sink.write('expected utility', 1, 0.5)
+        sink.close()
+        with open(file_name) as metrics_file:
+            records = [json.loads(line) for line in metrics_file]
+        assert records == [{'step': 0, 'metric': 'expected utility', 'value': 0.25},
+                           {'step': 1, 'metric': 'expected utility', 'value': 0.5}]
@@ -0,0 +1,72 @@
+from __future__ import division
+
+import os
+
+import numpy as np
+import pytest
+
+from democritus.simulation import Simulation
+from democritus.specification import Specification
+from democritus.store import ResultStore, run_record, simulation_record, read_results
+
+
+def create_record(run, decay, spec=None):
+    return run_record(spec, 12, np.full((2, 3), run / 10), np.eye(3, 2), run + 1, run % 2 == 0,
+                      {'expected utility': 0.5}, {'game.similarity.decay': decay}, run)
+
+
+class TestResultStore(object):
+    def test_writes_in_batches(self, tmpdir):
+        store = ResultStore(str(tmpdir), name='test', batch_size=2)
+        for run in range(3):
+            store.append(create_record(run, 1))
+        assert sorted(os.listdir(str(tmpdir))) == ['test-00000.parquet']
+        store.close()
+        assert sorted(os.listdir(str(tmpdir))) == ['test-00000.parquet', 'test-00001.parquet']
+        assert read_results(str(tmpdir))['run'].tolist() == [0, 1, 2]
+
+    def test_non_positive_batch_size_raises_exception(self, tmpdir):
+        with pytest.raises(ValueError):
+            ResultStore(str(tmpdir), batch_size=0)
+
+    def test_read_results_without_strategies(self, tmpdir):
+        store = ResultStore(str(tmpdir))
+        store.append(create_record(0, 1, Specification.from_dict({'dynamics': {'type': 'replicator'}})))
+        store.close()
+        results = read_results(str(tmpdir))
+        assert list(results.columns) == ['run', 'seed', 'game.similarity.decay', 'steps', 'converged',
+                                         'expected utility', 'spec']
+        assert results.loc[0, 'seed'] == '12'
+        assert 'replicator' in results.loc[0, 'spec']
+
+    def test_read_results_with_strategies(self, tmpdir):
+        store = ResultStore(str(tmpdir))
+        store.append(create_record(3, 1))
+        store.close()
+        results = read_results(str(tmpdir), strategies=True)
+        assert np.array_equal(results.loc[0, 'sender'], np.full((2, 3), 0.3))
+        assert np.array_equal(results.loc[0, 'receiver'], np.eye(3, 2))
+
+    def test_read_results_filters_by_parameter_across_writers(self, tmpdir):
+        for run, decay in enumerate([1, 0.5, 2]):
+            store = ResultStore(str(tmpdir))
+            store.append(create_record(run, decay))
+            store.close()
+        results = read_results(str(tmpdir), where={'game.similarity.decay': [0.5, 2], 'seed': 12},
+                               columns=['run', 'game.similarity.decay'])
+        assert sorted(results['run'].tolist()) == [1, 2]
+        assert sorted(results['game.similarity.decay'].tolist()) == [0.5, 2.0]
+
+    def test_read_results_from_empty_store_raises_exception(self, tmpdir):
+        with pytest.raises(ValueError):
+            read_results(str(tmpdir))
+
+
+def test_simulation_record(game, dynamics):
+    simulation = Simulation(game, dynamics, ['expected utility'], random_generator=np.random.default_rng(1))
+    simulation.run_until_converged(max_steps=5)
+    record = simulation_record(simulation, None, 1, run=4)
+    assert record['run'] == 4
+    assert record['steps'] == simulation.current_step
+    assert record['converged'] == simulation.converged()
+    assert record['expected utility'] == simulation.measurements_collector.last_measurements['expected utility'][1]
@@ -0,0 +1,177 @@
+import os
+
+import numpy as np
+import pandas
+import pytest
+import yaml
+
+from democritus.cache import ResultCache, result_key
+from democritus.converters import SimulationSpecReader
+from democritus.exceptions import InvalidValueInSpecification, MissingFieldInSpecification
+from democritus.runner import SimulationRunner
+from democritus.specification import Specification
+from democritus.store import ResultStore, read_results
+from democritus.sweep import SweepReader, apply_overrides, point_seed_sequence, run_sweep, run_sweep_point
+from democritus.trajectory import plain_data
+
+
+@pytest.fixture(name='sweep_spec')
+def fixture_sweep_spec():
+    return Specification.from_dict({
+        'game': {'type': 'sim-max',
+                 'states': {'type': 'metric space',
+                            'elements': {'type': 'numeric range', 'size': 5},
+                            'metric': {'type': 'euclidean'}},
+                 'messages': {'elements': {'type': 'numbered labels', 'size': 2}},
+                 'similarity': {'type': 'nosofsky', 'decay': 1}},
+        'dynamics': {'type': 'replicator'},
+        'metrics': ['expected utility'],
+        'sweep': {'parameters': {'game.similarity.decay': [0.5, 2],
+                                 'game.messages.elements.size': [2, 3, 4]}}})
+
+
+class TestSweepReader(object):
+    def test_grid(self):
+        sweep_spec = Specification.from_dict({'parameters': {'b': [1, 2], 'a': ['x', 'y', 'z']}})
+        points = SweepReader.read(sweep_spec)
+        assert len(points) == 6
+        assert list(points[0].items()) == [('a', 'x'), ('b', 1)]
+        assert list(points[-1].items()) == [('a', 'z'), ('b', 2)]
+
+    def test_list(self):
+        sweep_spec = Specification.from_dict({'type': 'list', 'runs': [{'b': 1, 'a': 2}, {'a': 3}]})
+        points = SweepReader.read(sweep_spec)
+        assert [list(point.items()) for point in points] == [[('a', 2), ('b', 1)], [('a', 3)]]
+
+    def test_grid_missing_parameters_raises_exception(self):
+        with pytest.raises(MissingFieldInSpecification):
+            SweepReader.read(Specification.empty())
+
+    def test_grid_empty_values_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            SweepReader.read(Specification.from_dict({'parameters': {'a': []}}))
+
+    def test_unknown_type_raises_exception(self):
+        with pytest.raises(InvalidValueInSpecification):
+            SweepReader.read(Specification.from_dict({'type': '???????'}))
+
+
+def test_apply_overrides(sweep_spec):
+    spec = apply_overrides(sweep_spec, {'game.similarity.decay': 4, 'dynamics.acceleration.type': 'anderson'})
+    assert spec['game']['similarity']['decay'] == 4
+    assert spec['dynamics']['acceleration']['type'] == 'anderson'
+    assert spec['history']['type'] == 'none'
+    assert 'sweep' not in spec
+    assert sweep_spec['game']['similarity']['decay'] == 1
+    assert 'acceleration' not in sweep_spec['dynamics']
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_run_sweep(sweep_spec, workers):
+    results = run_sweep(sweep_spec, max_steps=5, workers=workers)
+    assert list(results.index.names) == ['game.messages.elements.size', 'game.similarity.decay']
+    assert len(results) == 6
+    assert list(results.columns) == ['steps', 'converged', 'expected utility']
+    assert (results['steps'] <= 5).all()
+    assert results.loc[(3, 0.5), 'expected utility'] > 0
+
+
+def test_run_sweep_point_keeps_only_last_measurements(sweep_spec, monkeypatch):
+    simulations = []
+    read = SimulationSpecReader.read
+
+    def read_and_capture(*args, **kwargs):
+        simulations.append(read(*args, **kwargs))
+        return simulations[-1]
+
+    monkeypatch.setattr(SimulationSpecReader, 'read', staticmethod(read_and_capture))
+    result, _, _ = run_sweep_point((sweep_spec, {'game.similarity.decay': 2}, 5, np.random.SeedSequence(1)))
+    collector = simulations[0].measurements_collector
+    assert collector.get_measurements('expected utility') == []
+    assert result['expected utility'] == collector.last_measurements['expected utility'][1]
+
+
+def test_run_sweep_shard(sweep_spec):
+    results = run_sweep(sweep_spec, max_steps=3, workers=1, seed=8)
+    shard_results = run_sweep(sweep_spec, max_steps=3, workers=1, seed=8, shard=(1, 4))
+    assert shard_results.equals(results.iloc[[1, 5]])
+
+
+def test_run_sweep_is_reproducible_with_seed(sweep_spec):
+    results = run_sweep(sweep_spec, max_steps=3, workers=1, seed=8)
+    assert results.equals(run_sweep(sweep_spec, max_steps=3, workers=2, seed=8))
+
+
+def test_run_sweep_with_store(sweep_spec, tmpdir):
+    store = ResultStore(str(tmpdir), batch_size=4)
+    results = run_sweep(sweep_spec, max_steps=3, workers=1, seed=8, store=store)
+    assert len(os.listdir(str(tmpdir))) == 2
+    stored_results = read_results(str(tmpdir), where={'game.similarity.decay': 2}, strategies=True)
+    assert stored_results['run'].tolist() == [1, 3, 5]
+    assert stored_results['seed'].tolist() == ['8'] * 3
+    assert [sender.shape for sender in stored_results['sender']] == [(5, 2), (5, 3), (5, 4)]
+    expected_utility = results.xs(2, level='game.similarity.decay')['expected utility']
+    assert stored_results['expected utility'].tolist() == expected_utility.tolist()
+
+
+def test_run_sweep_gives_duplicate_points_their_own_streams(sweep_spec, tmpdir):
+    sweep_spec['sweep'] = Specification.from_dict({'type': 'list', 'runs': [{'game.similarity.decay': 2},
+                                                                            {'game.similarity.decay': 4},
+                                                                            {'game.similarity.decay': 2}]})
+    run_sweep(sweep_spec, max_steps=1, workers=1, seed=8, store=ResultStore(str(tmpdir.join('all'))))
+    run_sweep(sweep_spec, max_steps=1, workers=1, seed=8, store=ResultStore(str(tmpdir.join('shard'))),
+              shard=(0, 2))
+    stored_results = read_results(str(tmpdir.join('all')), strategies=True).sort_values('run')
+    shard_results = read_results(str(tmpdir.join('shard')), strategies=True).sort_values('run')
+    assert stored_results['run'].tolist() == [0, 1, 2]
+    assert not np.array_equal(stored_results['sender'].iloc[0], stored_results['sender'].iloc[2])
+    assert shard_results['run'].tolist() == [0, 2]
+    assert np.array_equal(shard_results['sender'].iloc[1], stored_results['sender'].iloc[2])
+
+
+def test_run_sweep_reuses_cached_points(sweep_spec, tmpdir):
+    cache = ResultCache(str(tmpdir))
+    results = run_sweep(sweep_spec, max_steps=3, workers=1, seed=8, cache=cache)
+    assert len(cache.entry_file_names()) == 6
+    overrides = {'game.messages.elements.size': 3, 'game.similarity.decay': 2}
+    seed_sequence = point_seed_sequence(np.random.SeedSequence(8), overrides)
+    key = result_key(apply_overrides(sweep_spec, overrides), seed_sequence, 3)
+    cached_result, sender_values, receiver_values = cache.get(key)
+    cached_result['steps'] = 99
+    cache.put(key, (cached_result, sender_values, receiver_values))
+
+    sweep_spec['sweep']['parameters']['game.similarity.decay'].append(4)
+    extended_results = run_sweep(sweep_spec, max_steps=3, workers=1, seed=8, cache=cache)
+    assert len(cache.entry_file_names()) == 9
+    assert extended_results.loc[(3, 2), 'steps'] == 99
+    assert extended_results.loc[(2, 0.5), 'expected utility'] == results.loc[(2, 0.5), 'expected utility']
+
+
+def test_runner_sweep(sweep_spec, tmpdir):
+    config_file_name = str(tmpdir.join('sweep.yml'))
+    with open(config_file_name, 'w') as config_file:
+        yaml.safe_dump(plain_data(sweep_spec), config_file)
+    simulation_runner = SimulationRunner([config_file_name, '--max-steps=3', '--workers=2', '--output-prefix=test',
+                                          '--output-dir=%s' % str(tmpdir)])
+    assert simulation_runner.simulation is None
+    simulation_runner.run()
+    simulation_runner.write_results()
+    results = pandas.read_csv(os.path.join(str(tmpdir), 'test-sweep.csv'))
+    assert len(results) == 6
+    assert 'expected utility' in results.columns
+
+
+def test_runner_sweep_with_cache(sweep_spec, tmpdir):
+    config_file_name = str(tmpdir.join('sweep.yml'))
+    with open(config_file_name, 'w') as config_file:
+        yaml.safe_dump(plain_data(sweep_spec), config_file)
+    cache_directory = str(tmpdir.join('cache'))
+    for prefix in ['first', 'second']:
+        simulation_runner = SimulationRunner([config_file_name, '--max-steps=3', '--workers=1', '--seed=3',
+                                              '--cache-dir=%s' % cache_directory, '--cache-size=1',
+                                              '--output-prefix=%s' % prefix, '--output-dir=%s' % str(tmpdir)])
+        simulation_runner.run()
+        simulation_runner.write_results()
+    assert len(ResultCache(cache_directory).entry_file_names()) == 6
+    first_results = pandas.read_csv(os.path.join(str(tmpdir), 'first-sweep.csv'))
+    assert first_results.equals(pandas.read_csv(os.path.join(str(tmpdir), 'second-sweep.csv')))
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from democritus.simulation import Simulation
+from democritus.specification import Specification
+from democritus.trajectory import Trajectory
+
+
+class TestTrajectory(object):
+    def test_simulation_writes_trajectory(self, game, dynamics, tmpdir):
+        directory = str(tmpdir.join('trajectory'))
+        spec = Specification.from_dict({'dynamics': {'type': 'replicator'}, 'metrics': ['expected utility']})
+        simulation = Simulation(game, dynamics, history_directory=directory, spec=spec)
+        for _ in range(3):
+            simulation.step()
+        simulation.close_history()
+        trajectory = Trajectory(directory)
+        assert len(trajectory) == 4
+        assert isinstance(trajectory.sender, np.memmap)
+        assert trajectory.steps.tolist() == [0, 1, 2, 3]
+        assert trajectory.get_receiver_values(2).tolist() == simulation.get_receiver_strategy(2).values.tolist()
+        assert trajectory.metadata['states'] == 2
+        assert trajectory.spec == spec
+        assert trajectory.game_arrays['priors'].tolist() == game.states.priors.tolist()
+
+    def test_trajectory_of_unfinished_run(self, game, dynamics, tmpdir):
+        directory = str(tmpdir.join('trajectory'))
+        simulation = Simulation(game, dynamics, history_directory=directory)
+        for _ in range(20):
+            simulation.step()
+        trajectory = Trajectory(directory)
+        assert trajectory.steps.tolist() == list(range(21))
+        assert len(trajectory.sender) == 21
+        assert trajectory.get_sender_values(20).tolist() == simulation.get_current_sender_strategy().values.tolist()
+
+    def test_trajectory_keeping_every_nth_step(self, game, dynamics, tmpdir):
+        directory = str(tmpdir.join('trajectory'))
+        simulation = Simulation(game, dynamics, history_policy='every', history_interval=2,
+                                history_directory=directory)
+        for _ in range(5):
+            simulation.step()
+        simulation.close_history()
+        trajectory = Trajectory(directory)
+        assert trajectory.steps.tolist() == [0, 2, 4]
+        assert trajectory.spec is None
+        with pytest.raises(IndexError):
+            trajectory.get_sender_values(3)
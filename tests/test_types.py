@@ -2,9 +2,10 @@ from __future__ import division
 
 import numpy as np
 import pytest
+from scipy import sparse
 
-from democritus.types import ElementSet, BivariateFunction, SenderStrategy, \
-    ReceiverStrategy, ElementSetWithPriors, MetricSpace
+from democritus.types import ElementSet, BivariateFunction, SparseBivariateFunction, SenderStrategy, \
+    ReceiverStrategy, ElementSetWithPriors, MetricSpace, NeighbourStructure
 
 
 class TestElementSet(object):
@@ -92,6 +93,23 @@ class TestMetricSpace(object):
         assert metric_space.distance('c', 'b') == 1
         assert metric_space.distance('a', 'c') == 2
 
+    def test_neighbour_structure_is_cached(self):
+        metric_space = MetricSpace(['a', 'b', 'c'], [[0, 1, 2], [1, 0, 1], [2, 1, 0]])
+        assert metric_space.neighbour_structure() is metric_space.neighbour_structure()
+
+
+class TestNeighbourStructure(object):
+    def test_line(self):
+        neighbours = NeighbourStructure(np.array([[abs(x - y) for y in range(4)] for x in range(4)]))
+        assert neighbours.radius == 1
+        assert neighbours.adjacency.toarray().tolist() == [[0, 1, 0, 0], [1, 0, 1, 0], [0, 1, 0, 1], [0, 0, 1, 0]]
+        assert neighbours.between_triples.T.tolist() == [[0, 1, 2], [1, 2, 3]]
+
+    def test_radius_is_largest_nearest_neighbour_distance(self):
+        neighbours = NeighbourStructure(np.array([[0, 1, 3], [1, 0, 2], [3, 2, 0]]))
+        assert neighbours.radius == 2
+        assert neighbours.between_triples.T.tolist() == [[0, 1, 2]]
+
 
 class TestBivariateFunction(object):
     def test_constructor(self):
@@ -115,6 +133,34 @@ class TestBivariateFunction(object):
         assert func.values[1].tolist() == [0.25, 0.75]
         assert func.values[2].tolist() == [0.2, 0.8]
 
+    def test_array_conversion_honours_copy(self):
+        func = BivariateFunction([[0.0, 1.0], [0.3, 0.7]])
+        snapshot = np.array(func)
+        func.values[0, 0] = 0.5
+        assert snapshot[0, 0] == 0.0
+        assert np.asarray(func) is func.values
+        assert np.asarray(func, dtype=np.float32).dtype == np.float32
+
+
+class TestSparseBivariateFunction(object):
+    def test_constructor(self):
+        func = SparseBivariateFunction([[0.0, 1.0], [0.3, 0.0]])
+        assert sparse.issparse(func.values)
+        assert func.values.nnz == 2
+        assert len(func) == 2
+        assert func[0].tolist() == [0.0, 1.0]
+        assert func[1, 0] == 0.3
+        assert np.asarray(func).tolist() == [[0.0, 1.0], [0.3, 0.0]]
+        assert np.array(func, dtype=np.float32).dtype == np.float32
+
+    def test_make_row_stochastic(self):
+        func = SparseBivariateFunction([[0.0, 2.0], [0.3, 0.9], [0.0, 0.0]])
+        func.make_row_stochastic()
+        assert sparse.issparse(func.values)
+        assert func[0].tolist() == [0.0, 1.0]
+        assert func[1].tolist() == [0.25, 0.75]
+        assert func[2].tolist() == [0.5, 0.5]
+
 
 class TestSenderStrategy(object):
     def test_constructor(self, states, messages):
@@ -1,6 +1,8 @@
 import numpy as np
+import pytest
 
-from democritus.utils import make_stochastic, make_row_stochastic
+from democritus.utils import make_stochastic, make_row_stochastic, Workspace, spawn_random_generators, \
+    spawned_random_generator, ReplicateRandomGenerators
 
 
 def test_make_stochastic_empty_vector():
@@ -29,3 +31,53 @@ def test_make_row_stochastic_some_matrix():
     assert result[1].tolist() == [0.2, 0.175, 0.225, 0.4]
     assert np.sum(result[2]) == 1
     assert result[2].tolist() == [0, 0, 0, 1]
+
+
+def test_make_row_stochastic_integer_matrix():
+    result = make_row_stochastic([[1, 1], [0, 0]])
+    assert result.tolist() == [[0.5, 0.5], [0.5, 0.5]]
+
+
+def test_make_row_stochastic_stacked_matrices():
+    result = make_row_stochastic([[[0, 2], [1, 3]], [[0, 0], [4, 4]]])
+    assert result.tolist() == [[[0, 1], [0.25, 0.75]], [[0.5, 0.5], [0.5, 0.5]]]
+
+
+def test_make_row_stochastic_into_output_buffer():
+    out = np.empty((2, 3))
+    result = make_row_stochastic(np.array([[0, 0, 0], [1, 2, 1]]), out=out)
+    assert result is out
+    assert np.round(out, decimals=3).tolist() == [[0.333, 0.333, 0.333], [0.25, 0.5, 0.25]]
+
+
+def test_make_row_stochastic_in_place():
+    matrix = np.array([[1.0, 3.0], [2.0, 2.0]])
+    make_row_stochastic(matrix, out=matrix)
+    assert matrix.tolist() == [[0.25, 0.75], [0.5, 0.5]]
+
+
+def test_workspace_reuses_arrays():
+    workspace = Workspace()
+    array = workspace.get('some array', (2, 3))
+    assert array.shape == (2, 3)
+    assert workspace.get('some array', (2, 3)) is array
+    assert workspace.get('other array', (2, 3)) is not array
+    assert workspace.get('some array', (4, 3)).shape == (4, 3)
+
+
+def test_spawned_random_generator_matches_spawned_streams():
+    generators = spawn_random_generators(42, 3)
+    assert len(generators) == 3
+    for index, generator in enumerate(generators):
+        assert np.array_equal(generator.random(4), spawned_random_generator(42, index).random(4))
+    assert not np.array_equal(spawned_random_generator(42, 0).random(4), spawned_random_generator(42, 1).random(4))
+
+
+def test_replicate_random_generators_draw_rows_from_active_replicates():
+    replicate_generators = ReplicateRandomGenerators(spawn_random_generators(5, 3))
+    replicate_generators.select(np.array([0, 2]))
+    values = replicate_generators.random((2, 4))
+    assert np.array_equal(values[0], spawned_random_generator(5, 0).random(4))
+    assert np.array_equal(values[1], spawned_random_generator(5, 2).random(4))
+    with pytest.raises(ValueError):
+        replicate_generators.random((3, 4))